@@ -0,0 +1,159 @@
+import bisect
+import difflib
+import threading
+import time
+from .utils import normalize_term
+
+
+def artist_key(name):
+    """Chave do índice: normalize_term com os espaços internos colapsados ("  Beyoncé  Knowles" → "beyonce knowles")."""
+    return " ".join(normalize_term(name).split())
+
+
+class ArtistIndex:
+    """
+    Índice local de artistas já resolvidos: nome normalizado → IDs do Genius e do Spotify,
+    nome oficial e a consulta canônica usada nas chaves de cache. É preenchido a cada busca
+    bem-sucedida e gravado no cache persistente; uma cópia ordenada fica em memória para as
+    buscas por prefixo e aproximadas do autocomplete.
+    """
+
+    def __init__(self, cache, reload_interval=300):
+        self.cache = cache
+        # Outros workers também gravam no índice; a cópia em memória é recarregada periodicamente
+        self.reload_interval = reload_interval
+        self._entries = {}
+        self._keys = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_valid(key, entry):
+        """
+        Uma chave só vale para a própria consulta ou para o nome oficial em que o Genius e o
+        Spotify concordaram; apelidos gravados antes dessa regra são ignorados.
+        """
+        if artist_key(entry.get("query") or "") == key:
+            return True
+        return artist_key(entry.get("genius_name") or "") == key == artist_key(entry.get("spotify_name") or "")
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.reload_interval:
+            return
+        entries = {
+            key: value
+            for key, value, _ in self.cache.backend.items(self.cache.namespace)
+            if self._is_valid(key, value)
+        }
+        with self._lock:
+            # Entradas gravadas por este processo e ainda não persistidas continuam valendo
+            entries.update((key, value) for key, value in self._entries.items() if key not in entries)
+            self._entries = entries
+            self._keys = sorted(entries)
+            self._loaded_at = time.monotonic()
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if key not in self._entries:
+                bisect.insort(self._keys, key)
+            self._entries[key] = entry
+
+    def lookup(self, name):
+        """Entrada do artista para o nome (ignorando caixa, acentos e espaços extras), ou None."""
+        key = artist_key(name)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # Pode ter sido gravada por outro worker depois da última recarga
+            cached = self.cache.get(key)
+            if cached is None or not self._is_valid(key, cached["data"]):
+                return None
+            entry = cached["data"]
+            self._remember(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        if entry != self._entries.get(key):
+            self._remember(key, entry)
+            self.cache[key] = {"data": entry, "timestamp": time.time()}
+
+    def record(self, query, genius_id=None, genius_name=None, spotify_id=None, spotify_name=None, popularity=None):
+        """
+        Registra o resultado de uma busca. `query` é a consulta como chegou na rota, e os nomes
+        são os do artista encontrado em cada serviço. O nome oficial só vira apelido quando o
+        Genius e o Spotify resolveram a consulta para o mesmo nome: buscas parciais como
+        "Taylor" podem encontrar artistas diferentes em cada serviço.
+        """
+        key = artist_key(query)
+        if not key:
+            return None
+        entry = dict(self.lookup(query) or {"query": query})
+        changes = {
+            "genius_id": genius_id,
+            "genius_name": genius_name,
+            "spotify_id": spotify_id,
+            "spotify_name": spotify_name,
+            "popularity": popularity,
+        }
+        entry.update((field, value) for field, value in changes.items() if value is not None)
+        # Com nomes diferentes em cada serviço, nenhum deles representa a consulta
+        names = {}
+        for official_name in (entry.get("spotify_name"), entry.get("genius_name")):
+            if official_name:
+                names.setdefault(artist_key(official_name), official_name)
+        entry["name"] = next(iter(names.values())) if len(names) == 1 else entry["query"]
+        self._store(key, entry)
+
+        official_key = artist_key(entry.get("genius_name") or "")
+        if official_key and official_key != key and official_key == artist_key(entry.get("spotify_name") or ""):
+            # O apelido aponta para a própria consulta (o nome oficial), nunca para a consulta
+            # parcial, que pode ser de outro artista
+            existing = self.lookup(official_key)
+            alias_query = existing["query"] if existing else entry["name"]
+            self._store(official_key, dict(entry, query=alias_query))
+        return entry
+
+    def suggest(self, prefix, limit=10, cutoff=0.75):
+        """
+        Sugestões para o autocomplete: primeiro os nomes que começam com o prefixo (os mais
+        populares no Spotify antes), depois os nomes parecidos, para erros de digitação.
+        """
+        term = artist_key(prefix)
+        if not term:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            keys = list(self._keys)
+            entries = self._entries
+        prefix_keys = []
+        for index in range(bisect.bisect_left(keys, term), len(keys)):
+            if not keys[index].startswith(term):
+                break
+            prefix_keys.append(keys[index])
+        prefix_keys.sort(key=lambda key: (-(entries[key].get("popularity") or 0), key))
+        candidates = prefix_keys
+        if len(prefix_keys) < limit:
+            candidates = prefix_keys + difflib.get_close_matches(term, keys, n=limit * 2, cutoff=cutoff)
+
+        suggestions = []
+        seen = set()
+        for key in candidates:
+            entry = entries[key]
+            # Apelidos do mesmo artista aparecem uma vez só
+            identity = {
+                (source, entry.get(f"{source}_id")) for source in ("genius", "spotify") if entry.get(f"{source}_id")
+            } or {("key", key)}
+            if identity & seen:
+                continue
+            seen |= identity
+            suggestions.append({
+                "name": entry.get("name") or entry["query"],
+                "query": entry["query"],
+                "genius_id": entry.get("genius_id"),
+                "spotify_id": entry.get("spotify_id"),
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
@@ -0,0 +1,620 @@
+import asyncio
+import contextvars
+import functools
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from limits import parse_many
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from . import async_api
+from .config import (
+    ASGI_STORAGE_WORKERS,
+    ENHANCED_SEARCH_DEADLINE,
+    GEMINI_CHUNK_CONCURRENCY,
+    RATELIMIT_STORAGE_URI,
+    SERVER_TIMING_ENABLED,
+)
+from .gemini_api import GeminiOverloadedError, GeminiRequestError, GeminiTimeoutError, call_gemini_model_async
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    end_trace,
+    render as render_metrics,
+    start_trace,
+)
+from .singleflight import AsyncSingleFlight
+from .routes import (
+    EXPLAIN_PROMPT,
+    EXPLAIN_PROMPTS,
+    GEMINI_MODEL,
+    LINE_TRANSLATE_PROMPT,
+    SECTION_EXPLAIN_PROMPT,
+    SECTION_EXPLAIN_TEMPLATE,
+    SECTION_TRANSLATE_PROMPT,
+    TRANSLATE_PROMPT,
+    TRANSLATE_PROMPTS,
+    artist_index,
+    artist_search_cache,
+    cache_backend,
+    cached_failure,
+    enhanced_search_cache,
+    explain_file_cache,
+    generate_content_hash,
+    generate_hash,
+    indexed_genius_id,
+    is_valid_artist_search,
+    lyrics_file_cache,
+    lyric_chunks,
+    lyrics_index,
+    plan_chunks,
+    process_songs,
+    record_genius_artist,
+    record_spotify_artist,
+    remember_failure,
+    resolve_artist_query,
+    serve_stale_or_fail,
+    spotify_file_cache,
+    stitch_explanation,
+    stitch_translations,
+    synthesis_prompt,
+    translate_file_cache,
+    translate_lines,
+)
+
+# Modo de serviço assíncrono (ASGI) com as mesmas rotas e o mesmo contrato JSON do
+# Blueprint Flask. As chamadas ao Spotify, ao Genius e ao Gemini são corrotinas, então
+# milhares de esperas lentas cabem em poucos processos. Os caches são os mesmos do modo Flask.
+
+# Limites de requisição equivalentes aos do Flask-Limiter em routes.py
+DEFAULT_LIMITS = parse_many("200 per day; 50 per hour")
+ROUTE_LIMITS = {
+    "/enhanced_search": parse_many("10 per minute"),
+    "/search_artist": parse_many("10 per minute"),
+    "/get_lyrics": parse_many("10 per minute"),
+    "/artist_suggest": parse_many("120 per minute"),
+    "/search_lyrics": parse_many("60 per minute"),
+}
+rate_limiter = FixedWindowRateLimiter(storage_from_string(RATELIMIT_STORAGE_URI))
+
+# O cache (SQLite), o cache negativo e os limites de requisição (SQLite ou Redis) podem esperar
+# pelo disco ou pela rede; rodam em um pool próprio para não travar o loop de eventos nem
+# disputar threads com a extração das letras e a tradução por linhas (asyncio.to_thread)
+storage_executor = ThreadPoolExecutor(max_workers=ASGI_STORAGE_WORKERS, thread_name_prefix="asgi-storage")
+
+request_coalescer = AsyncSingleFlight()
+background_tasks = set()
+refreshing_keys = set()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, error):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+
+
+async def read_json(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+async def send_body(send, body, content_type, status=200, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_json(send, payload, status=200, headers=()):
+    # Mesmo formato do jsonify do Flask: chaves ordenadas, sem espaços e com quebra de linha final
+    body = (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode()
+    await send_body(send, body, "application/json", status, headers)
+
+def check_rate_limit(scope):
+    client = scope.get("client") or ("desconhecido", 0)
+    path = scope["path"]
+    for limit in ROUTE_LIMITS.get(path, DEFAULT_LIMITS):
+        if not rate_limiter.hit(limit, client[0], path):
+            raise HTTPError(429, f"Limite de requisições excedido: {limit}")
+
+async def run_blocking(fn, *args, **kwargs):
+    """Executa fn no pool de armazenamento, com o contexto da requisição (rastreamento)."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        storage_executor, functools.partial(context.run, fn, *args, **kwargs)
+    )
+
+async def cache_get(cache, key, **kwargs):
+    return await run_blocking(cache.get, key, **kwargs)
+
+async def cache_set(cache, key, data):
+    await run_blocking(cache.__setitem__, key, {"data": data, "timestamp": time.time()})
+
+def schedule_refresh(key, loader, *args):
+    """Atualiza em segundo plano uma entrada que passou do TTL suave, uma vez por chave."""
+    if key in refreshing_keys:
+        return
+    refreshing_keys.add(key)
+
+    async def refresh():
+        try:
+            await request_coalescer.do(key, loader, *args)
+        except Exception as e:
+            print(f"Erro ao atualizar o cache '{key}' em segundo plano: {e}")
+        finally:
+            refreshing_keys.discard(key)
+
+    task = asyncio.create_task(refresh())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def unpack_outcome(outcome):
+    """Converte o (resultado, erro, status) dos helpers de routes.py em resultado ou HTTPError."""
+    result, error, status = outcome
+    if error:
+        raise HTTPError(status, error)
+    return result
+
+async def safe_call(coroutine, message):
+    try:
+        return await coroutine
+    except Exception as e:
+        print(f"{message}: {e}")
+        return None
+
+# Cadeias do Spotify e do Genius
+async def load_spotify_info(artist_name, artist_hash):
+    spotify_info = await async_api.search_artist_info(artist_name)
+    if not spotify_info:
+        return None, []
+    await run_blocking(record_spotify_artist, artist_name, spotify_info)
+    top_tracks = await safe_call(async_api.get_artist_top_tracks(spotify_info["id"]), "Erro ao buscar top tracks do Spotify")
+    if top_tracks is None:
+        return spotify_info, []
+    await cache_set(spotify_file_cache, artist_hash, {"info": spotify_info, "top_tracks": top_tracks})
+    return spotify_info, top_tracks
+
+async def fetch_spotify_chain(artist_name, allow_stale=True):
+    artist_hash = generate_hash(artist_name)
+    cached_info = await cache_get(spotify_file_cache, artist_hash)
+    if cached_info and (allow_stale or not spotify_file_cache.is_stale(cached_info)):
+        if spotify_file_cache.is_stale(cached_info):
+            schedule_refresh(f"spotify:{artist_hash}", load_spotify_info, artist_name, artist_hash)
+        return cached_info["data"]["info"], cached_info["data"]["top_tracks"]
+    try:
+        return await load_spotify_info(artist_name, artist_hash)
+    except Exception as e:
+        stale_info = await cache_get(spotify_file_cache, artist_hash, allow_expired=True)
+        if stale_info is None:
+            raise
+        print(f"Erro ao buscar informações do Spotify ({e}); usando dados antigos do cache.")
+        return stale_info["data"]["info"], stale_info["data"]["top_tracks"]
+
+async def fetch_genius_songs(artist_name):
+    # O ID já resolvido no índice local dispensa a busca no Genius
+    genius_id = await run_blocking(indexed_genius_id, artist_name) or await async_api.get_artist_id(artist_name)
+    if not genius_id:
+        return genius_id, []
+    songs = await safe_call(async_api.get_artist_songs(genius_id), f"Erro ao buscar músicas do artista {genius_id}")
+    if songs:
+        await run_blocking(record_genius_artist, artist_name, genius_id, songs)
+        await run_blocking(lyrics_index.add_songs, songs)
+    return genius_id, songs
+
+# Rotas
+async def load_enhanced_search(artist_name, artist_hash, refresh=False):
+    cached_result = await cache_get(enhanced_search_cache, artist_hash)
+    if cached_result and not refresh:
+        return cached_result["data"]
+    failure_key = f"enhanced:{artist_hash}"
+    if not refresh:
+        failure = await run_blocking(cached_failure, failure_key)
+        if failure:
+            return unpack_outcome(failure)
+
+    spotify_task = asyncio.create_task(fetch_spotify_chain(artist_name, not refresh))
+    genius_task = asyncio.create_task(fetch_genius_songs(artist_name))
+    await asyncio.wait({spotify_task, genius_task}, timeout=ENHANCED_SEARCH_DEADLINE)
+
+    spotify_info, spotify_top_tracks = None, []
+    if spotify_task.done():
+        try:
+            spotify_info, spotify_top_tracks = spotify_task.result()
+        except Exception as e:
+            genius_task.cancel()
+            print(f"Erro ao buscar informações do Spotify: {e}")
+            return unpack_outcome(await run_blocking(
+                serve_stale_or_fail,
+                enhanced_search_cache, artist_hash, failure_key, e, "Erro ao buscar o artista no Spotify.", 502,
+            ))
+        if not spotify_info:
+            genius_task.cancel()
+            await run_blocking(
+                remember_failure, failure_key, "not_found", error="Artista não encontrado no Spotify.", status=404
+            )
+            raise HTTPError(404, "Artista não encontrado no Spotify.")
+
+    genius_songs = []
+    genius_failed = False
+    if genius_task.done():
+        try:
+            genius_songs = genius_task.result()[1] or []
+        except Exception as e:
+            print(f"Erro ao buscar ID do artista: {e}")
+            genius_failed = True
+
+    partial = not (spotify_task.done() and genius_task.done()) or genius_failed
+    spotify_task.cancel()
+    genius_task.cancel()
+    if partial and not spotify_info and not genius_songs:
+        await run_blocking(
+            remember_failure, failure_key, "error", error="Tempo limite excedido ao buscar o artista.", status=504
+        )
+        raise HTTPError(504, "Tempo limite excedido ao buscar o artista.")
+
+    result = {
+        "artist": artist_name,
+        "spotify_info": spotify_info,
+        "spotify_top_tracks": spotify_top_tracks,
+        "genius_songs": process_songs(genius_songs),
+    }
+    if partial:
+        print(f"Busca do /enhanced_search incompleta para '{artist_name}', retornando resultado parcial.")
+        result["partial"] = True
+        return result
+
+    await cache_set(enhanced_search_cache, artist_hash, result)
+    return result
+
+async def enhanced_search(params, data):
+    artist_name = params.get("artist")
+    if not artist_name:
+        raise HTTPError(400, "O parâmetro 'artist' é obrigatório.")
+
+    artist_name = await run_blocking(resolve_artist_query, artist_name)
+    artist_hash = generate_hash(artist_name)
+    cached_result = await cache_get(enhanced_search_cache, artist_hash)
+    if cached_result:
+        if enhanced_search_cache.is_stale(cached_result):
+            schedule_refresh(f"enhanced:{artist_hash}", load_enhanced_search, artist_name, artist_hash, True)
+        return cached_result["data"]
+
+    return await request_coalescer.do(f"enhanced:{artist_hash}", load_enhanced_search, artist_name, artist_hash)
+
+async def load_artist_search(artist_name, artist_hash, refresh=False):
+    cached_result = await cache_get(artist_search_cache, artist_hash)
+    if cached_result and is_valid_artist_search(cached_result["data"]) and not refresh:
+        return cached_result["data"]
+    failure_key = f"artist:{artist_hash}"
+    if not refresh:
+        failure = await run_blocking(cached_failure, failure_key)
+        if failure:
+            return unpack_outcome(failure)
+
+    try:
+        genius_id, songs = await fetch_genius_songs(artist_name)
+    except Exception as e:
+        print(f"Erro ao buscar ID do artista: {e}")
+        return unpack_outcome(await run_blocking(
+            serve_stale_or_fail,
+            artist_search_cache, artist_hash, failure_key, e, "Erro ao buscar o artista no Genius.", 502,
+        ))
+    if not genius_id:
+        result = {"artist": artist_name, "songs": []}
+        return unpack_outcome(await run_blocking(remember_failure, failure_key, "not_found", result=result, status=200))
+
+    if songs is None:
+        return unpack_outcome(await run_blocking(
+            serve_stale_or_fail,
+            artist_search_cache, artist_hash, failure_key, None, "Erro ao buscar as músicas do artista no Genius.", 502,
+        ))
+    if not songs or not isinstance(songs, list):
+        await run_blocking(
+            remember_failure, failure_key, "not_found", error="Nenhuma música encontrada para este artista.", status=404
+        )
+        raise HTTPError(404, "Nenhuma música encontrada para este artista.")
+
+    processed_songs = process_songs(songs)
+    if not processed_songs:
+        raise HTTPError(500, "Erro ao processar as músicas do artista.")
+
+    result = {"artist": artist_name, "songs": processed_songs}
+    await cache_set(artist_search_cache, artist_hash, result)
+    return result
+
+async def search_artist(params, data):
+    artist_name = params.get("artist")
+    if not artist_name:
+        raise HTTPError(400, "O parâmetro 'artist' é obrigatório.")
+
+    artist_name = await run_blocking(resolve_artist_query, artist_name)
+    artist_hash = generate_hash(artist_name)
+    cached_result = await cache_get(artist_search_cache, artist_hash)
+    if cached_result and is_valid_artist_search(cached_result["data"]):
+        if artist_search_cache.is_stale(cached_result):
+            schedule_refresh(f"artist:{artist_hash}", load_artist_search, artist_name, artist_hash, True)
+        return cached_result["data"]
+
+    return await request_coalescer.do(f"artist:{artist_hash}", load_artist_search, artist_name, artist_hash)
+
+async def artist_suggest(params, data):
+    try:
+        limit = min(max(int(params.get("limit", 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    query = params.get("q", "")
+    return {"query": query, "suggestions": await run_blocking(artist_index.suggest, query, limit)}
+
+async def search_lyrics(params, data):
+    query = params.get("q", "").strip()
+    if not query:
+        raise HTTPError(400, "O parâmetro 'q' é obrigatório.")
+    try:
+        limit = min(max(int(params.get("limit", 20)), 1), 50)
+    except ValueError:
+        limit = 20
+    results = await run_blocking(lyrics_index.search, query, limit)
+    if not lyrics_index.available:
+        raise HTTPError(503, "Busca de letras indisponível neste servidor.")
+    return {"query": query, "results": results}
+
+async def load_lyrics(url, url_hash):
+    cached_lyrics = await cache_get(lyrics_file_cache, url_hash)
+    if cached_lyrics:
+        return cached_lyrics["data"]
+    failure_key = f"lyrics:{url_hash}"
+    failure = await run_blocking(cached_failure, failure_key)
+    if failure:
+        return unpack_outcome(failure)
+
+    try:
+        lyrics = await async_api.fetch_lyrics_from_url(url)
+    except Exception as e:
+        print(f"Erro ao buscar a letra de {url}: {e}")
+        return unpack_outcome(await run_blocking(
+            serve_stale_or_fail, lyrics_file_cache, url_hash, failure_key, e, f"Erro ao buscar a letra: {str(e)}", 500
+        ))
+    if not lyrics:
+        await run_blocking(
+            remember_failure, failure_key, "not_found", error="Não foi possível encontrar a letra da música.", status=404
+        )
+        raise HTTPError(404, "Não foi possível encontrar a letra da música.")
+
+    await cache_set(lyrics_file_cache, url_hash, lyrics)
+    await run_blocking(lyrics_index.add_lyrics, url, lyrics)
+    return lyrics
+
+async def get_lyrics(params, data):
+    url = params.get("url")
+    if not url:
+        raise HTTPError(400, "O parâmetro 'url' é obrigatório.")
+
+    url_hash = generate_hash(url)
+    cached_lyrics = await cache_get(lyrics_file_cache, url_hash)
+    if cached_lyrics:
+        return {"lyrics": cached_lyrics["data"], "cached": True}
+
+    lyrics = await request_coalescer.do(f"lyrics:{url_hash}", load_lyrics, url, url_hash)
+    return {"lyrics": lyrics, "cached": False}
+
+async def generate_cached(lyrics, prompt_template, cache, action, generate, cacheable=None):
+    """
+    Consulta o cache por conteúdo e, em caso de falta, gera a resposta com o Gemini. Com
+    `cacheable`, a resposta só é gravada se cacheable() retornar True depois da geração.
+    """
+    content_hash = generate_content_hash(lyrics, prompt_template, GEMINI_MODEL)
+    cached_entry = await cache_get(cache, content_hash)
+    if cached_entry:
+        return cached_entry["data"], True
+    failure_key = f"{cache.namespace}:{content_hash}"
+    failure = await run_blocking(cached_failure, failure_key)
+    if failure:
+        raise HTTPError(failure[2], failure[1])
+
+    try:
+        text = await generate()
+    except GeminiOverloadedError as e:
+        raise HTTPError(503, str(e))
+    except GeminiTimeoutError as e:
+        await run_blocking(remember_failure, failure_key, "error", error=str(e), status=504)
+        raise HTTPError(504, str(e))
+    except GeminiRequestError as e:
+        # Erro da própria requisição ou de configuração: não é guardado no cache negativo
+        print(f"Erro ao {action}: {e}")
+        raise HTTPError(e.status, f"Erro ao {action}: {str(e)}")
+    except Exception as e:
+        print(f"Erro ao {action}: {e}")
+        await run_blocking(remember_failure, failure_key, "error", error=f"Erro ao {action}: {str(e)}", status=500)
+        raise HTTPError(500, f"Erro ao {action}: {str(e)}")
+
+    if cacheable is None or cacheable():
+        await cache_set(cache, content_hash, text)
+    return text, False
+
+async def generate_chunks(chunks, prompt_template, cache):
+    """Versão assíncrona de generate_chunks (routes.py), limitada por um semáforo."""
+    hashed, done, pending = await run_blocking(plan_chunks, chunks, prompt_template, cache)
+    reused = len(done)
+    semaphore = asyncio.Semaphore(GEMINI_CHUNK_CONCURRENCY)
+
+    async def generate(chunk_hash, chunk):
+        async with semaphore:
+            text = await call_gemini_model_async(prompt_template.format(lyrics=chunk), GEMINI_MODEL)
+        await cache_set(cache, chunk_hash, text)
+        return text
+
+    # Todos os trechos terminam antes de uma falha ser repassada, para que os gerados fiquem no cache
+    outcomes = await asyncio.gather(
+        *(generate(chunk_hash, chunk) for chunk_hash, chunk in pending.items()), return_exceptions=True
+    )
+    for chunk_hash, outcome in zip(pending, outcomes):
+        if isinstance(outcome, BaseException):
+            raise outcome
+        done[chunk_hash] = outcome
+    return [(chunk, done[chunk_hash]) for chunk, chunk_hash in hashed], len(pending), reused
+
+async def explain_sections(lyrics):
+    chunks = lyric_chunks(lyrics)
+    if len(chunks) <= 1:
+        return await call_gemini_model_async(EXPLAIN_PROMPT.format(lyrics=lyrics), GEMINI_MODEL), 0, 0
+    results, generated, reused = await generate_chunks(chunks, SECTION_EXPLAIN_PROMPT, explain_file_cache)
+    synthesis = await call_gemini_model_async(synthesis_prompt(results), GEMINI_MODEL)
+    return stitch_explanation(synthesis, results), generated, reused
+
+async def translate(params, data):
+    if not data or "lyrics" not in data:
+        raise HTTPError(400, "A propriedade 'lyrics' é obrigatória.")
+
+    lyrics = data["lyrics"]
+    mode = data.get("mode", "full")
+    if mode not in TRANSLATE_PROMPTS:
+        raise HTTPError(400, "A propriedade 'mode' deve ser 'full', 'lines' ou 'sections'.")
+
+    if mode == "lines":
+        # A tradução por linhas usa a memória de linhas e o pool síncrono do Gemini
+        line_counts = {}
+
+        async def generate():
+            translation, line_counts["translated"], line_counts["reused"], line_counts["missing"] = await asyncio.to_thread(
+                translate_lines, lyrics
+            )
+            return translation
+
+        # Uma tradução com linhas no original não é gravada: a próxima requisição tenta de novo
+        translation, cached = await generate_cached(
+            lyrics, LINE_TRANSLATE_PROMPT, translate_file_cache, "traduzir", generate,
+            cacheable=lambda: not line_counts["missing"],
+        )
+        result = {"translation": translation, "cached": cached}
+        if not cached:
+            result["lines_translated"] = line_counts["translated"]
+            result["lines_reused"] = line_counts["reused"]
+            result["lines_missing"] = line_counts["missing"]
+        return result
+
+    if mode == "sections":
+        section_counts = {}
+
+        async def generate():
+            results, section_counts["generated"], section_counts["reused"] = await generate_chunks(
+                lyric_chunks(lyrics), SECTION_TRANSLATE_PROMPT, translate_file_cache
+            )
+            return stitch_translations(results)
+
+        translation, cached = await generate_cached(lyrics, SECTION_TRANSLATE_PROMPT, translate_file_cache, "traduzir", generate)
+        result = {"translation": translation, "cached": cached}
+        if not cached:
+            result["sections_generated"] = section_counts["generated"]
+            result["sections_reused"] = section_counts["reused"]
+        return result
+
+    translation, cached = await generate_cached(
+        lyrics, TRANSLATE_PROMPT, translate_file_cache, "traduzir",
+        lambda: call_gemini_model_async(TRANSLATE_PROMPT.format(lyrics=lyrics), GEMINI_MODEL),
+    )
+    return {"translation": translation, "cached": cached}
+
+async def explain(params, data):
+    if not data or "lyrics" not in data:
+        raise HTTPError(400, "A propriedade 'lyrics' é obrigatória.")
+
+    lyrics = data["lyrics"]
+    mode = data.get("mode", "full")
+    if mode not in EXPLAIN_PROMPTS:
+        raise HTTPError(400, "A propriedade 'mode' deve ser 'full' ou 'sections'.")
+
+    if mode == "sections":
+        section_counts = {}
+
+        async def generate():
+            explanation, section_counts["generated"], section_counts["reused"] = await explain_sections(lyrics)
+            return explanation
+
+        explanation, cached = await generate_cached(lyrics, SECTION_EXPLAIN_TEMPLATE, explain_file_cache, "explicar", generate)
+        result = {"explanation": explanation, "cached": cached}
+        if not cached:
+            result["sections_generated"] = section_counts["generated"]
+            result["sections_reused"] = section_counts["reused"]
+        return result
+
+    explanation, cached = await generate_cached(
+        lyrics, EXPLAIN_PROMPT, explain_file_cache, "explicar",
+        lambda: call_gemini_model_async(EXPLAIN_PROMPT.format(lyrics=lyrics), GEMINI_MODEL),
+    )
+    return {"explanation": explanation, "cached": cached}
+
+ROUTES = {
+    ("GET", "/enhanced_search"): enhanced_search,
+    ("GET", "/search_artist"): search_artist,
+    ("GET", "/artist_suggest"): artist_suggest,
+    ("GET", "/search_lyrics"): search_lyrics,
+    ("GET", "/get_lyrics"): get_lyrics,
+    ("POST", "/translate"): translate,
+    ("POST", "/explain"): explain,
+}
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_api.close_async_client()
+            # Gravar escritas pendentes do cache antes de encerrar
+            await run_blocking(cache_backend.flush)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    if (scope["method"], scope["path"]) == ("GET", "/metrics"):
+        await send_body(send, render_metrics().encode(), METRICS_CONTENT_TYPE)
+        return
+
+    handler = ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        await send_json(send, {"error": "Rota não encontrada."}, 404)
+        return
+
+    # Rastreamento da requisição, como nos hooks do Blueprint em routes.py
+    HTTP_IN_FLIGHT.inc()
+    trace, token = start_trace()
+    status = 200
+    try:
+        await run_blocking(check_rate_limit, scope)
+        params = {key: values[0] for key, values in parse_qs(scope["query_string"].decode()).items()}
+        data = await read_json(receive) if scope["method"] == "POST" else None
+        payload = await handler(params, data)
+    except HTTPError as e:
+        payload, status = {"error": e.error}, e.status
+    except Exception as e:
+        print(f"Erro inesperado na rota {scope['path']}: {e}")
+        payload, status = {"error": "Erro interno no servidor."}, 500
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        end_trace(token)
+
+    elapsed = time.perf_counter() - trace.started_at
+    HTTP_REQUEST_SECONDS.observe(elapsed, scope["path"], scope["method"], str(status))
+    headers = [(b"server-timing", trace.server_timing().encode())] if SERVER_TIMING_ENABLED else []
+    await send_json(send, payload, status, headers)
@@ -0,0 +1,190 @@
+import asyncio
+import math
+import time
+import httpx
+from urllib.parse import quote
+from .config import (
+    API_TIMEOUT,
+    GENIUS_PAGE_CONCURRENCY,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_MAXSIZE,
+    headers as page_headers,
+)
+from .circuit_breaker import breaker_for_url
+from .metrics import UPSTREAM_IN_FLIGHT, record_upstream, timed
+from .genius_api import GENIUS_API_TOKEN, GENIUS_BASE_URL, extract_lyrics, pick_artist_id
+from .spotify_api import (
+    SPOTIFY_ACCOUNTS_URL,
+    SPOTIFY_API_URL,
+    build_token_request,
+    cached_token,
+    parse_artist_info,
+    parse_track,
+    store_token,
+)
+
+# Versões assíncronas das chamadas ao Genius e ao Spotify, usadas pelo modo ASGI.
+# A interpretação das respostas é compartilhada com genius_api e spotify_api.
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_client = None
+_token_lock = None
+
+def get_async_client():
+    """Cliente HTTP assíncrono do processo, com conexões keep-alive reutilizadas."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=API_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=HTTP_POOL_MAXSIZE),
+        )
+    return _client
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def request(method, url, **kwargs):
+    """
+    Requisição com retentativas e backoff exponencial para falhas de conexão, 429 e 5xx.
+    O resultado final conta para o disjuntor do serviço e para as métricas, como em http_client.request.
+    """
+    breaker = breaker_for_url(url)
+    upstream = breaker.name if breaker is not None else "other"
+    if breaker is not None:
+        try:
+            breaker.before_call()
+        except Exception as e:
+            record_upstream(upstream, 0, error=e)
+            raise
+    UPSTREAM_IN_FLIGHT.inc(upstream)
+    started_at = time.perf_counter()
+    try:
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                response = await get_async_client().request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS or attempt == HTTP_MAX_RETRIES:
+                    if breaker is not None:
+                        breaker.record_status(response.status_code)
+                    record_upstream(upstream, time.perf_counter() - started_at, status=response.status_code)
+                    return response
+            except httpx.TransportError as e:
+                if attempt == HTTP_MAX_RETRIES:
+                    if breaker is not None:
+                        breaker.record_failure()
+                    record_upstream(upstream, time.perf_counter() - started_at, error=e)
+                    raise
+            await asyncio.sleep(HTTP_BACKOFF_FACTOR * (2 ** attempt))
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(upstream)
+
+@timed("genius_search")
+async def get_artist_id(artist_name):
+    """Busca o ID do artista no Genius; retorna None se não houver resultado e lança exceção em caso de falha."""
+    headers = {"Authorization": f"Bearer {GENIUS_API_TOKEN}"}
+    response = await request("GET", f"{GENIUS_BASE_URL}/search", headers=headers, params={"q": artist_name})
+    if response.status_code != 200:
+        print(f"Erro na API: Status {response.status_code}")
+        response.raise_for_status()
+    hits = response.json().get("response", {}).get("hits", [])
+    print(f"Resultados da API para '{artist_name}': {len(hits)} hits encontrados")
+    return pick_artist_id(artist_name, hits)
+
+@timed("genius_songs_page")
+async def fetch_songs_page(artist_id, page, per_page):
+    headers = {"Authorization": f"Bearer {GENIUS_API_TOKEN}"}
+    params = {"sort": "popularity", "per_page": per_page, "page": page}
+    response = await request("GET", f"{GENIUS_BASE_URL}/artists/{artist_id}/songs", headers=headers, params=params)
+    response.raise_for_status()
+    return response.json().get("response", {})
+
+async def get_artist_songs(artist_id, per_page=50, max_songs=100):
+    """
+    Obtém as músicas primárias do artista buscando as páginas em paralelo
+    (até GENIUS_PAGE_CONCURRENCY simultâneas) e juntando-as na ordem das páginas.
+    """
+    semaphore = asyncio.Semaphore(GENIUS_PAGE_CONCURRENCY)
+
+    async def fetch(page):
+        async with semaphore:
+            return await fetch_songs_page(artist_id, page, per_page)
+
+    all_songs = []
+    page = 1
+    try:
+        while page and len(all_songs) < max_songs:
+            page_count = math.ceil((max_songs - len(all_songs)) / per_page)
+            pages = await asyncio.gather(*(fetch(page + offset) for offset in range(page_count)))
+            next_page = None
+            for data in pages:
+                page_songs = data.get("songs", [])
+                next_page = data.get("next_page")
+                all_songs.extend(
+                    song for song in page_songs
+                    if song.get("primary_artist", {}).get("id") == artist_id
+                )
+                if len(all_songs) >= max_songs or not page_songs or not next_page:
+                    next_page = None
+                    break
+            page = next_page
+    except Exception as e:
+        print(f"Erro ao buscar músicas do artista {artist_id}: {e}")
+        return all_songs[:max_songs] if all_songs else None
+
+    print(f"Recuperadas {len(all_songs[:max_songs])} músicas primárias para o artista {artist_id}")
+    return all_songs[:max_songs]
+
+@timed("genius_lyrics_page")
+async def fetch_lyrics_from_url(url):
+    """Baixa a página do Genius e extrai a letra fora do event loop."""
+    response = await request("GET", url, headers=page_headers)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return await asyncio.to_thread(extract_lyrics, response.text)
+
+async def get_spotify_token():
+    """Obtém ou renova o token do Spotify; apenas uma renovação por vez."""
+    global _token_lock
+    token = cached_token()
+    if token:
+        return token
+    if _token_lock is None:
+        _token_lock = asyncio.Lock()
+    async with _token_lock:
+        token = cached_token()
+        if token:
+            return token
+        headers, data = build_token_request()
+        response = await request("POST", SPOTIFY_ACCOUNTS_URL, headers=headers, data=data)
+        if response.status_code != 200:
+            print(f"Erro ao obter token do Spotify: {response.status_code}")
+            response.raise_for_status()
+        return store_token(response.json())
+
+@timed("spotify_search")
+async def search_artist_info(artist_name):
+    """Busca informações detalhadas sobre um artista no Spotify."""
+    token = await get_spotify_token()
+    if not token:
+        return None
+    url = f"{SPOTIFY_API_URL}/search?q={quote(artist_name)}&type=artist&limit=1"
+    response = await request("GET", url, headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    return parse_artist_info(response.json())
+
+@timed("spotify_top_tracks")
+async def get_artist_top_tracks(artist_id, country="BR"):
+    """Busca as músicas mais populares de um artista no Spotify."""
+    token = await get_spotify_token()
+    if not token:
+        return None
+    url = f"{SPOTIFY_API_URL}/artists/{artist_id}/top-tracks?country={country}"
+    response = await request("GET", url, headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    return [parse_track(track) for track in response.json()["tracks"]]
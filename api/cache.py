@@ -0,0 +1,794 @@
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from .metrics import record_cache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Funções auxiliares para arquivos JSON de cache
+def load_file_cache(file_path):
+    if file_path.exists():
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar cache: {e}")
+    return {}
+
+def save_file_cache(cache_data, file_path):
+    # Grava em um arquivo temporário e troca com os.replace, para que uma falha no meio
+    # da escrita nunca deixe o arquivo de cache truncado
+    tmp_path = None
+    started_at = time.perf_counter()
+    try:
+        file_path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=file_path.parent, prefix=file_path.name + ".", suffix=".tmp"
+        )
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        tmp_path = None
+        record_cache(file_path.stem, "json_write", time.perf_counter() - started_at)
+    except Exception as e:
+        print(f"Erro ao salvar cache: {e}")
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class CacheBackend:
+    """Interface dos backends de cache: leitura e escrita por chave dentro de um namespace."""
+
+    def get(self, namespace, key):
+        """Retorna (valor, timestamp) ou None."""
+        raise NotImplementedError
+
+    def set(self, namespace, key, value, timestamp):
+        raise NotImplementedError
+
+    def set_many(self, namespace, items):
+        """Grava vários itens (chave, valor, timestamp) de uma vez."""
+        for key, value, timestamp in items:
+            self.set(namespace, key, value, timestamp)
+
+    def delete(self, namespace, key):
+        raise NotImplementedError
+
+    def count(self, namespace):
+        raise NotImplementedError
+
+    def items(self, namespace):
+        """Retorna todas as entradas do namespace como (chave, valor, timestamp)."""
+        raise NotImplementedError
+
+    def purge_expired(self, namespace, max_age):
+        """Remove entradas mais antigas que max_age segundos e retorna quantas foram removidas."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ValueCodec:
+    """
+    Serializa os valores do cache em JSON e comprime os maiores que min_size bytes com
+    zlib ou zstd (opcionalmente com um dicionário treinado em letras). O primeiro byte
+    indica o formato, então valores gravados com outra configuração continuam legíveis.
+    """
+
+    RAW, ZLIB, ZSTD, ZSTD_DICT = b"j", b"z", b"s", b"d"
+
+    def __init__(self, algorithm="zlib", level=6, min_size=256, zstd_dict_path=None):
+        if algorithm == "zstd" and zstandard is None:
+            print("Pacote zstandard não instalado; usando zlib para comprimir o cache.")
+            algorithm = "zlib"
+        self.algorithm = algorithm
+        self.level = level
+        self.min_size = min_size
+        self._zstd_dict = None
+        if zstd_dict_path and zstandard is not None and Path(zstd_dict_path).exists():
+            self._zstd_dict = zstandard.ZstdCompressionDict(Path(zstd_dict_path).read_bytes())
+        # Compressores e descompressores zstd não podem ser usados por duas threads ao mesmo tempo
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.decompressions = 0
+        self.decompress_seconds = 0.0
+
+    def _zstd(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._zstd_dict)
+            self._local.decompressor = zstandard.ZstdDecompressor(dict_data=self._zstd_dict)
+        return self._local.compressor, self._local.decompressor
+
+    def encode(self, value):
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if self.algorithm == "none" or len(raw) < self.min_size:
+            stored = self.RAW + raw
+        elif self.algorithm == "zstd":
+            prefix = self.ZSTD_DICT if self._zstd_dict is not None else self.ZSTD
+            stored = prefix + self._zstd()[0].compress(raw)
+        else:
+            stored = self.ZLIB + zlib.compress(raw, self.level)
+        with self._stats_lock:
+            self.raw_bytes += len(raw)
+            self.stored_bytes += len(stored)
+        return stored
+
+    def decode(self, stored):
+        # Valores gravados como texto JSON antes da compressão
+        if isinstance(stored, str):
+            return json.loads(stored)
+        prefix, payload = stored[:1], stored[1:]
+        if prefix == self.RAW:
+            return json.loads(payload)
+
+        started_at = time.perf_counter()
+        if prefix == self.ZLIB:
+            raw = zlib.decompress(payload)
+        elif prefix in (self.ZSTD, self.ZSTD_DICT):
+            if zstandard is None:
+                raise ValueError("Valor comprimido com zstd, mas o pacote zstandard não está instalado.")
+            if prefix == self.ZSTD_DICT and self._zstd_dict is None:
+                raise ValueError("Valor comprimido com dicionário zstd, mas CACHE_ZSTD_DICT não foi configurado.")
+            raw = self._zstd()[1].decompress(payload)
+        else:
+            raise ValueError(f"Formato de valor de cache desconhecido: {prefix!r}")
+        with self._stats_lock:
+            self.decompressions += 1
+            self.decompress_seconds += time.perf_counter() - started_at
+        return json.loads(raw)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "algorithm": self.algorithm + (" + dicionário" if self._zstd_dict is not None else ""),
+                "raw_bytes": self.raw_bytes,
+                "stored_bytes": self.stored_bytes,
+                "compression_ratio": self.raw_bytes / self.stored_bytes if self.stored_bytes else None,
+                "decompressions": self.decompressions,
+                "decompress_seconds": self.decompress_seconds,
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend em SQLite: cada leitura ou escrita toca apenas a chave envolvida, e os valores
+    ficam comprimidos no disco, sendo descomprimidos só quando lidos.
+    """
+
+    def __init__(self, db_path, codec=None):
+        self.db_path = Path(db_path)
+        self.codec = codec or ValueCodec()
+        self.db_path.parent.mkdir(exist_ok=True)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                timestamp REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_timestamp
+                ON cache_entries (namespace, timestamp);
+            """
+        )
+
+    def _connect(self):
+        # sqlite3 não permite compartilhar conexões entre threads, então cada thread tem a sua;
+        # conexões herdadas de um fork (ex.: gunicorn --preload) também são descartadas
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace, key):
+        row = self._connect().execute(
+            "SELECT value, timestamp FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.codec.decode(row[0]), row[1]
+        except Exception as e:
+            print(f"Erro ao ler o valor de cache '{namespace}/{key}': {e}")
+            return None
+
+    def set(self, namespace, key, value, timestamp):
+        self.set_many(namespace, [(key, value, timestamp)])
+
+    def set_many(self, namespace, items):
+        rows = [
+            (namespace, key, self.codec.encode(value), timestamp)
+            for key, value, timestamp in items
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, namespace, key):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            )
+
+    def count(self, namespace):
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (namespace,)
+        ).fetchone()
+        return row[0]
+
+    def items(self, namespace):
+        rows = self._connect().execute(
+            "SELECT key, value, timestamp FROM cache_entries WHERE namespace = ?", (namespace,)
+        ).fetchall()
+        entries = []
+        for key, stored, timestamp in rows:
+            try:
+                entries.append((key, self.codec.decode(stored), timestamp))
+            except Exception as e:
+                print(f"Erro ao ler o valor de cache '{namespace}/{key}': {e}")
+        return entries
+
+    def purge_expired(self, namespace, max_age):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND timestamp < ?",
+                (namespace, time.time() - max_age),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JsonFileBackend(CacheBackend):
+    """Backend legado: um arquivo JSON por namespace, regravado inteiro a cada escrita."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _namespace_data(self, namespace):
+        if namespace not in self._data:
+            self._data[namespace] = load_file_cache(self.files[namespace])
+        return self._data[namespace]
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._namespace_data(namespace).get(key)
+        if entry is None:
+            return None
+        return entry["data"], entry.get("timestamp", 0)
+
+    def set(self, namespace, key, value, timestamp):
+        self.set_many(namespace, [(key, value, timestamp)])
+
+    def set_many(self, namespace, items):
+        with self._lock:
+            data = self._namespace_data(namespace)
+            for key, value, timestamp in items:
+                data[key] = {"data": value, "timestamp": timestamp}
+            save_file_cache(data, self.files[namespace])
+
+    def delete(self, namespace, key):
+        with self._lock:
+            data = self._namespace_data(namespace)
+            if data.pop(key, None) is not None:
+                save_file_cache(data, self.files[namespace])
+
+    def count(self, namespace):
+        with self._lock:
+            return len(self._namespace_data(namespace))
+
+    def items(self, namespace):
+        with self._lock:
+            return [
+                (key, entry["data"], entry.get("timestamp", 0))
+                for key, entry in self._namespace_data(namespace).items()
+            ]
+
+    def purge_expired(self, namespace, max_age):
+        now = time.time()
+        with self._lock:
+            data = self._namespace_data(namespace)
+            keys_to_remove = [
+                key for key, value in data.items()
+                if now - value.get('timestamp', 0) > max_age
+            ]
+            for key in keys_to_remove:
+                del data[key]
+            if keys_to_remove:
+                save_file_cache(data, self.files[namespace])
+        return len(keys_to_remove)
+
+
+_DELETED = object()
+
+
+class WriteBehindBackend(CacheBackend):
+    """
+    Envolve outro backend guardando as escritas em memória e gravando-as em lote
+    por uma thread de fundo, a cada flush_interval segundos ou quando max_dirty
+    chaves estiverem pendentes. As leituras consultam primeiro as escritas pendentes.
+    """
+
+    def __init__(self, inner, flush_interval=0.5, max_dirty=100):
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.flush_count = 0
+        self.flushed_keys = 0
+        self._dirty = {}
+        # Escritas já retiradas do buffer pelo flush em andamento e ainda não gravadas
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._start_writer()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _start_writer(self):
+        self._thread = threading.Thread(target=self._run, name="cache-writer", daemon=True)
+        self._thread.start()
+
+    def _after_fork(self):
+        # A thread de gravação não sobrevive ao fork; as escritas pendentes ficam com o processo pai
+        self._dirty = {}
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        if not self._stopped:
+            self._start_writer()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def dirty_count(self):
+        """Número de chaves com escrita pendente."""
+        with self._lock:
+            return len(self._dirty)
+
+    def flush(self):
+        """Grava todas as escritas pendentes no backend interno."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._dirty = self._dirty, {}
+                # As leituras continuam vendo essas escritas até chegarem ao backend interno
+                self._flushing = pending
+            if not pending:
+                return
+            started_at = time.perf_counter()
+            writes = {}
+            try:
+                for (namespace, key), entry in pending.items():
+                    if entry is _DELETED:
+                        self.inner.delete(namespace, key)
+                    else:
+                        writes.setdefault(namespace, []).append((key, entry[0], entry[1]))
+                for namespace, items in writes.items():
+                    self.inner.set_many(namespace, items)
+            except Exception as e:
+                print(f"Erro ao gravar cache em lote: {e}")
+                # Devolver ao buffer o que não foi gravado, sem sobrescrever escritas mais novas
+                with self._lock:
+                    for dirty_key, entry in pending.items():
+                        self._dirty.setdefault(dirty_key, entry)
+                    self._flushing = {}
+                return
+            with self._lock:
+                self._flushing = {}
+            self.flush_count += 1
+            self.flushed_keys += len(pending)
+            record_cache("write_behind", "flush", time.perf_counter() - started_at)
+
+    def _mark_dirty(self, namespace, key, entry):
+        with self._lock:
+            self._dirty[(namespace, key)] = entry
+            should_flush = len(self._dirty) >= self.max_dirty
+        if should_flush:
+            self._wakeup.set()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._dirty.get((namespace, key))
+            if entry is None:
+                entry = self._flushing.get((namespace, key))
+        if entry is _DELETED:
+            return None
+        if entry is not None:
+            return entry
+        return self.inner.get(namespace, key)
+
+    def set(self, namespace, key, value, timestamp):
+        self._mark_dirty(namespace, key, (value, timestamp))
+
+    def set_many(self, namespace, items):
+        for key, value, timestamp in items:
+            self._mark_dirty(namespace, key, (value, timestamp))
+
+    def delete(self, namespace, key):
+        self._mark_dirty(namespace, key, _DELETED)
+
+    def count(self, namespace):
+        self.flush()
+        return self.inner.count(namespace)
+
+    def items(self, namespace):
+        self.flush()
+        return self.inner.items(namespace)
+
+    def purge_expired(self, namespace, max_age):
+        self.flush()
+        return self.inner.purge_expired(namespace, max_age)
+
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self.inner.close()
+
+
+class LazyBackend(CacheBackend):
+    """
+    Adia a criação do backend (abrir o banco, importar os JSON antigos, iniciar a thread
+    de gravação) até o primeiro acesso ao cache, deixando a importação das rotas leve.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def is_loaded(self):
+        return self._backend is not None
+
+    def load(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._factory()
+        return self._backend
+
+    def get(self, namespace, key):
+        return self.load().get(namespace, key)
+
+    def set(self, namespace, key, value, timestamp):
+        self.load().set(namespace, key, value, timestamp)
+
+    def set_many(self, namespace, items):
+        self.load().set_many(namespace, items)
+
+    def delete(self, namespace, key):
+        self.load().delete(namespace, key)
+
+    def count(self, namespace):
+        return self.load().count(namespace)
+
+    def items(self, namespace):
+        return self.load().items(namespace)
+
+    def purge_expired(self, namespace, max_age):
+        return self.load().purge_expired(namespace, max_age)
+
+    def flush(self):
+        # Sem backend aberto não há nada pendente para gravar
+        if self._backend is not None and hasattr(self._backend, "flush"):
+            self._backend.flush()
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+    def __getattr__(self, name):
+        # Demais atributos do backend real (dirty_count, flush_count...)
+        return getattr(self.load(), name)
+
+
+class CacheJanitor:
+    """
+    Executa a limpeza das entradas expiradas (sweep) em uma thread de fundo, logo ao
+    iniciar e depois a cada interval segundos, em vez de bloquear a inicialização.
+    """
+
+    def __init__(self, sweep, interval):
+        self.sweep = sweep
+        self.interval = interval
+        self.runs = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+        # Parar antes que o interpretador encerre os ThreadPoolExecutor: os hooks de
+        # threading._register_atexit rodam antes dos de atexit (onde o cache grava o último
+        # lote) e na ordem inversa, então este roda antes do encerramento dos executores
+        register_exit = getattr(threading, "_register_atexit", atexit.register)
+        register_exit(self.stop)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cache-janitor", daemon=True)
+                self._thread.start()
+
+    def _after_fork(self):
+        # A thread não sobrevive ao fork; cada worker retoma a própria limpeza
+        self._lock = threading.Lock()
+        was_running = self._thread is not None
+        self._thread = None
+        if was_running and not self._stopped.is_set():
+            self.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                # Uma limpeza interrompida pelo encerramento do processo não é um erro
+                if not self._stopped.is_set():
+                    print(f"Erro na limpeza periódica do cache: {e}")
+            self.runs += 1
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class MemoryLRU:
+    """
+    Camada em memória na frente do backend, limitada por número de entradas e por bytes
+    (tamanho aproximado do valor em JSON). Ao passar do limite, as entradas usadas há mais
+    tempo são descartadas da memória, mas continuam disponíveis no backend em disco.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (valor, timestamp, tamanho)
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def set(self, key, value, timestamp):
+        size = len(json.dumps(value, ensure_ascii=False))
+        with self._lock:
+            self._discard(key)
+            # Valores maiores que o limite inteiro nem entram na memória
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+            self._entries[key] = (value, timestamp, size)
+            self.size_bytes += size
+            while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class Cache:
+    """
+    Visão de um namespace do backend com a interface de dicionário usada pelas rotas:
+    cache.get(chave) retorna {"data": ..., "timestamp": ...} e cache[chave] = {...} grava.
+    """
+
+    def __init__(self, backend, namespace, expiry, soft_expiry=None, memory=None):
+        self.backend = backend
+        self.namespace = namespace
+        # expiry é o TTL rígido (a entrada deixa de ser servida e é removida);
+        # soft_expiry, quando definido, marca a entrada como "velha" para ser atualizada em segundo plano
+        self.expiry = expiry
+        self.soft_expiry = soft_expiry
+        # Camada MemoryLRU opcional consultada antes do backend
+        self.memory = memory
+
+    def get(self, key, default=None, allow_expired=False):
+        """
+        Retorna {"data": ..., "timestamp": ...} ou default. Com allow_expired=True, entradas
+        além do TTL rígido que ainda não foram removidas também são retornadas (usado para
+        servir dados antigos enquanto um serviço externo está fora do ar).
+        """
+        started_at = time.perf_counter()
+        result = "memory_hit"
+        entry = self.memory.get(key) if self.memory is not None else None
+        refresh_after = self.expiry if self.soft_expiry is None else self.soft_expiry
+        if entry is not None and time.time() - entry[1] > refresh_after:
+            # A cópia em memória é só deste processo: depois do TTL suave, outro worker pode já
+            # ter gravado uma versão mais nova no backend compartilhado
+            stored = self.backend.get(self.namespace, key)
+            if stored is not None and stored[1] > entry[1]:
+                result = "hit"
+                entry = stored
+                self.memory.set(key, *entry)
+        if entry is None:
+            result = "hit"
+            entry = self.backend.get(self.namespace, key)
+            if entry is not None and self.memory is not None:
+                self.memory.set(key, *entry)
+        if entry is None:
+            result = "miss"
+        elif time.time() - entry[1] > self.expiry:
+            # Entradas vencidas são ignoradas mesmo antes da limpeza periódica removê-las
+            result = "stale" if allow_expired else "miss"
+        record_cache(self.namespace, "get", time.perf_counter() - started_at, result)
+        if result == "miss":
+            return default
+        value, timestamp = entry
+        return {"data": value, "timestamp": timestamp}
+
+    def is_stale(self, entry):
+        """Retorna True se a entrada passou do TTL suave e deve ser atualizada."""
+        if self.soft_expiry is None:
+            return False
+        return time.time() - entry["timestamp"] > self.soft_expiry
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key, entry):
+        started_at = time.perf_counter()
+        timestamp = entry.get("timestamp", time.time())
+        if self.memory is not None:
+            self.memory.set(key, entry["data"], timestamp)
+        self.backend.set(self.namespace, key, entry["data"], timestamp)
+        record_cache(self.namespace, "set", time.perf_counter() - started_at)
+
+    def __delitem__(self, key):
+        if self.memory is not None:
+            self.memory.delete(key)
+        self.backend.delete(self.namespace, key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self.backend.count(self.namespace)
+
+    def clean_expired(self):
+        # Entradas vencidas na memória já são ignoradas pelo get; esvaziar a camada evita
+        # que ocupem espaço depois de removidas do disco
+        if self.memory is not None:
+            self.memory.clear()
+        return self.backend.purge_expired(self.namespace, self.expiry)
+
+
+def create_backend(kind, cache_dir, json_files, codec=None):
+    """Cria o backend configurado ('sqlite' ou 'json')."""
+    if kind == "json":
+        return JsonFileBackend(json_files)
+    if kind == "sqlite":
+        return SQLiteBackend(Path(cache_dir) / "cache.db", codec=codec)
+    raise ValueError(f"Backend de cache desconhecido: {kind}")
+
+
+def migrate_json_caches(backend, json_files):
+    """
+    Importa os arquivos cache/*.json antigos para o backend e os renomeia para *.json.migrated,
+    para que a importação aconteça só uma vez.
+    """
+    for namespace, file_path in json_files.items():
+        if not file_path.exists():
+            continue
+        # Renomear antes de importar garante que só um worker faça a importação
+        claimed_path = file_path.with_name(f"{file_path.name}.migrating-{os.getpid()}")
+        try:
+            file_path.rename(claimed_path)
+        except FileNotFoundError:
+            continue
+        data = load_file_cache(claimed_path)
+        items = [
+            (key, value["data"], value.get("timestamp", 0))
+            for key, value in data.items()
+            if isinstance(value, dict) and "data" in value
+        ]
+        if items:
+            backend.set_many(namespace, items)
+        claimed_path.rename(file_path.with_name(file_path.name + ".migrated"))
+        print(f"Cache '{namespace}' migrado de {file_path.name}: {len(items)} entradas")
+
+
+def train_zstd_dictionary(backend, namespaces, output_path, dict_size=112640, max_samples=5000):
+    """
+    Treina um dicionário zstd com valores já gravados no backend SQLite (por exemplo, as
+    letras) e o salva em output_path, para ser usado com CACHE_ZSTD_DICT.
+    """
+    if zstandard is None:
+        raise RuntimeError("O pacote zstandard é necessário para treinar o dicionário.")
+    samples = []
+    conn = backend._connect()
+    for namespace in namespaces:
+        rows = conn.execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? ORDER BY timestamp DESC LIMIT ?",
+            (namespace, max_samples),
+        )
+        for (stored,) in rows:
+            try:
+                samples.append(json.dumps(backend.codec.decode(stored), ensure_ascii=False).encode("utf-8"))
+            except Exception:
+                continue
+    dictionary = zstandard.train_dictionary(dict_size, samples)
+    Path(output_path).write_bytes(dictionary.as_bytes())
+    print(f"Dicionário zstd treinado com {len(samples)} amostras e salvo em {output_path}")
+    return output_path
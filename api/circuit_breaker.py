@@ -0,0 +1,99 @@
+import threading
+import time
+from urllib.parse import urlsplit
+from .config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT, UPSTREAM_HOSTS
+
+# Status HTTP que indicam falha do serviço externo (e não da requisição)
+FAILURE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """O circuito do serviço externo está aberto: a chamada é recusada sem esperar o timeout."""
+
+    def __init__(self, upstream):
+        super().__init__(f"O serviço {upstream} está indisponível no momento. Tente novamente em instantes.")
+        self.upstream = upstream
+
+
+class CircuitBreaker:
+    """
+    Disjuntor por serviço externo. Depois de failure_threshold falhas seguidas o circuito
+    abre e as chamadas falham imediatamente com CircuitOpenError; passados reset_timeout
+    segundos, uma única chamada de teste é liberada e, se der certo, o circuito fecha.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.times_opened = 0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Lança CircuitOpenError se a chamada não puder ser feita agora."""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            # Uma chamada de teste por vez; se ela nunca registrar o resultado (ex.: cancelada),
+            # outra é liberada depois de reset_timeout segundos
+            now = time.monotonic()
+            if self.state == "half_open" and (not self._probing or now - self._probe_started >= self.reset_timeout):
+                self._probing = True
+                self._probe_started = now
+                return
+            self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"Circuito do {self.name} aberto após {self.failures} falhas seguidas.")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def record_status(self, status_code):
+        if status_code in FAILURE_STATUS:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+breakers = {
+    name: CircuitBreaker(name, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+    for name in sorted(set(UPSTREAM_HOSTS.values()) | {"gemini"})
+}
+
+def breaker_for_url(url):
+    """Disjuntor do serviço externo dono da URL, ou None para hosts desconhecidos."""
+    upstream = UPSTREAM_HOSTS.get(urlsplit(url).hostname)
+    return breakers.get(upstream)
+
+def get_circuit_stats():
+    return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -1,3 +1,5 @@
+import os
+
 # Configurações compartilhadas entre módulos
 
 # Timeout para chamadas de API
@@ -6,4 +8,121 @@ API_TIMEOUT = 10  # em segundos
 # Headers para requisições HTTP
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-}
\ No newline at end of file
+}
+
+# Backend de cache persistente: "sqlite" (padrão) ou "json" (arquivos JSON legados).
+# O SQLite em modo WAL pode ser compartilhado por vários workers; o JSON é só para um processo.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+
+# Compressão dos valores no cache SQLite: "zlib" (padrão), "zstd" ou "none". Valores menores
+# que CACHE_COMPRESS_MIN_BYTES ficam sem compressão. CACHE_ZSTD_DICT aponta para um dicionário
+# zstd treinado com train_zstd_dictionary (api/cache.py).
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zlib")
+CACHE_COMPRESSION_LEVEL = int(os.getenv("CACHE_COMPRESSION_LEVEL", "6"))
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "256"))
+CACHE_ZSTD_DICT = os.getenv("CACHE_ZSTD_DICT")
+
+# Intervalo (em segundos) entre as limpezas de entradas expiradas, feitas em segundo plano
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", str(6 * 60 * 60)))
+
+# Camada em memória de cada cache: entradas e megabytes mantidos por tipo de cache, no formato
+# "tipo=entradas:megabytes,..." (ex.: "lyrics=200:16"). O restante fica só no cache em disco.
+CACHE_MEMORY_LIMITS = {
+    "translate": (500, 16),
+    "explain": (500, 16),
+    "translate_lines": (20000, 8),
+    "lyrics": (500, 32),
+    "artist": (2000, 8),
+    "spotify": (2000, 8),
+    "enhanced": (2000, 16),
+    "negative": (5000, 4),
+    # O índice de artistas (api/artist_index.py) mantém a própria cópia em memória
+    "artist_index": (0, 0),
+}
+for _item in filter(None, os.getenv("CACHE_MEMORY_LIMITS", "").split(",")):
+    _namespace, _limits = _item.split("=")
+    _entries, _megabytes = _limits.split(":")
+    CACHE_MEMORY_LIMITS[_namespace.strip()] = (int(_entries), float(_megabytes))
+
+# Armazenamento dos limites de requisição. Com o cache SQLite, o padrão é um arquivo SQLite
+# dividido pelos workers do mesmo servidor; com vários servidores, use um servidor compatível
+# com Redis (ex.: "redis://localhost:6379"). "memory://" mantém os limites por processo.
+RATELIMIT_STORAGE_URI = os.getenv(
+    "RATELIMIT_STORAGE_URI",
+    "memory://" if CACHE_BACKEND == "json" else "sqlite:///cache/ratelimits.db",
+)
+
+# Escrita em lote do cache: intervalo entre gravações e número de chaves pendentes que força uma gravação
+CACHE_FLUSH_INTERVAL_MS = int(os.getenv("CACHE_FLUSH_INTERVAL_MS", "500"))
+CACHE_FLUSH_MAX_DIRTY = int(os.getenv("CACHE_FLUSH_MAX_DIRTY", "100"))
+
+# Threads para chamadas concorrentes às APIs externas
+UPSTREAM_MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", "16"))
+
+# Threads do modo ASGI para o cache e os limites de requisição, que esperam pelo disco ou pelo Redis
+ASGI_STORAGE_WORKERS = int(os.getenv("ASGI_STORAGE_WORKERS", "8"))
+
+# Prazo total (em segundos) para as buscas paralelas do /enhanced_search
+ENHANCED_SEARCH_DEADLINE = float(os.getenv("ENHANCED_SEARCH_DEADLINE", "8"))
+
+# Pools de conexões HTTP (keep-alive) e retentativas com backoff exponencial
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts com pool no adaptador padrão
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))  # conexões mantidas por host
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "1"))
+
+# Tamanho do pool por host, no formato "host=tamanho,host=tamanho"
+HTTP_POOL_SIZES = {
+    "api.genius.com": HTTP_POOL_MAXSIZE,
+    "genius.com": HTTP_POOL_MAXSIZE,
+    "api.spotify.com": HTTP_POOL_MAXSIZE,
+    "accounts.spotify.com": 2,
+}
+for _item in filter(None, os.getenv("HTTP_POOL_SIZES", "").split(",")):
+    _host, _size = _item.split("=")
+    HTTP_POOL_SIZES[_host.strip()] = int(_size)
+
+# Serviço externo de cada host, usado pelos disjuntores (circuit breakers)
+UPSTREAM_HOSTS = {
+    "api.genius.com": "genius",
+    "genius.com": "genius",
+    "api.spotify.com": "spotify",
+    "accounts.spotify.com": "spotify",
+}
+
+# Disjuntores: falhas seguidas que abrem o circuito e segundos até a próxima chamada de teste
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+# Cache negativo: por quanto tempo (em segundos) lembrar de um "não encontrado" e de uma falha
+NEGATIVE_CACHE_TTL = {
+    "not_found": int(os.getenv("NEGATIVE_CACHE_TTL_NOT_FOUND", str(10 * 60))),
+    "error": int(os.getenv("NEGATIVE_CACHE_TTL_ERROR", "60")),
+}
+
+# Header Server-Timing com o tempo gasto em cada etapa da requisição (APIs externas, cache,
+# extração das letras). Desligado por padrão, pois expõe detalhes internos a qualquer cliente.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Busca paralela das páginas de músicas do Genius e limite de páginas simultâneas
+GENIUS_PARALLEL_PAGES = os.getenv("GENIUS_PARALLEL_PAGES", "1") == "1"
+GENIUS_PAGE_CONCURRENCY = int(os.getenv("GENIUS_PAGE_CONCURRENCY", "4"))
+
+# Chamadas ao Gemini: execuções simultâneas, jobs aguardando na fila e tempo máximo por job
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "16"))
+GEMINI_JOB_TIMEOUT = float(os.getenv("GEMINI_JOB_TIMEOUT", "90"))  # em segundos
+
+# Modo "sections" de /translate e /explain: tamanho máximo (em caracteres) de cada trecho da
+# letra enviado ao Gemini e trechos processados ao mesmo tempo por requisição
+GEMINI_CHUNK_MAX_CHARS = int(os.getenv("GEMINI_CHUNK_MAX_CHARS", "1500"))
+GEMINI_CHUNK_CONCURRENCY = int(os.getenv("GEMINI_CHUNK_CONCURRENCY", "3"))
+
+# Endereço alternativo da API do Gemini (ex.: os stubs de benchmarks/stub_upstreams.py)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+
+# Rotas em lote: itens por requisição, buscas simultâneas e tamanho máximo (em caracteres)
+# das letras curtas agrupadas em uma única chamada ao Gemini
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_PACK_MAX_CHARS = int(os.getenv("BATCH_PACK_MAX_CHARS", "4000"))
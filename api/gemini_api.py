@@ -0,0 +1,290 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .circuit_breaker import FAILURE_STATUS, CircuitOpenError, breakers
+from .config import GEMINI_BASE_URL, GEMINI_JOB_TIMEOUT, GEMINI_MAX_CONCURRENCY, GEMINI_MAX_QUEUE
+from .metrics import UPSTREAM_IN_FLIGHT, record_operation, record_upstream, timed
+
+
+class GeminiOverloadedError(Exception):
+    """A fila de jobs do Gemini está cheia; a requisição deve ser recusada com 503."""
+
+
+class GeminiTimeoutError(Exception):
+    """O job do Gemini não terminou dentro de GEMINI_JOB_TIMEOUT."""
+
+
+class GeminiUnavailableError(GeminiOverloadedError):
+    """O circuito do Gemini está aberto após falhas seguidas; também respondida com 503."""
+
+
+class GeminiRequestError(Exception):
+    """
+    O Gemini recusou a requisição (erro 4xx, ex.: prompt grande demais) ou o cliente não está
+    configurado. Não é uma falha do serviço: não conta para o disjuntor nem vai para o cache negativo.
+    """
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+_breaker = breakers["gemini"]
+
+
+# Cliente único do processo, criado na primeira chamada
+_client = None
+_client_lock = threading.Lock()
+
+# Pool limitado para os jobs do Gemini: GEMINI_MAX_CONCURRENCY em execução e até
+# GEMINI_MAX_QUEUE aguardando; acima disso os jobs são recusados imediatamente
+_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix="gemini")
+_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY + GEMINI_MAX_QUEUE)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "jobs": 0,
+    "rejected": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "queued": 0,
+    "running": 0,
+    "queue_wait_total": 0.0,
+    "latency_total": 0.0,
+}
+
+def _update_stats(**changes):
+    with _stats_lock:
+        for key, value in changes.items():
+            _stats[key] += value
+
+def get_gemini_stats():
+    """Métricas do pool do Gemini, com médias de espera na fila e de latência em segundos."""
+    with _stats_lock:
+        stats = dict(_stats)
+    finished = max(stats["jobs"] - stats["queued"] - stats["running"], 1)
+    stats["avg_queue_wait"] = stats["queue_wait_total"] / finished
+    stats["avg_latency"] = stats["latency_total"] / finished
+    return stats
+
+def _record_call(started_at, error=None):
+    """Métricas de uma chamada ao modelo (sem contar a espera na fila)."""
+    record_upstream("gemini", time.monotonic() - started_at, status=200 if error is None else None, error=error)
+
+def get_client():
+    """Retorna o cliente Gemini compartilhado, criando-o na primeira chamada."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                gemini_api_key = os.getenv("GEMINI_API_KEY")
+                if not gemini_api_key:
+                    raise GeminiRequestError("Gemini API key não configurada.")
+                # O SDK é importado só aqui: ele é pesado e deixava lenta a inicialização dos workers
+                from google import genai
+                from google.genai import types
+                http_options = types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+                _client = genai.Client(api_key=gemini_api_key, http_options=http_options)
+    return _client
+
+def _build_request(prompt):
+    """Monta o conteúdo e a configuração de uma requisição ao Gemini."""
+    from google.genai import types
+    contents = [
+        types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=prompt)],
+        ),
+    ]
+    generate_content_config = types.GenerateContentConfig(
+        response_mime_type="text/plain",
+    )
+    return contents, generate_content_config
+
+def _is_service_failure(error):
+    """Falhas de conexão, timeouts, 429 e 5xx indicam problema no Gemini, e não na requisição."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        # APIError do SDK: ClientError (4xx) ou ServerError (5xx)
+        return code in FAILURE_STATUS
+    import httpx
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+def _raise_error(error):
+    """
+    Relança o erro de uma chamada ao Gemini, contando no disjuntor só as falhas do serviço.
+    Erros 4xx do SDK viram GeminiRequestError, para que as rotas não os guardem no cache negativo.
+    """
+    if _is_service_failure(error):
+        _breaker.record_failure()
+        raise error
+    # O Gemini respondeu (ou nem foi chamado): o circuito não tem motivo para abrir
+    _breaker.record_success()
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        raise GeminiRequestError(str(error), status=400 if code == 400 else 500) from error
+    raise error
+
+def _acquire_slot():
+    if not _slots.acquire(blocking=False):
+        _update_stats(rejected=1)
+        raise GeminiOverloadedError("Muitas requisições de IA em andamento. Tente novamente em instantes.")
+    # Com o circuito aberto a chamada falha na hora, sem ocupar o pool
+    try:
+        _breaker.before_call()
+    except CircuitOpenError as e:
+        _slots.release()
+        raise GeminiUnavailableError(str(e))
+
+def _generate(prompt, model, submitted_at):
+    started_at = time.monotonic()
+    _update_stats(queued=-1, running=1, queue_wait_total=started_at - submitted_at)
+    UPSTREAM_IN_FLIGHT.inc("gemini")
+    try:
+        contents, generate_content_config = _build_request(prompt)
+        response = get_client().models.generate_content(
+            model=model,
+            contents=contents,
+            config=generate_content_config,
+        )
+        # Uma resposta que passou do tempo máximo conta como falha do Gemini (a requisição já
+        # desistiu); o tempo de espera na fila local não entra nessa conta
+        if time.monotonic() - started_at > GEMINI_JOB_TIMEOUT:
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        _record_call(started_at)
+        return response.text
+    except Exception as e:
+        _update_stats(errors=1)
+        _record_call(started_at, e)
+        _raise_error(e)
+    finally:
+        UPSTREAM_IN_FLIGHT.dec("gemini")
+        _update_stats(running=-1, latency_total=time.monotonic() - started_at)
+
+@timed("gemini_generate", rejected=(GeminiOverloadedError,))
+def call_gemini_model(prompt, model):
+    """
+    Chama o modelo Gemini pelo pool limitado e retorna o texto completo da resposta.
+    Lança GeminiOverloadedError se a fila estiver cheia e GeminiTimeoutError se o job
+    passar de GEMINI_JOB_TIMEOUT.
+    """
+    _acquire_slot()
+    _update_stats(jobs=1, queued=1)
+    try:
+        future = _executor.submit(_generate, prompt, model, time.monotonic())
+    except Exception:
+        _update_stats(queued=-1)
+        _slots.release()
+        raise
+    # O slot só é liberado quando o job termina, mesmo que a requisição desista de esperar
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=GEMINI_JOB_TIMEOUT)
+    except FutureTimeoutError:
+        _update_stats(timeouts=1)
+        # O disjuntor só registra falhas das chamadas feitas de fato ao Gemini, em _generate;
+        # um job que ainda está na fila é cancelado, sem gastar uma chamada que ninguém vai ler
+        if future.cancel():
+            _update_stats(queued=-1)
+        raise GeminiTimeoutError("O modelo demorou demais para responder.")
+
+@timed("gemini_generate", rejected=(GeminiOverloadedError,))
+async def call_gemini_model_async(prompt, model):
+    """
+    Versão assíncrona de call_gemini_model, usada pelo modo ASGI. Divide com o pool
+    síncrono o mesmo limite de jobs em andamento e o mesmo tempo máximo por job.
+    """
+    _acquire_slot()
+    _update_stats(jobs=1, running=1)
+    UPSTREAM_IN_FLIGHT.inc("gemini")
+    started_at = time.monotonic()
+    try:
+        contents, generate_content_config = _build_request(prompt)
+        response = await asyncio.wait_for(
+            get_client().aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=generate_content_config,
+            ),
+            timeout=GEMINI_JOB_TIMEOUT,
+        )
+        _breaker.record_success()
+        _record_call(started_at)
+        return response.text
+    except asyncio.TimeoutError as e:
+        _update_stats(timeouts=1)
+        _breaker.record_failure()
+        _record_call(started_at, e)
+        raise GeminiTimeoutError("O modelo demorou demais para responder.")
+    except Exception as e:
+        _update_stats(errors=1)
+        _record_call(started_at, e)
+        _raise_error(e)
+    finally:
+        UPSTREAM_IN_FLIGHT.dec("gemini")
+        _update_stats(running=-1, latency_total=time.monotonic() - started_at)
+        _slots.release()
+
+class GeminiStream:
+    """
+    Iterador sobre os trechos de texto de uma chamada em streaming. Ocupa um slot do pool
+    desde a criação até terminar ou ser fechado com close().
+    """
+
+    def __init__(self, prompt, model):
+        _acquire_slot()
+        _update_stats(jobs=1, running=1)
+        UPSTREAM_IN_FLIGHT.inc("gemini")
+        self._started_at = time.monotonic()
+        self._released = False
+        self._error = None
+        self._iterator = self._generate(prompt, model)
+
+    def _generate(self, prompt, model):
+        try:
+            contents, generate_content_config = _build_request(prompt)
+            for chunk in get_client().models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=generate_content_config,
+            ):
+                if chunk.text:
+                    yield chunk.text
+            _breaker.record_success()
+        except Exception as e:
+            self._error = e
+            _update_stats(errors=1)
+            _raise_error(e)
+        finally:
+            self._release()
+
+    def _release(self):
+        if not self._released:
+            self._released = True
+            elapsed = time.monotonic() - self._started_at
+            _update_stats(running=-1, latency_total=elapsed)
+            UPSTREAM_IN_FLIGHT.dec("gemini")
+            _record_call(self._started_at, self._error)
+            record_operation("gemini_stream", elapsed, self._error)
+            _slots.release()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    def close(self):
+        self._iterator.close()
+        self._release()
+
+def stream_gemini_model(prompt, model):
+    """
+    Chama o modelo Gemini em modo streaming. O slot do pool é reservado já nesta chamada,
+    lançando GeminiOverloadedError se não houver vaga.
+    """
+    return GeminiStream(prompt, model)
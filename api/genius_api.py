@@ -1,10 +1,12 @@
+import importlib.util
+import math
 import os
-import requests
-import time
-import unicodedata
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from .config import API_TIMEOUT, headers
+from .config import GENIUS_PAGE_CONCURRENCY, GENIUS_PARALLEL_PAGES, headers as page_headers
+from .http_client import http_get
+from .metrics import submit_traced, timed
+from .utils import normalize_term
 import re
 
 # Carregar variáveis do .env
@@ -12,109 +14,136 @@ load_dotenv()
 
 # Configuração do Genius
 GENIUS_API_TOKEN = os.getenv("GENIUS_API_TOKEN")
-GENIUS_BASE_URL = "https://api.genius.com"
+# Pode apontar para um servidor local, como os stubs de benchmarks/stub_upstreams.py
+GENIUS_BASE_URL = os.getenv("GENIUS_BASE_URL", "https://api.genius.com")
 
-def normalize_term(term):
-    """Normaliza o termo de busca removendo espaços extras, acentos e convertendo para minúsculas."""
-    term = term.strip().lower()
-    term = unicodedata.normalize("NFD", term)
-    term = "".join(char for char in term if unicodedata.category(char) != "Mn")
-    return term
+def pick_artist_id(artist_name, hits):
+    """Escolhe, entre os resultados da busca do Genius, o ID do artista mais provável."""
+    # Primeiro, tenta encontrar correspondência exata com o nome do artista
+    normalized_search = normalize_term(artist_name)
+    for hit in hits:
+        result = hit.get("result", {})
+        artist = result.get("primary_artist", {})
+        artist_name_from_api = artist.get("name", "")
+        normalized_api_name = normalize_term(artist_name_from_api)
+        
+        # Verificar correspondência exata ou parcial
+        if (normalized_search == normalized_api_name or 
+            normalized_search in normalized_api_name or 
+            normalized_api_name in normalized_search):
+            
+            print(f"Correspondência encontrada: '{artist_name_from_api}' (ID: {artist.get('id')})")
+            return artist.get("id")
+    
+    # Se não encontrou correspondência, pega o primeiro resultado se for relacionado
+    if hits and artist_name.lower() in hits[0].get("result", {}).get("full_title", "").lower():
+        first_hit = hits[0].get("result", {}).get("primary_artist", {})
+        print(f"Usando melhor correspondência: '{first_hit.get('name')}' (ID: {first_hit.get('id')})")
+        return first_hit.get("id")
+        
+    # Alternativa: usar o primeiro resultado de qualquer forma (opcional, com aviso)
+    if hits:
+        first_hit = hits[0].get("result", {}).get("primary_artist", {})
+        print(f"AVISO: Usando resultado aproximado: '{first_hit.get('name')}' (ID: {first_hit.get('id')})")
+        return first_hit.get("id")
+        
+    print(f"Nenhum artista encontrado para '{artist_name}'")
+    return None
 
+@timed("genius_search")
 def get_artist_id(artist_name):
-    """Busca o ID do artista no Genius com maior flexibilidade."""
+    """
+    Busca o ID do artista no Genius com maior flexibilidade. Retorna None se nenhum artista
+    for encontrado e lança exceção se a API falhar, para que as falhas não sejam tratadas
+    como "não encontrado".
+    """
     headers = {"Authorization": f"Bearer {GENIUS_API_TOKEN}"}
     search_url = f"{GENIUS_BASE_URL}/search"
     params = {"q": artist_name}
     
+    response = http_get(search_url, headers=headers, params=params)
+    if response.status_code != 200:
+        print(f"Erro na API: Status {response.status_code}")
+        response.raise_for_status()
+    hits = response.json().get("response", {}).get("hits", [])
+    
+    # Log para depuração - mais detalhado
+    print(f"Resultados da API para '{artist_name}': {len(hits)} hits encontrados")
+    
+    return pick_artist_id(artist_name, hits)
+
+@timed("genius_songs_page")
+def fetch_songs_page(artist_id, page, per_page):
+    """Busca uma página de músicas do artista, ordenada por popularidade."""
+    headers = {"Authorization": f"Bearer {GENIUS_API_TOKEN}"}
+    url = f"{GENIUS_BASE_URL}/artists/{artist_id}/songs"
+    params = {"sort": "popularity", "per_page": per_page, "page": page}
+    print(f"Buscando página {page} de músicas para artista {artist_id}...")
+    response = http_get(url, headers=headers, params=params)
+    response.raise_for_status()
+    return response.json().get("response", {})
+
+def get_artist_songs_parallel(artist_id, per_page=50, max_songs=100):
+    """
+    Busca em paralelo as páginas 1..ceil(max_songs/per_page), com no máximo
+    GENIUS_PAGE_CONCURRENCY páginas simultâneas, e junta os resultados na ordem das páginas.
+    Se as participações filtradas deixarem a lista incompleta, continua sequencialmente.
+    """
+    page_count = math.ceil(max_songs / per_page)
+    all_songs = []
+    next_page = None
+    
     try:
-        response = requests.get(search_url, headers=headers, params=params, timeout=API_TIMEOUT)
-        if response.status_code == 200:
-            hits = response.json().get("response", {}).get("hits", [])
-            
-            # Log para depuração - mais detalhado
-            print(f"Resultados da API para '{artist_name}': {len(hits)} hits encontrados")
-            
-            # Primeiro, tenta encontrar correspondência exata com o nome do artista
-            normalized_search = normalize_term(artist_name)
-            for hit in hits:
-                result = hit.get("result", {})
-                artist = result.get("primary_artist", {})
-                artist_name_from_api = artist.get("name", "")
-                normalized_api_name = normalize_term(artist_name_from_api)
-                
-                # Verificar correspondência exata ou parcial
-                if (normalized_search == normalized_api_name or 
-                    normalized_search in normalized_api_name or 
-                    normalized_api_name in normalized_search):
-                    
-                    print(f"Correspondência encontrada: '{artist_name_from_api}' (ID: {artist.get('id')})")
-                    return artist.get("id")
-            
-            # Se não encontrou correspondência, pega o primeiro resultado se for relacionado
-            if hits and artist_name.lower() in hits[0].get("result", {}).get("full_title", "").lower():
-                first_hit = hits[0].get("result", {}).get("primary_artist", {})
-                print(f"Usando melhor correspondência: '{first_hit.get('name')}' (ID: {first_hit.get('id')})")
-                return first_hit.get("id")
+        with ThreadPoolExecutor(max_workers=max(1, min(GENIUS_PAGE_CONCURRENCY, page_count))) as executor:
+            futures = [
+                submit_traced(executor, fetch_songs_page, artist_id, page, per_page)
+                for page in range(1, page_count + 1)
+            ]
+            for future in futures:
+                data = future.result()
+                page_songs = data.get("songs", [])
+                next_page = data.get("next_page")
                 
-            # Alternativa: usar o primeiro resultado de qualquer forma (opcional, com aviso)
-            if hits:
-                first_hit = hits[0].get("result", {}).get("primary_artist", {})
-                print(f"AVISO: Usando resultado aproximado: '{first_hit.get('name')}' (ID: {first_hit.get('id')})")
-                return first_hit.get("id")
+                # Adicionar apenas músicas primárias do artista (não participações)
+                for song in page_songs:
+                    if song.get("primary_artist", {}).get("id") == artist_id:
+                        all_songs.append(song)
                 
-            print(f"Nenhum artista encontrado para '{artist_name}'")
-        else:
-            print(f"Erro na API: Status {response.status_code}")
+                # Parar assim que o limite for atingido ou as páginas acabarem
+                if len(all_songs) >= max_songs or not page_songs or not next_page:
+                    for pending in futures:
+                        pending.cancel()
+                    break
     except Exception as e:
-        print(f"Erro ao buscar artista '{artist_name}': {str(e)}")
+        print(f"Erro ao buscar músicas do artista {artist_id}: {e}")
+        return all_songs[:max_songs] if all_songs else None
     
-    return None
+    all_songs = all_songs[:max_songs]
+    if next_page and len(all_songs) < max_songs:
+        remaining = get_artist_songs(
+            artist_id, per_page=per_page, max_songs=max_songs - len(all_songs),
+            start_page=next_page, parallel=False
+        )
+        all_songs.extend(remaining or [])
+    
+    print(f"Recuperadas {len(all_songs)} músicas primárias para o artista {artist_id}")
+    return all_songs
 
-def get_artist_songs(artist_id, per_page=50, max_songs=100):
+def get_artist_songs(artist_id, per_page=50, max_songs=100, start_page=1, parallel=GENIUS_PARALLEL_PAGES):
     """Obtém músicas de um artista com maior robustez e limites configuráveis."""
-    headers = {"Authorization": f"Bearer {GENIUS_API_TOKEN}"}
-    url = f"{GENIUS_BASE_URL}/artists/{artist_id}/songs"
-    params = {
-        "sort": "popularity", 
-        "per_page": per_page
-    }
+    if parallel and start_page == 1:
+        return get_artist_songs_parallel(artist_id, per_page=per_page, max_songs=max_songs)
     
     all_songs = []
-    next_page = 1
-    retries = 3
+    next_page = start_page
     
     try:
-        # Loop para paginação e retentativas
+        # Loop para paginação; as retentativas com backoff ficam a cargo da sessão HTTP
         while next_page and len(all_songs) < max_songs:
-            params["page"] = next_page
-            
-            # Retentativas em caso de falha temporária
-            for attempt in range(retries):
-                try:
-                    print(f"Buscando página {next_page} de músicas para artista {artist_id}...")
-                    response = requests.get(
-                        url, 
-                        headers=headers, 
-                        params=params, 
-                        timeout=API_TIMEOUT
-                    )
-                    response.raise_for_status()  # Lança exceção para códigos de erro HTTP
-                    break
-                except (requests.exceptions.RequestException, ConnectionError) as e:
-                    if attempt < retries - 1:
-                        wait_time = 2 ** attempt  # Backoff exponencial
-                        print(f"Tentativa {attempt+1} falhou: {e}. Aguardando {wait_time}s...")
-                        time.sleep(wait_time)
-                    else:
-                        raise
+            # Lança exceção para códigos de erro HTTP
+            data = fetch_songs_page(artist_id, next_page, per_page)
             
-            if response.status_code != 200:
-                print(f"Erro na API Genius: {response.status_code} - {response.text}")
-                return all_songs if all_songs else None
-                
-            data = response.json()
-            page_songs = data.get("response", {}).get("songs", [])
+            page_songs = data.get("songs", [])
             
             if not page_songs:
                 break
@@ -130,7 +159,7 @@ def get_artist_songs(artist_id, per_page=50, max_songs=100):
                     break
             
             # Verificar se há próxima página
-            next_page = data.get("response", {}).get("next_page")
+            next_page = data.get("next_page")
         
         print(f"Recuperadas {len(all_songs)} músicas primárias para o artista {artist_id}")
         return all_songs
@@ -149,29 +178,84 @@ def is_valid_lyrics_container(div):
             return False
     return True
 
-def fetch_lyrics_from_url(url):
-    """Extrai a letra completa da página do Genius, evitando headers indesejados."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/91.0.4472.124 Safari/537.36"
-    }
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        # Tenta primeiro com data-lyrics-container
-        lyrics_divs = soup.find_all("div", attrs={"data-lyrics-container": "true"})
-        
-        # Caso não encontre, usa seletor CSS com filtragem via função auxiliar
-        if not lyrics_divs:
-            lyrics_divs = soup.select("div[class^='Lyrics__Container-']")
-            lyrics_divs = [div for div in lyrics_divs if is_valid_lyrics_container(div)]
-        
+def extract_lyrics_reference(html):
+    """Extrator original: analisa a página inteira com html.parser. Serve de referência para extract_lyrics."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    
+    # Tenta primeiro com data-lyrics-container
+    lyrics_divs = soup.find_all("div", attrs={"data-lyrics-container": "true"})
+    
+    # Caso não encontre, usa seletor CSS com filtragem via função auxiliar
+    if not lyrics_divs:
+        lyrics_divs = soup.select("div[class^='Lyrics__Container-']")
+        lyrics_divs = [div for div in lyrics_divs if is_valid_lyrics_container(div)]
+    
+    if lyrics_divs:
+        lyrics = "\n".join(div.get_text(separator="\n") for div in lyrics_divs)
+        return lyrics.strip()
+    return None
+
+# Parser usado no caminho rápido: lxml (em C) quando instalado. O bs4 e o lxml só são
+# importados na primeira extração, para não pesar na inicialização dos workers.
+FAST_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+LYRICS_CONTAINER_MARKER = 'data-lyrics-container="true"'
+LYRICS_CONTAINER_ATTRS = {"data-lyrics-container": "true"}
+DIV_TAG_RE = re.compile(r"<(/?)div\b", re.IGNORECASE)
+
+def lyrics_section(html):
+    """
+    Recorta do HTML apenas o trecho entre o primeiro container de letra e o fechamento
+    do último, deixando de fora o <head>, os scripts e os anúncios ao redor.
+    """
+    first = html.find(LYRICS_CONTAINER_MARKER)
+    if first == -1:
+        return None
+    start = html.rfind("<div", 0, first)
+    last = html.rfind(LYRICS_CONTAINER_MARKER)
+    last_start = html.rfind("<div", 0, last)
+    if start == -1 or last_start == -1:
+        return None
+
+    # Conta as divs abertas a partir do último container até fechá-lo
+    depth = 0
+    for match in DIV_TAG_RE.finditer(html, last_start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            end = html.find(">", match.end())
+            return html[start:end + 1] if end != -1 else None
+    return None
+
+@timed("lyrics_parse")
+def extract_lyrics(html):
+    """
+    Extrai o texto da letra do HTML de uma página do Genius. O caminho rápido analisa só
+    o trecho dos containers de letra, com SoupStrainer e lxml; páginas sem
+    data-lyrics-container caem no extrator de referência.
+    """
+    section = lyrics_section(html)
+    if section is not None:
+        from bs4 import BeautifulSoup, SoupStrainer
+        strainer = SoupStrainer("div", attrs=LYRICS_CONTAINER_ATTRS)
+        soup = BeautifulSoup(section, FAST_PARSER, parse_only=strainer)
+        lyrics_divs = soup.find_all("div", attrs=LYRICS_CONTAINER_ATTRS)
         if lyrics_divs:
             lyrics = "\n".join(div.get_text(separator="\n") for div in lyrics_divs)
             return lyrics.strip()
-    return None
+    return extract_lyrics_reference(html)
+
+@timed("genius_lyrics_page")
+def fetch_lyrics_from_url(url):
+    """
+    Extrai a letra completa da página do Genius, evitando headers indesejados.
+    Retorna None se a página não existir e lança exceção nas demais falhas.
+    """
+    response = http_get(url, headers=page_headers)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return extract_lyrics(response.text)
 
 # Essa função busca  pela tag Lyrics__Container-sc-e3d9a1f6-1, um valor fixo, porém, aparentemente ela é dinâmica e muda de tempos em tempos. A função acima obtém a tag correta.
 #def fetch_lyrics_from_url(url):
@@ -0,0 +1,112 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import (
+    API_TIMEOUT,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POOL_SIZES,
+)
+from .circuit_breaker import CircuitOpenError, breaker_for_url
+from .metrics import UPSTREAM_IN_FLIGHT, record_upstream
+
+# Sessão HTTP compartilhada por todo o processo, criada na primeira requisição
+_session = None
+_session_lock = threading.Lock()
+
+# Função chamada antes de cada requisição HTTP, inclusive das retentativas; usada pelo
+# warmup.py para limitar o ritmo das chamadas às APIs externas. None no servidor.
+_request_hook = None
+
+def set_request_hook(hook):
+    global _request_hook
+    _request_hook = hook
+
+def _run_request_hook():
+    if _request_hook is not None:
+        _request_hook()
+
+class _HookedRetry(Retry):
+    """Retry que passa cada retentativa pelo hook de requisição antes de refazê-la."""
+
+    def increment(self, *args, **kwargs):
+        new_retry = super().increment(*args, **kwargs)
+        _run_request_hook()
+        return new_retry
+
+def _build_retry():
+    """Retentativas com backoff exponencial para falhas de conexão, 429 e erros 5xx."""
+    return _HookedRetry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+def _build_session():
+    session = requests.Session()
+    default_adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_build_retry(),
+    )
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    # Um adaptador por host conhecido, cada um com o tamanho de pool configurado
+    for host, pool_size in HTTP_POOL_SIZES.items():
+        session.mount(
+            f"https://{host}/",
+            HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=_build_retry()),
+        )
+    return session
+
+def get_session():
+    """Retorna a sessão HTTP compartilhada, com conexões keep-alive reutilizadas entre chamadas."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def request(method, url, **kwargs):
+    """
+    Requisição pela sessão compartilhada, com o timeout padrão das APIs. Falhas de conexão,
+    429 e 5xx contam para o disjuntor do serviço; com o circuito aberto, lança CircuitOpenError.
+    A duração e o resultado de cada chamada vão para as métricas do serviço.
+    """
+    kwargs.setdefault("timeout", API_TIMEOUT)
+    _run_request_hook()
+    breaker = breaker_for_url(url)
+    upstream = breaker.name if breaker is not None else "other"
+    started_at = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc(upstream)
+    try:
+        if breaker is not None:
+            breaker.before_call()
+        response = get_session().request(method, url, **kwargs)
+    except Exception as e:
+        if breaker is not None and not isinstance(e, CircuitOpenError):
+            breaker.record_failure()
+        record_upstream(upstream, time.perf_counter() - started_at, error=e)
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(upstream)
+    if breaker is not None:
+        breaker.record_status(response.status_code)
+    record_upstream(upstream, time.perf_counter() - started_at, status=response.status_code)
+    return response
+
+def http_get(url, **kwargs):
+    """GET pela sessão compartilhada, com o timeout padrão das APIs."""
+    return request("GET", url, **kwargs)
+
+def http_post(url, **kwargs):
+    """POST pela sessão compartilhada, com o timeout padrão das APIs."""
+    return request("POST", url, **kwargs)
@@ -0,0 +1,228 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .metrics import timed
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text):
+    """
+    Converte o texto digitado em uma consulta FTS5: cada palavra entre aspas (para que
+    operadores e pontuação não quebrem a consulta) e a última como prefixo.
+    """
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class LyricsIndex:
+    """
+    Índice de busca textual (SQLite FTS5) sobre as músicas já vistas: título e artista vêm
+    das listas de músicas do Genius, e a letra é adicionada quando passa pelo /get_lyrics.
+    Fica em um arquivo próprio, separado do cache, e é aberto no primeiro acesso. As escritas
+    são feitas por uma thread de fundo, então as rotas nunca esperam pelo índice.
+    """
+
+    def __init__(self, db_path, on_create=None):
+        self.db_path = Path(db_path)
+        # Chamado uma vez, na thread de escrita, quando o índice é criado (ex.: importar o cache)
+        self.on_create = on_create
+        self.available = True
+        self._local = threading.local()
+        self._pid = None
+        self._executor = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Uma conexão por thread, descartadas depois de um fork, como no SQLiteBackend
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._executor = None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_ready(self):
+        if self._ready:
+            return self.available
+        with self._lock:
+            if self._ready:
+                return self.available
+            self.db_path.parent.mkdir(exist_ok=True)
+            conn = self._connect()
+            created = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs'"
+            ).fetchone() is None
+            try:
+                # A tabela songs guarda o conteúdo; songs_fts é o índice invertido sobre ela,
+                # mantido em sincronia pelos gatilhos
+                conn.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS songs (
+                        url TEXT PRIMARY KEY,
+                        title TEXT NOT NULL DEFAULT '',
+                        artist TEXT NOT NULL DEFAULT '',
+                        image_url TEXT NOT NULL DEFAULT '',
+                        lyrics TEXT NOT NULL DEFAULT '',
+                        updated_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_songs_updated_at ON songs (updated_at);
+                    CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+                        title, artist, lyrics,
+                        content='songs', content_rowid='rowid',
+                        tokenize='unicode61 remove_diacritics 2'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS songs_ai AFTER INSERT ON songs BEGIN
+                        INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                        VALUES (new.rowid, new.title, new.artist, new.lyrics);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS songs_ad AFTER DELETE ON songs BEGIN
+                        INSERT INTO songs_fts (songs_fts, rowid, title, artist, lyrics)
+                        VALUES ('delete', old.rowid, old.title, old.artist, old.lyrics);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS songs_au AFTER UPDATE OF title, artist, lyrics ON songs BEGIN
+                        INSERT INTO songs_fts (songs_fts, rowid, title, artist, lyrics)
+                        VALUES ('delete', old.rowid, old.title, old.artist, old.lyrics);
+                        INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                        VALUES (new.rowid, new.title, new.artist, new.lyrics);
+                    END;
+                    """
+                )
+            except sqlite3.OperationalError as e:
+                # SQLite compilado sem FTS5: a busca fica desligada, o resto do app não muda
+                print(f"Índice de busca de letras indisponível: {e}")
+                self.available = False
+                created = False
+            self._ready = True
+        if created and self.on_create is not None:
+            self._submit(self.on_create)
+        return self.available
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pid != os.getpid() or self._executor is None:
+                self._connect()
+                # Uma única thread de escrita evita disputas pelo lock de escrita do SQLite
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lyrics-index")
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._report_error)
+        return future
+
+    @staticmethod
+    def _report_error(future):
+        error = future.exception()
+        if error is not None:
+            print(f"Erro ao atualizar o índice de busca de letras: {error}")
+
+    def _write_songs(self, songs):
+        conn = self._connect()
+        with conn:
+            # Só atualiza (e reindexa) as músicas cujo título, artista ou imagem mudaram
+            conn.executemany(
+                """
+                INSERT INTO songs (url, title, artist, image_url, updated_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    title = excluded.title, artist = excluded.artist,
+                    image_url = excluded.image_url, updated_at = excluded.updated_at
+                WHERE songs.title != excluded.title OR songs.artist != excluded.artist
+                    OR songs.image_url != excluded.image_url OR songs.updated_at < excluded.updated_at - 86400
+                """,
+                songs,
+            )
+
+    def _write_lyrics(self, url, lyrics, timestamp):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO songs (url, lyrics, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET lyrics = excluded.lyrics, updated_at = excluded.updated_at
+                WHERE songs.lyrics != excluded.lyrics OR songs.updated_at < excluded.updated_at - 86400
+                """,
+                (url, lyrics, timestamp),
+            )
+
+    def add_songs(self, songs, artist=None):
+        """
+        Indexa o título e o artista de músicas do Genius (objetos da API ou já processados
+        por process_songs, com o artista informado à parte).
+        """
+        rows = []
+        for song in songs or []:
+            if not song.get("url"):
+                continue
+            rows.append((
+                song["url"],
+                song.get("title") or "",
+                (song.get("primary_artist") or {}).get("name") or artist or "",
+                song.get("song_art_image_url") or song.get("header_image_url") or song.get("image_url") or "",
+                time.time(),
+            ))
+        if rows and self._ensure_ready():
+            self._submit(self._write_songs, rows)
+
+    def add_lyrics(self, url, lyrics):
+        if url and lyrics and self._ensure_ready():
+            self._submit(self._write_lyrics, url, lyrics, time.time())
+
+    @timed("lyrics_search")
+    def search(self, text, limit=20):
+        """Músicas mais relevantes para o texto (título e artista pesam mais que a letra)."""
+        match = build_match_query(text)
+        if match is None or not self._ensure_ready():
+            return []
+        rows = self._connect().execute(
+            """
+            SELECT songs.title, songs.artist, songs.url, songs.image_url, songs.lyrics != '',
+                   snippet(songs_fts, 2, '[', ']', '…', 12)
+            FROM songs_fts JOIN songs ON songs.rowid = songs_fts.rowid
+            WHERE songs_fts MATCH ?
+            ORDER BY bm25(songs_fts, 10.0, 5.0, 1.0)
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [
+            {
+                "title": title,
+                "artist": artist,
+                "url": url,
+                "image_url": image_url,
+                "has_lyrics": bool(has_lyrics),
+                "snippet": snippet or None,
+            }
+            for title, artist, url, image_url, has_lyrics, snippet in rows
+        ]
+
+    def count(self):
+        if not self._ensure_ready():
+            return 0
+        return self._connect().execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def purge_expired(self, max_age):
+        """Remove as músicas não vistas há mais de max_age segundos."""
+        if not self._ensure_ready():
+            return 0
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM songs WHERE updated_at < ?", (time.time() - max_age,))
+        return cursor.rowcount
+
+    def flush(self, timeout=None):
+        """Espera as escritas já enviadas à thread de fundo."""
+        if self._executor is not None and self._pid == os.getpid():
+            self._submit(lambda: None).result(timeout=timeout)
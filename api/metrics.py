@@ -0,0 +1,268 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from .circuit_breaker import CircuitOpenError
+
+# Métricas no formato de texto do Prometheus, sem dependências externas. Cada métrica guarda
+# um valor por combinação de labels; render() gera o texto servido em /metrics.
+
+PREFIX = "lyrics_api_"
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Contagem por bucket (não acumulada), soma e total
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                label_text = _format_labels(self.label_names, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+def register_collector(collect):
+    """
+    Registra uma função chamada a cada render() que retorna uma lista de
+    (nome, tipo, ajuda, [(labels_dict, valor), ...]), para expor estatísticas já existentes.
+    """
+    _collectors.append(collect)
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            families = collect()
+        except Exception as e:
+            print(f"Erro ao coletar métricas: {e}")
+            continue
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{PREFIX}{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Métricas das rotas, das APIs externas e do cache
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Duração das requisições por rota.", ("route", "method", "status"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requisições em andamento.")
+UPSTREAM_REQUEST_SECONDS = Histogram("upstream_request_duration_seconds", "Duração de cada requisição HTTP aos serviços externos.", ("upstream",))
+UPSTREAM_REQUESTS = Counter("upstream_requests_total", "Requisições aos serviços externos por resultado.", ("upstream", "outcome"))
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Requisições aos serviços externos em andamento.", ("upstream",))
+OPERATION_SECONDS = Histogram("operation_duration_seconds", "Duração das operações instrumentadas (buscas, extração de letras, Gemini).", ("operation",))
+OPERATIONS = Counter("operations_total", "Operações instrumentadas por resultado.", ("operation", "outcome"))
+OPERATION_IN_FLIGHT = Gauge("operations_in_flight", "Operações instrumentadas em andamento.", ("operation",))
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Leituras do cache por tipo e resultado (memory_hit, hit, miss).", ("cache", "result"))
+CACHE_SECONDS = Histogram("cache_operation_duration_seconds", "Duração das leituras, escritas e gravações em lote do cache.", ("cache", "operation"))
+CACHE_FALLBACKS = Counter("cache_fallbacks_total", "Respostas servidas do cache negativo ou de entradas antigas após falhas.", ("cache", "kind"))
+
+
+# Rastreamento por requisição, usado no header Server-Timing. O ContextVar acompanha a
+# requisição nas corrotinas e em asyncio.to_thread; nos executores de threads, use submit_traced.
+class RequestTrace:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self._entries.get(name, (0.0, 0))
+            self._entries[name] = (total + seconds, count + 1)
+
+    def server_timing(self):
+        """Valor do header Server-Timing: tempo somado e número de chamadas por operação."""
+        with self._lock:
+            entries = sorted(self._entries.items())
+        parts = [f'{name};dur={total * 1000:.1f};desc="{count}x"' for name, (total, count) in entries]
+        parts.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def start_trace():
+    trace = RequestTrace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    try:
+        _current_trace.reset(token)
+    except ValueError:
+        # O token foi criado em outro contexto (ex.: fim de uma resposta em streaming)
+        _current_trace.set(None)
+
+
+def add_to_trace(name, seconds):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+def submit_traced(executor, fn, *args, **kwargs):
+    """executor.submit que leva o rastreamento da requisição atual para a thread do executor."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _outcome(error, rejected):
+    if error is None:
+        return "ok"
+    return "rejected" if isinstance(error, rejected) else "error"
+
+
+def record_operation(operation, seconds, error=None, rejected=(CircuitOpenError,)):
+    OPERATION_SECONDS.observe(seconds, operation)
+    OPERATIONS.inc(operation, _outcome(error, rejected))
+    add_to_trace(operation, seconds)
+
+
+def timed(operation, rejected=(CircuitOpenError,)):
+    """
+    Decorador que mede a função (síncrona ou corrotina) em operation_duration_seconds, conta o
+    resultado (ok, error ou rejected, para as exceções em `rejected`) e soma o tempo ao Server-Timing.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                OPERATION_IN_FLIGHT.inc(operation)
+                started_at = time.perf_counter()
+                error = None
+                try:
+                    return await fn(*args, **kwargs)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    OPERATION_IN_FLIGHT.dec(operation)
+                    record_operation(operation, time.perf_counter() - started_at, error, rejected)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            OPERATION_IN_FLIGHT.inc(operation)
+            started_at = time.perf_counter()
+            error = None
+            try:
+                return fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                OPERATION_IN_FLIGHT.dec(operation)
+                record_operation(operation, time.perf_counter() - started_at, error, rejected)
+        return wrapper
+    return decorator
+
+
+def record_upstream(upstream, seconds, status=None, error=None):
+    """Registra uma requisição HTTP a um serviço externo, pelo status HTTP ou pela exceção."""
+    if isinstance(error, CircuitOpenError):
+        # Recusada pelo disjuntor: nenhuma requisição chegou a ser feita
+        UPSTREAM_REQUESTS.inc(upstream, "rejected")
+        return
+    UPSTREAM_REQUEST_SECONDS.observe(seconds, upstream)
+    UPSTREAM_REQUESTS.inc(upstream, f"{status // 100}xx" if status is not None else "error")
+
+
+def record_cache(cache, operation, seconds, result=None):
+    CACHE_SECONDS.observe(seconds, cache, operation)
+    if result is not None:
+        CACHE_LOOKUPS.inc(cache, result)
+    add_to_trace(f"cache_{operation}", seconds)
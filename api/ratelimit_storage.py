@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from limits.storage import Storage
+
+
+class SQLiteRateLimitStorage(Storage):
+    """
+    Armazenamento dos limites de requisição (biblioteca limits) em um arquivo SQLite, para que
+    vários workers no mesmo servidor dividam os contadores sem precisar de um Redis.
+    Registrado no esquema "sqlite": "sqlite:///cache/ratelimits.db" (caminho relativo) ou
+    "sqlite:////var/lib/app/ratelimits.db" (absoluto). Suporta a estratégia de janela fixa,
+    usada pelo Flask-Limiter e pelo modo ASGI.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    # Entradas vencidas são apagadas a cada tantas chamadas a incr
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.db_path = Path(uri.split("://", 1)[1][1:])
+        self._local = threading.local()
+        self._pid = None
+        self._calls = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        # Uma conexão por thread, descartadas depois de um fork, como no SQLiteBackend
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            # Um único comando: o contador é incrementado (ou a janela vencida recomeça)
+            # de forma atômica mesmo com vários processos
+            count = conn.execute(
+                """
+                INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+                    expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+                RETURNING count
+                """,
+                (key, amount, now + expiry, now, now),
+            ).fetchone()[0]
+            self._calls += 1
+            if self._calls % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connect().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._connect().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
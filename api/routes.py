@@ -1,73 +1,222 @@
-from flask import request, jsonify
+from flask import Response, g, request, jsonify, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from .genius_api import get_artist_id, get_artist_songs, fetch_lyrics_from_url
 from .spotify_api import search_artist_info, get_artist_top_tracks
+from .circuit_breaker import CircuitOpenError, get_circuit_stats
+from .gemini_api import (
+    GeminiOverloadedError,
+    GeminiRequestError,
+    GeminiTimeoutError,
+    call_gemini_model,
+    get_gemini_stats,
+    stream_gemini_model,
+)
+from .singleflight import SingleFlight
+from . import ratelimit_storage  # noqa: F401 (registra o esquema "sqlite://" na biblioteca limits)
+from .artist_index import ArtistIndex
+from .lyrics_index import LyricsIndex
+from .metrics import (
+    CACHE_FALLBACKS,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_SECONDS,
+    end_trace,
+    register_collector,
+    render as render_metrics,
+    start_trace,
+    submit_traced,
+)
+from .cache import (
+    Cache,
+    CacheJanitor,
+    LazyBackend,
+    MemoryLRU,
+    ValueCodec,
+    WriteBehindBackend,
+    create_backend,
+    migrate_json_caches,
+)
+from .utils import normalize_lyrics, is_section_header, unique_lyric_lines, split_sections, group_sections
+from .config import (
+    BATCH_CONCURRENCY,
+    BATCH_MAX_ITEMS,
+    BATCH_PACK_MAX_CHARS,
+    CACHE_BACKEND,
+    CACHE_COMPRESSION,
+    CACHE_COMPRESSION_LEVEL,
+    CACHE_COMPRESS_MIN_BYTES,
+    CACHE_FLUSH_INTERVAL_MS,
+    CACHE_FLUSH_MAX_DIRTY,
+    CACHE_MEMORY_LIMITS,
+    CACHE_SWEEP_INTERVAL,
+    ENHANCED_SEARCH_DEADLINE,
+    GEMINI_CHUNK_CONCURRENCY,
+    GEMINI_CHUNK_MAX_CHARS,
+    NEGATIVE_CACHE_TTL,
+    RATELIMIT_STORAGE_URI,
+    CACHE_ZSTD_DICT,
+    SERVER_TIMING_ENABLED,
+    UPSTREAM_MAX_WORKERS,
+)
 from . import app
-import os
+import atexit
 import hashlib
 import json
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from google import genai
-from google.genai import types
 
 # Configuração do Limiter
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    storage_uri=RATELIMIT_STORAGE_URI
 )
+if RATELIMIT_STORAGE_URI.startswith("memory://") and CACHE_BACKEND != "json":
+    # O cache é compartilhado entre os workers, mas os limites não: com N workers, cada
+    # cliente pode fazer N vezes o limite de cada rota
+    print(
+        "Aviso: RATELIMIT_STORAGE_URI=memory:// mantém os limites de requisição por processo; "
+        "com vários workers, use sqlite:///cache/ratelimits.db ou um Redis."
+    )
 
 # Configurações de cache
 CACHE_DIR = Path("cache")
-CACHE_DIR.mkdir(exist_ok=True)
 TRANSLATE_CACHE_FILE = CACHE_DIR / "translate_cache.json"
 EXPLAIN_CACHE_FILE = CACHE_DIR / "explain_cache.json"
 LYRICS_CACHE_FILE = CACHE_DIR / "lyrics_cache.json"
 SPOTIFY_CACHE_FILE = CACHE_DIR / "spotify_cache.json"
 ARTIST_SEARCH_CACHE_FILE = CACHE_DIR / "artist_search_cache.json"
 ENHANCED_SEARCH_CACHE_FILE = CACHE_DIR / "enhanced_search_cache.json"
+TRANSLATE_LINES_CACHE_FILE = CACHE_DIR / "translate_lines_cache.json"
+NEGATIVE_CACHE_FILE = CACHE_DIR / "negative_cache.json"
+ARTIST_INDEX_CACHE_FILE = CACHE_DIR / "artist_index.json"
+LYRICS_INDEX_FILE = CACHE_DIR / "search.db"
 
 CACHE_EXPIRY = {
     "translate": 60 * 24 * 60 * 60,  # 60 dias
     "explain": 60 * 24 * 60 * 60,    # 60 dias
+    "translate_lines": 60 * 24 * 60 * 60,  # 60 dias
     "lyrics": 30 * 24 * 60 * 60,     # 30 dias
     "artist": 7 * 24 * 60 * 60,      # 7 dias
     "spotify": 3 * 24 * 60 * 60,     # 3 dias
-    "enhanced": 3 * 24 * 60 * 60     # 3 dias
+    "enhanced": 3 * 24 * 60 * 60,    # 3 dias
+    "negative": max(NEGATIVE_CACHE_TTL.values()),  # cada entrada guarda o próprio TTL
+    "artist_index": 180 * 24 * 60 * 60,  # 180 dias
 }
 
-# Funções auxiliares para cache
-def load_file_cache(file_path):
-    if file_path.exists():
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Erro ao carregar cache: {e}")
-    return {}
+# Músicas que não aparecem em nenhuma busca por esse tempo saem do índice de busca de letras
+LYRICS_INDEX_EXPIRY = 180 * 24 * 60 * 60  # 180 dias
 
-def save_file_cache(cache_data, file_path):
-    try:
-        file_path.parent.mkdir(exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        print(f"Erro ao salvar cache: {e}")
+# TTL suave: depois dele a entrada continua sendo servida enquanto é atualizada em segundo plano,
+# até o TTL rígido de CACHE_EXPIRY
+CACHE_SOFT_EXPIRY = {
+    "artist": 24 * 60 * 60,          # 1 dia
+    "spotify": 12 * 60 * 60,         # 12 horas
+    "enhanced": 12 * 60 * 60         # 12 horas
+}
+
+CACHE_JSON_FILES = {
+    "translate": TRANSLATE_CACHE_FILE,
+    "explain": EXPLAIN_CACHE_FILE,
+    "lyrics": LYRICS_CACHE_FILE,
+    "spotify": SPOTIFY_CACHE_FILE,
+    "artist": ARTIST_SEARCH_CACHE_FILE,
+    "enhanced": ENHANCED_SEARCH_CACHE_FILE,
+    "translate_lines": TRANSLATE_LINES_CACHE_FILE,
+    "negative": NEGATIVE_CACHE_FILE,
+    "artist_index": ARTIST_INDEX_CACHE_FILE,
+}
+
+# Backend de cache com leitura e escrita por chave
+cache_codec = ValueCodec(
+    algorithm=CACHE_COMPRESSION,
+    level=CACHE_COMPRESSION_LEVEL,
+    min_size=CACHE_COMPRESS_MIN_BYTES,
+    zstd_dict_path=CACHE_ZSTD_DICT,
+)
 
-# Carregar caches do disco
-translate_file_cache = load_file_cache(TRANSLATE_CACHE_FILE)
-explain_file_cache = load_file_cache(EXPLAIN_CACHE_FILE)
-lyrics_file_cache = load_file_cache(LYRICS_CACHE_FILE)
-spotify_file_cache = load_file_cache(SPOTIFY_CACHE_FILE)
-artist_search_cache = load_file_cache(ARTIST_SEARCH_CACHE_FILE)
-enhanced_search_cache = load_file_cache(ENHANCED_SEARCH_CACHE_FILE)
+def open_cache_backend():
+    """Abre o backend de cache no primeiro acesso e inicia a limpeza periódica."""
+    CACHE_DIR.mkdir(exist_ok=True)
+    storage_backend = create_backend(CACHE_BACKEND, CACHE_DIR, CACHE_JSON_FILES, codec=cache_codec)
+    if CACHE_BACKEND != "json":
+        # Importar os arquivos cache/*.json da versão anterior
+        migrate_json_caches(storage_backend, CACHE_JSON_FILES)
+
+    # As rotas nunca esperam pelo disco: as escritas são gravadas em lote por uma thread de fundo
+    backend = WriteBehindBackend(
+        storage_backend,
+        flush_interval=CACHE_FLUSH_INTERVAL_MS / 1000,
+        max_dirty=CACHE_FLUSH_MAX_DIRTY,
+    )
+    cache_janitor.start()
+    return backend
+
+cache_backend = LazyBackend(open_cache_backend)
+# Gravar escritas pendentes ao encerrar o processo
+atexit.register(cache_backend.close)
+
+# Cada cache mantém em memória só as entradas mais usadas, dentro do limite de CACHE_MEMORY_LIMITS
+def create_cache(namespace):
+    max_entries, max_megabytes = CACHE_MEMORY_LIMITS.get(namespace, (0, 0))
+    return Cache(
+        cache_backend,
+        namespace,
+        CACHE_EXPIRY[namespace],
+        soft_expiry=CACHE_SOFT_EXPIRY.get(namespace),
+        memory=MemoryLRU(max_entries, int(max_megabytes * 1024 * 1024)),
+    )
+
+translate_file_cache = create_cache("translate")
+explain_file_cache = create_cache("explain")
+lyrics_file_cache = create_cache("lyrics")
+spotify_file_cache = create_cache("spotify")
+artist_search_cache = create_cache("artist")
+enhanced_search_cache = create_cache("enhanced")
+# Memória de traduções por linha, compartilhada entre músicas
+line_translation_cache = create_cache("translate_lines")
+# Resultados negativos ("não encontrado" e falhas), lembrados por pouco tempo
+negative_cache = create_cache("negative")
+# Nomes de artistas já resolvidos, com os IDs do Genius e do Spotify
+artist_index = ArtistIndex(create_cache("artist_index"))
 
 # Função para gerar hash
 def generate_hash(value):
     return hashlib.md5(value.encode()).hexdigest()
 
+def backfill_lyrics_index():
+    """
+    Preenche um índice de busca recém-criado com as músicas já guardadas no cache: as listas
+    do /search_artist e do /enhanced_search e, para cada música, a letra em cache, se houver.
+    """
+    songs_count = lyrics_count = 0
+    for namespace, field in (("artist", "songs"), ("enhanced", "genius_songs")):
+        for _, data, _ in cache_backend.items(namespace):
+            songs = data.get(field) or []
+            artist = (data.get("spotify_info") or {}).get("name") or data.get("artist")
+            lyrics_index.add_songs(songs, artist=artist)
+            songs_count += len(songs)
+            for song in songs:
+                # Leitura direta do backend, para não ocupar a camada em memória do cache de letras
+                cached = cache_backend.get(lyrics_file_cache.namespace, generate_hash(song["url"]))
+                if cached:
+                    lyrics_index.add_lyrics(song["url"], cached[0])
+                    lyrics_count += 1
+    print(f"Índice de busca de letras criado a partir do cache: {songs_count} músicas, {lyrics_count} letras")
+
+# Busca textual local sobre as músicas e letras que já passaram pelo cache
+lyrics_index = LyricsIndex(LYRICS_INDEX_FILE, on_create=backfill_lyrics_index)
+
+# Chave de cache baseada no conteúdo da letra, no prompt e no modelo, para que a mesma
+# letra vinda de URLs diferentes compartilhe a mesma entrada
+def generate_content_hash(lyrics, prompt_template, model):
+    content = "\0".join([model, prompt_template, normalize_lyrics(lyrics)])
+    return hashlib.sha256(content.encode()).hexdigest()
+
 # Função para formatar respostas
 def format_response(success, payload=None, error=None):
     """
@@ -80,38 +229,29 @@ def format_response(success, payload=None, error=None):
 
 # Função para limpar caches antigos
 def clean_old_cache_entries():
-    now = time.time()
     caches = [
-        (translate_file_cache, TRANSLATE_CACHE_FILE, "translate"),
-        (explain_file_cache, EXPLAIN_CACHE_FILE, "explain"),
-        (lyrics_file_cache, LYRICS_CACHE_FILE, "lyrics"),
-        (spotify_file_cache, SPOTIFY_CACHE_FILE, "spotify"),
-        (artist_search_cache, ARTIST_SEARCH_CACHE_FILE, "artist"),
-        (enhanced_search_cache, ENHANCED_SEARCH_CACHE_FILE, "enhanced")
+        translate_file_cache,
+        explain_file_cache,
+        lyrics_file_cache,
+        spotify_file_cache,
+        artist_search_cache,
+        enhanced_search_cache,
+        line_translation_cache,
+        negative_cache,
+        artist_index.cache,
     ]
-    for cache_dict, cache_file, cache_type in caches:
-        if not cache_dict:
-            continue
-        keys_to_remove = []
-        expiry = CACHE_EXPIRY.get(cache_type, 30 * 24 * 60 * 60)
-        for key, value in cache_dict.items():
-            if now - value.get('timestamp', 0) > expiry:
-                keys_to_remove.append(key)
-        for key in keys_to_remove:
-            del cache_dict[key]
-        save_file_cache(cache_dict, cache_file)
-
-# Executar limpeza de cache no início
-clean_old_cache_entries()
+    for cache in caches:
+        removed = cache.clean_expired()
+        if removed:
+            print(f"Cache '{cache.namespace}': {removed} entradas expiradas removidas")
+    removed = lyrics_index.purge_expired(LYRICS_INDEX_EXPIRY)
+    if removed:
+        print(f"Índice de busca de letras: {removed} músicas antigas removidas")
 
-# Funções para chamadas de API com timeout
-def safe_get_artist_id(artist_name):
-    try:
-        return get_artist_id(artist_name)
-    except Exception as e:
-        print(f"Erro ao buscar ID do artista: {e}")
-        return None
+# Limpeza das entradas expiradas em segundo plano, iniciada quando o cache é aberto
+cache_janitor = CacheJanitor(clean_old_cache_entries, CACHE_SWEEP_INTERVAL)
 
+# Funções para chamadas de API com timeout
 def safe_get_artist_songs(artist_id, per_page=50):
     try:
         return get_artist_songs(artist_id, per_page=per_page)
@@ -119,13 +259,151 @@ def safe_get_artist_songs(artist_id, per_page=50):
         print(f"Erro ao buscar músicas do artista {artist_id}: {e}")
         return None
 
-def safe_search_artist_info(artist_name):
+def safe_get_artist_top_tracks(artist_id):
     try:
-        return search_artist_info(artist_name)
+        return get_artist_top_tracks(artist_id)
     except Exception as e:
-        print(f"Erro ao buscar informações do Spotify: {e}")
+        print(f"Erro ao buscar top tracks do Spotify: {e}")
         return None
 
+# Cache negativo: "não encontrado" e falhas das APIs externas são lembrados por pouco tempo
+# (NEGATIVE_CACHE_TTL), para que buscas repetidas não esperem de novo pelo mesmo erro
+def cached_failure(key):
+    """Retorna o (resultado, erro, status) negativo ainda válido para a chave, ou None."""
+    entry = negative_cache.get(key)
+    if entry and time.time() - entry["timestamp"] <= entry["data"]["ttl"]:
+        CACHE_FALLBACKS.inc(key.split(":", 1)[0], "negative")
+        data = entry["data"]
+        return data["result"], data["error"], data["status"]
+    return None
+
+def remember_failure(key, kind, result=None, error=None, status=404):
+    """Grava um resultado negativo ("not_found" ou "error") e o retorna no formato dos loaders."""
+    negative_cache[key] = {
+        "data": {"result": result, "error": error, "status": status, "ttl": NEGATIVE_CACHE_TTL[kind]},
+        "timestamp": time.time(),
+    }
+    return result, error, status
+
+def serve_stale_or_fail(cache, cache_key, failure_key, exc, error, status):
+    """
+    Depois de uma falha da API externa, serve a entrada antiga do cache (mesmo além do TTL)
+    se ainda existir. Sem ela, responde 503 com o circuito aberto ou lembra a falha.
+    """
+    stale_entry = cache.get(cache_key, allow_expired=True)
+    if stale_entry:
+        print(f"Servindo dado antigo do cache '{cache.namespace}' após falha: {exc}")
+        CACHE_FALLBACKS.inc(cache.namespace, "stale")
+        return stale_entry["data"], None, 200
+    if isinstance(exc, CircuitOpenError):
+        return None, str(exc), 503
+    return remember_failure(failure_key, "error", error=error, status=status)
+
+# Executor compartilhado para chamadas paralelas às APIs externas
+upstream_executor = ThreadPoolExecutor(max_workers=UPSTREAM_MAX_WORKERS, thread_name_prefix="upstream")
+
+# Índice local de artistas: variantes do mesmo nome (caixa, acentos, espaços) usam as mesmas
+# entradas de cache, e o ID do Genius já resolvido dispensa a busca no Genius
+def resolve_artist_query(artist_name):
+    """Consulta canônica do artista no índice, ou o próprio nome se o artista ainda não for conhecido."""
+    entry = artist_index.lookup(artist_name)
+    return entry["query"] if entry else artist_name
+
+def indexed_genius_id(artist_name):
+    entry = artist_index.lookup(artist_name)
+    return entry.get("genius_id") if entry else None
+
+def record_genius_artist(artist_name, genius_id, songs):
+    """Grava no índice o ID do Genius e o nome do artista nas músicas encontradas."""
+    genius_name = songs[0].get("primary_artist", {}).get("name") if songs else None
+    artist_index.record(artist_name, genius_id=genius_id, genius_name=genius_name)
+
+def record_spotify_artist(artist_name, spotify_info):
+    artist_index.record(
+        artist_name,
+        spotify_id=spotify_info["id"],
+        spotify_name=spotify_info["name"],
+        popularity=spotify_info.get("popularity"),
+    )
+
+def lookup_genius_id(artist_name):
+    """ID do Genius pelo índice; só busca no Genius se o artista ainda não foi resolvido."""
+    return indexed_genius_id(artist_name) or get_artist_id(artist_name)
+
+def load_spotify_info(artist_name, artist_hash):
+    """
+    Busca o artista no Spotify e, em seguida, suas top tracks, gravando ambos no cache.
+    Falhas na busca do artista lançam exceção; (None, []) significa artista não encontrado.
+    """
+    spotify_info = search_artist_info(artist_name)
+    if not spotify_info:
+        return None, []
+    record_spotify_artist(artist_name, spotify_info)
+    top_tracks = safe_get_artist_top_tracks(spotify_info["id"])
+    if top_tracks is None:
+        return spotify_info, []
+    spotify_file_cache[artist_hash] = {
+        "data": {"info": spotify_info, "top_tracks": top_tracks},
+        "timestamp": time.time(),
+    }
+    return spotify_info, top_tracks
+
+def fetch_spotify_chain(artist_name, allow_stale=True):
+    """Informações e top tracks do Spotify, servidas do cache quando possível."""
+    artist_hash = generate_hash(artist_name)
+    cached_info = spotify_file_cache.get(artist_hash)
+    if cached_info and (allow_stale or not spotify_file_cache.is_stale(cached_info)):
+        if spotify_file_cache.is_stale(cached_info):
+            schedule_refresh(f"spotify:{artist_hash}", load_spotify_info, artist_name, artist_hash)
+        return cached_info["data"]["info"], cached_info["data"]["top_tracks"]
+    try:
+        return load_spotify_info(artist_name, artist_hash)
+    except Exception as e:
+        # Spotify fora do ar: usa as informações antigas, se ainda estiverem no cache
+        stale_info = spotify_file_cache.get(artist_hash, allow_expired=True)
+        if stale_info is None:
+            raise
+        print(f"Erro ao buscar informações do Spotify ({e}); usando dados antigos do cache.")
+        CACHE_FALLBACKS.inc(spotify_file_cache.namespace, "stale")
+        return stale_info["data"]["info"], stale_info["data"]["top_tracks"]
+
+def fetch_genius_chain(artist_name):
+    """Busca o ID do artista no Genius e, em seguida, suas músicas. Falhas na busca do ID lançam exceção."""
+    genius_id = lookup_genius_id(artist_name)
+    if not genius_id:
+        return []
+    songs = safe_get_artist_songs(genius_id) or []
+    if songs:
+        record_genius_artist(artist_name, genius_id, songs)
+        lyrics_index.add_songs(songs)
+    return songs
+
+# Requisições concorrentes com a mesma chave de cache esperam por uma única busca
+request_coalescer = SingleFlight()
+
+# Atualizações em segundo plano de entradas que passaram do TTL suave
+refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+refreshing_keys = set()
+refreshing_lock = threading.Lock()
+
+def schedule_refresh(key, loader, *args):
+    """Agenda a atualização de uma entrada velha, no máximo uma por chave ao mesmo tempo."""
+    with refreshing_lock:
+        if key in refreshing_keys:
+            return
+        refreshing_keys.add(key)
+
+    def refresh():
+        try:
+            request_coalescer.do(key, loader, *args)
+        except Exception as e:
+            print(f"Erro ao atualizar o cache '{key}' em segundo plano: {e}")
+        finally:
+            with refreshing_lock:
+                refreshing_keys.discard(key)
+
+    refresh_executor.submit(refresh)
+
 # Função para processar músicas
 def process_songs(songs):
     return [
@@ -137,6 +415,106 @@ def process_songs(songs):
         for song in songs
     ]
 
+# Métricas do cache
+def get_cache_stats():
+    return {
+        "dirty_keys": cache_backend.dirty_count(),
+        "flushes": cache_backend.flush_count,
+        "flushed_keys": cache_backend.flushed_keys,
+        "coalesced_requests": request_coalescer.coalesced,
+        "in_flight_requests": request_coalescer.in_flight(),
+        "background_refreshes": len(refreshing_keys),
+        "expiry_sweeps": cache_janitor.runs,
+        "compression": cache_codec.stats(),
+        "memory": {
+            cache.namespace: cache.memory.stats()
+            for cache in (
+                translate_file_cache,
+                explain_file_cache,
+                lyrics_file_cache,
+                spotify_file_cache,
+                artist_search_cache,
+                enhanced_search_cache,
+                line_translation_cache,
+                negative_cache,
+            )
+        },
+    }
+
+# Estatísticas já existentes (cache, pool do Gemini e disjuntores) expostas também em /metrics
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def collect_app_metrics():
+    cache = get_cache_stats()
+    compression = cache["compression"]
+    gemini = get_gemini_stats()
+    circuits = get_circuit_stats()
+    memory = cache["memory"]
+
+    def per_cache(field):
+        return [({"cache": namespace}, stats[field]) for namespace, stats in memory.items()]
+
+    def per_upstream(field, convert=lambda value: value):
+        return [({"upstream": name}, convert(stats[field])) for name, stats in circuits.items()]
+
+    return [
+        ("cache_dirty_keys", "gauge", "Chaves com escrita pendente no cache.", [({}, cache["dirty_keys"])]),
+        ("cache_flushes_total", "counter", "Gravações em lote do cache.", [({}, cache["flushes"])]),
+        ("cache_flushed_keys_total", "counter", "Chaves gravadas pelas gravações em lote.", [({}, cache["flushed_keys"])]),
+        ("coalesced_requests_total", "counter", "Requisições que aguardaram uma busca idêntica em andamento.", [({}, cache["coalesced_requests"])]),
+        ("coalesced_in_flight", "gauge", "Buscas compartilhadas em andamento.", [({}, cache["in_flight_requests"])]),
+        ("cache_background_refreshes", "gauge", "Atualizações do cache em segundo plano em andamento.", [({}, cache["background_refreshes"])]),
+        ("cache_expiry_sweeps_total", "counter", "Limpezas de entradas expiradas.", [({}, cache["expiry_sweeps"])]),
+        ("cache_raw_bytes_total", "counter", "Bytes dos valores gravados antes da compressão.", [({}, compression["raw_bytes"])]),
+        ("cache_stored_bytes_total", "counter", "Bytes dos valores gravados depois da compressão.", [({}, compression["stored_bytes"])]),
+        ("cache_decompressions_total", "counter", "Valores descomprimidos.", [({}, compression["decompressions"])]),
+        ("cache_decompress_seconds_total", "counter", "Tempo gasto descomprimindo valores.", [({}, compression["decompress_seconds"])]),
+        ("cache_memory_entries", "gauge", "Entradas na camada em memória.", per_cache("entries")),
+        ("cache_memory_bytes", "gauge", "Bytes na camada em memória.", per_cache("bytes")),
+        ("cache_memory_hits_total", "counter", "Acertos na camada em memória.", per_cache("hits")),
+        ("cache_memory_misses_total", "counter", "Faltas na camada em memória.", per_cache("misses")),
+        ("cache_evictions_total", "counter", "Entradas descartadas da camada em memória por falta de espaço.", per_cache("evictions")),
+        ("gemini_jobs_total", "counter", "Jobs enviados ao Gemini.", [({}, gemini["jobs"])]),
+        ("gemini_rejected_total", "counter", "Jobs recusados com a fila do Gemini cheia.", [({}, gemini["rejected"])]),
+        ("gemini_timeouts_total", "counter", "Jobs do Gemini que passaram do tempo máximo.", [({}, gemini["timeouts"])]),
+        ("gemini_errors_total", "counter", "Jobs do Gemini que falharam.", [({}, gemini["errors"])]),
+        ("gemini_queued", "gauge", "Jobs do Gemini aguardando na fila.", [({}, gemini["queued"])]),
+        ("gemini_running", "gauge", "Jobs do Gemini em execução.", [({}, gemini["running"])]),
+        ("gemini_queue_wait_seconds_total", "counter", "Tempo somado de espera na fila do Gemini.", [({}, gemini["queue_wait_total"])]),
+        ("gemini_latency_seconds_total", "counter", "Tempo somado de execução dos jobs do Gemini.", [({}, gemini["latency_total"])]),
+        ("circuit_state", "gauge", "Estado do disjuntor (0 fechado, 1 meio aberto, 2 aberto).", per_upstream("state", CIRCUIT_STATES.get)),
+        ("circuit_consecutive_failures", "gauge", "Falhas seguidas registradas pelo disjuntor.", per_upstream("consecutive_failures")),
+        ("circuit_opened_total", "counter", "Vezes que o disjuntor abriu.", per_upstream("times_opened")),
+        ("circuit_rejected_calls_total", "counter", "Chamadas recusadas com o disjuntor aberto.", per_upstream("rejected_calls")),
+    ]
+
+register_collector(collect_app_metrics)
+
+# Rastreamento de cada requisição: duração por rota, requisições em andamento e, com
+# SERVER_TIMING_ENABLED, o header Server-Timing com o tempo gasto em cada etapa
+@app.before_request
+def start_request_metrics():
+    HTTP_IN_FLIGHT.inc()
+    g.metrics_trace, g.metrics_token = start_trace()
+
+@app.after_request
+def finish_request_metrics(response):
+    trace = g.get("metrics_trace")
+    if trace is not None:
+        route = request.url_rule.rule if request.url_rule else "desconhecida"
+        elapsed = time.perf_counter() - trace.started_at
+        HTTP_REQUEST_SECONDS.observe(elapsed, route, request.method, str(response.status_code))
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    if g.get("metrics_token") is not None:
+        HTTP_IN_FLIGHT.dec()
+        end_trace(g.metrics_token)
+        g.metrics_token = None
+
 # Rotas da API
 #@app.route("/artist_info", methods=["GET"])
 #@limiter.limit("10 per minute")
@@ -159,6 +537,91 @@ def process_songs(songs):
 #
 #    return format_response(True, data=artist_info)
 
+@app.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return format_response(True, get_cache_stats())
+
+# Busca do /enhanced_search nas APIs externas; retorna (resultado, erro, status)
+# Com refresh=True (atualização em segundo plano) nenhum dado velho do cache é reaproveitado
+def load_enhanced_search(artist_name, artist_hash, refresh=False):
+    # Outra requisição pode ter preenchido o cache enquanto esta esperava
+    cached_result = enhanced_search_cache.get(artist_hash)
+    if cached_result and not refresh:
+        return cached_result["data"], None, 200
+    failure_key = f"enhanced:{artist_hash}"
+    if not refresh:
+        failure = cached_failure(failure_key)
+        if failure:
+            return failure
+
+    # As cadeias do Spotify e do Genius são independentes e rodam em paralelo
+    spotify_future = submit_traced(upstream_executor, fetch_spotify_chain, artist_name, not refresh)
+    genius_future = submit_traced(upstream_executor, fetch_genius_chain, artist_name)
+    done, not_done = wait([spotify_future, genius_future], timeout=ENHANCED_SEARCH_DEADLINE)
+    # O resultado parcial não é gravado no cache; buscas que ainda estão na fila são canceladas
+    # para que requisições repetidas não acumulem trabalho no executor compartilhado
+    for future in not_done:
+        future.cancel()
+    spotify_done = spotify_future in done
+    genius_done = genius_future in done
+
+    spotify_info, spotify_top_tracks = None, []
+    if spotify_done:
+        try:
+            spotify_info, spotify_top_tracks = spotify_future.result()
+        except Exception as e:
+            print(f"Erro ao buscar informações do Spotify: {e}")
+            return serve_stale_or_fail(
+                enhanced_search_cache, artist_hash, failure_key, e, "Erro ao buscar o artista no Spotify.", 502
+            )
+        if not spotify_info:
+            return remember_failure(failure_key, "not_found", error="Artista não encontrado no Spotify.", status=404)
+
+    genius_songs = []
+    genius_failed = False
+    if genius_done:
+        try:
+            genius_songs = genius_future.result()
+        except Exception as e:
+            print(f"Erro ao buscar ID do artista: {e}")
+            genius_failed = True
+
+    # Sem as músicas do Genius o resultado também é parcial
+    partial = not (spotify_done and genius_done) or genius_failed
+    if partial and not spotify_info and not genius_songs:
+        return remember_failure(failure_key, "error", error="Tempo limite excedido ao buscar o artista.", status=504)
+
+    processed_genius_songs = process_songs(genius_songs)
+
+    result = {
+        "artist": artist_name,
+        "spotify_info": spotify_info,
+        "spotify_top_tracks": spotify_top_tracks,
+        "genius_songs": processed_genius_songs,
+    }
+
+    if partial:
+        # Resultado parcial: devolvido ao usuário, mas não gravado no cache
+        print(f"Busca do /enhanced_search incompleta para '{artist_name}', retornando resultado parcial.")
+        result["partial"] = True
+        return result, None, 200
+
+    enhanced_search_cache[artist_hash] = {"data": result, "timestamp": time.time()}
+    return result, None, 200
+
+@app.route("/gemini_stats", methods=["GET"])
+def gemini_stats():
+    return format_response(True, get_gemini_stats())
+
+@app.route("/circuit_stats", methods=["GET"])
+def circuit_stats():
+    return format_response(True, get_circuit_stats())
+
+@app.route("/metrics", methods=["GET"])
+@limiter.exempt
+def metrics():
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route("/enhanced_search", methods=["GET"])
 @limiter.limit("10 per minute")
 def enhanced_search():
@@ -166,41 +629,72 @@ def enhanced_search():
     if not artist_name:
         return format_response(False, error="O parâmetro 'artist' é obrigatório."), 400
 
+    artist_name = resolve_artist_query(artist_name)
     artist_hash = generate_hash(artist_name)
     cached_result = enhanced_search_cache.get(artist_hash)
     if cached_result:
+        # Entrada velha: responde com ela e atualiza em segundo plano
+        if enhanced_search_cache.is_stale(cached_result):
+            schedule_refresh(f"enhanced:{artist_hash}", load_enhanced_search, artist_name, artist_hash, True)
         return format_response(True, cached_result["data"])
 
     try:
-        spotify_info = safe_search_artist_info(artist_name)
-        if not spotify_info:
-            return format_response(False, error="Artista não encontrado no Spotify."), 404
+        # Requisições simultâneas para o mesmo artista compartilham uma única busca
+        result, error, status = request_coalescer.do(
+            f"enhanced:{artist_hash}", load_enhanced_search, artist_name, artist_hash
+        )
+        if error:
+            return format_response(False, error=error), status
+        return format_response(True, result)
+    except Exception as e:
+        print(f"Erro inesperado na rota /enhanced_search: {e}")
+        return format_response(False, error="Erro interno no servidor."), 500
 
-        spotify_top_tracks = get_artist_top_tracks(spotify_info["id"])
-        if not spotify_top_tracks:
-            spotify_top_tracks = []
+def is_valid_artist_search(data):
+    return "songs" in data and isinstance(data["songs"], list)
 
-        genius_id = safe_get_artist_id(artist_name)
-        genius_songs = []
-        if genius_id:
-            genius_songs = safe_get_artist_songs(genius_id)
+# Busca do /search_artist no Genius; retorna (resultado, erro, status)
+def load_artist_search(artist_name, artist_hash, refresh=False):
+    cached_result = artist_search_cache.get(artist_hash)
+    if cached_result and is_valid_artist_search(cached_result["data"]) and not refresh:
+        return cached_result["data"], None, 200
+    failure_key = f"artist:{artist_hash}"
+    if not refresh:
+        failure = cached_failure(failure_key)
+        if failure:
+            return failure
 
-        processed_genius_songs = process_songs(genius_songs)
+    # Buscar ID do artista no Genius
+    try:
+        genius_id = lookup_genius_id(artist_name)
+    except Exception as e:
+        print(f"Erro ao buscar ID do artista: {e}")
+        return serve_stale_or_fail(
+            artist_search_cache, artist_hash, failure_key, e, "Erro ao buscar o artista no Genius.", 502
+        )
+    if not genius_id:
+        # Se não encontrar no Genius, retorne resultado vazio em vez de 404, lembrado só por pouco tempo
+        result = {"artist": artist_name, "songs": []}
+        return remember_failure(failure_key, "not_found", result=result, status=200)
 
-        result = {
-            "artist": artist_name,
-            "spotify_info": spotify_info,
-            "spotify_top_tracks": spotify_top_tracks,
-            "genius_songs": processed_genius_songs,
-        }
+    songs = safe_get_artist_songs(genius_id)
+    if songs is None:
+        return serve_stale_or_fail(
+            artist_search_cache, artist_hash, failure_key, None, "Erro ao buscar as músicas do artista no Genius.", 502
+        )
+    if not songs or not isinstance(songs, list):
+        return remember_failure(failure_key, "not_found", error="Nenhuma música encontrada para este artista.", status=404)
 
-        enhanced_search_cache[artist_hash] = {"data": result, "timestamp": time.time()}
-        save_file_cache(enhanced_search_cache, ENHANCED_SEARCH_CACHE_FILE)
+    record_genius_artist(artist_name, genius_id, songs)
+    lyrics_index.add_songs(songs)
+    processed_songs = process_songs(songs)
+    if not processed_songs:
+        return None, "Erro ao processar as músicas do artista.", 500
 
-        return format_response(True, result)
-    except Exception as e:
-        print(f"Erro inesperado na rota /enhanced_search: {e}")
-        return format_response(False, error="Erro interno no servidor."), 500
+    result = {"artist": artist_name, "songs": processed_songs}
+
+    artist_search_cache[artist_hash] = {"data": result, "timestamp": time.time()}
+    return result, None, 200
 
 @app.route("/search_artist", methods=["GET"])
 @limiter.limit("10 per minute")
@@ -210,40 +704,70 @@ def search_artist():
         return format_response(False, error="O parâmetro 'artist' é obrigatório."), 400
 
     try:
+        artist_name = resolve_artist_query(artist_name)
         artist_hash = generate_hash(artist_name)
         cached_result = artist_search_cache.get(artist_hash)
         if cached_result:
-            if "songs" in cached_result["data"] and isinstance(cached_result["data"]["songs"], list):
+            if is_valid_artist_search(cached_result["data"]):
+                # Entrada velha: responde com ela e atualiza em segundo plano
+                if artist_search_cache.is_stale(cached_result):
+                    schedule_refresh(f"artist:{artist_hash}", load_artist_search, artist_name, artist_hash, True)
                 return format_response(True, cached_result["data"])
             else:
                 print(f"Cache inconsistente para o artista {artist_name}, ignorando cache.")
 
-        # Buscar ID do artista no Genius
-        genius_id = safe_get_artist_id(artist_name)
-        if not genius_id:
-            # Se não encontrar no Genius, retorne resultado vazio em vez de 404
-            result = {"artist": artist_name, "songs": []}
-            artist_search_cache[artist_hash] = {"data": result, "timestamp": time.time()}
-            save_file_cache(artist_search_cache, ARTIST_SEARCH_CACHE_FILE)
-            return format_response(True, result)
-
-        songs = safe_get_artist_songs(genius_id)
-        if not songs or not isinstance(songs, list):
-            return format_response(False, error="Nenhuma música encontrada para este artista."), 404
+        result, error, status = request_coalescer.do(
+            f"artist:{artist_hash}", load_artist_search, artist_name, artist_hash
+        )
+        if error:
+            return format_response(False, error=error), status
+        return format_response(True, result)
+    except Exception as e:
+        print(f"Erro inesperado na rota /search_artist: {e}")
+        return format_response(False, error="Erro interno no servidor."), 500
 
-        processed_songs = process_songs(songs)
-        if not processed_songs:
-            return format_response(False, error="Erro ao processar as músicas do artista."), 500
+@app.route("/artist_suggest", methods=["GET"])
+@limiter.limit("120 per minute")
+def artist_suggest():
+    """Autocomplete de artistas a partir do índice local, sem chamar as APIs externas."""
+    query = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 8, type=int), 1), 20)
+    return format_response(True, {"query": query, "suggestions": artist_index.suggest(query, limit)})
 
-        result = {"artist": artist_name, "songs": processed_songs}
+@app.route("/search_lyrics", methods=["GET"])
+@limiter.limit("60 per minute")
+def search_lyrics():
+    """Busca por título, artista ou trecho de letra entre as músicas já vistas, sem chamar as APIs externas."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return format_response(False, error="O parâmetro 'q' é obrigatório."), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 50)
+    results = lyrics_index.search(query, limit)
+    if not lyrics_index.available:
+        return format_response(False, error="Busca de letras indisponível neste servidor."), 503
+    return format_response(True, {"query": query, "results": results})
 
-        artist_search_cache[artist_hash] = {"data": result, "timestamp": time.time()}
-        save_file_cache(artist_search_cache, ARTIST_SEARCH_CACHE_FILE)
+# Busca da letra na página do Genius; retorna (letra, erro, status)
+def load_lyrics(url, url_hash):
+    cached_lyrics = lyrics_file_cache.get(url_hash)
+    if cached_lyrics:
+        return cached_lyrics["data"], None, 200
+    failure_key = f"lyrics:{url_hash}"
+    failure = cached_failure(failure_key)
+    if failure:
+        return failure
 
-        return format_response(True, result)
+    try:
+        lyrics = fetch_lyrics_from_url(url)
     except Exception as e:
-        print(f"Erro inesperado na rota /search_artist: {e}")
-        return format_response(False, error="Erro interno no servidor."), 500
+        print(f"Erro ao buscar a letra de {url}: {e}")
+        return serve_stale_or_fail(lyrics_file_cache, url_hash, failure_key, e, f"Erro ao buscar a letra: {str(e)}", 500)
+    if not lyrics:
+        return remember_failure(failure_key, "not_found", error="Não foi possível encontrar a letra da música.", status=404)
+
+    lyrics_file_cache[url_hash] = {"data": lyrics, "timestamp": time.time()}
+    lyrics_index.add_lyrics(url, lyrics)
+    return lyrics, None, 200
 
 @app.route("/get_lyrics", methods=["GET"])
 @limiter.limit("10 per minute")
@@ -258,58 +782,198 @@ def get_lyrics():
         return format_response(True, {"lyrics": cached_lyrics["data"], "cached": True})
 
     try:
-        lyrics = fetch_lyrics_from_url(url)
-        if not lyrics:
-            return format_response(False, error="Não foi possível encontrar a letra da música."), 404
-
-        lyrics_file_cache[url_hash] = {"data": lyrics, "timestamp": time.time()}
-        save_file_cache(lyrics_file_cache, LYRICS_CACHE_FILE)
+        lyrics, error, status = request_coalescer.do(f"lyrics:{url_hash}", load_lyrics, url, url_hash)
+        if error:
+            return format_response(False, error=error), status
 
         return format_response(True, {"lyrics": lyrics, "cached": False})
     except Exception as e:
         print(f"Erro inesperado na rota /get_lyrics: {e}")
         return format_response(False, error=f"Erro ao buscar a letra: {str(e)}"), 500
-    
-    # Nova função auxiliar para chamar o modelo Gemini
-from google import genai
-from google.genai import types
-
-# Adicione essas importações no topo do arquivo
-
-# ...
-
-# Substitua a função call_gemini_model por esta implementação correta
-def call_gemini_model(prompt, model):
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        raise Exception("Gemini API key não configurada.")
-    
-    # Inicializar o cliente Gemini
-    client = genai.Client(api_key=gemini_api_key)
-    
-    # Preparar o conteúdo para a requisição
-    contents = [
-        types.Content(
-            role="user",
-            parts=[types.Part.from_text(text=prompt)],
-        ),
-    ]
-    
-    # Configurar a resposta
-    generate_content_config = types.GenerateContentConfig(
-        response_mime_type="text/plain",
-    )
-    
-    # Fazer a chamada e retornar o resultado
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=generate_content_config,
+
+# Prompts e modelo usados nas rotas de IA
+GEMINI_MODEL = "gemini-2.0-flash-thinking-exp-01-21"
+TRANSLATE_PROMPT = "Traduza a seguinte letra para o Português:\n\n{lyrics}"
+EXPLAIN_PROMPT = "Explique o significado e a mensagem da seguinte letra:\n\n{lyrics}"
+
+LINE_TRANSLATE_PROMPT = (
+    "Traduza cada linha numerada a seguir para o Português. Responda apenas com as "
+    "traduções, uma por linha, no formato 'N. tradução', mantendo a mesma numeração:\n\n{lines}"
+)
+LINE_TRANSLATE_BATCH_SIZE = 80  # linhas por chamada ao Gemini
+LINE_TRANSLATE_ATTEMPTS = 2  # linhas que faltarem na resposta são pedidas de novo uma vez
+NUMBERED_LINE_RE = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+
+def parse_numbered_lines(text):
+    """Converte uma resposta no formato 'N. texto' em um dicionário {N: texto}."""
+    translations = {}
+    for line in text.splitlines():
+        match = NUMBERED_LINE_RE.match(line)
+        if match and match.group(2).strip():
+            translations[int(match.group(1))] = match.group(2).strip()
+    return translations
+
+def translate_lines(lyrics):
+    """
+    Traduz só as linhas ainda não vistas, consultando a memória de traduções por linha,
+    e remonta a tradução na ordem original. Cabeçalhos de seção e linhas vazias são mantidos.
+    Linhas que o Gemini deixar de fora são pedidas de novo; as que continuarem sem tradução
+    ficam no original. Retorna (tradução, linhas traduzidas agora, linhas reaproveitadas da
+    memória, linhas sem tradução).
+    """
+    memory = {}
+    unseen = []
+    for line in unique_lyric_lines(lyrics):
+        line_hash = generate_content_hash(line, LINE_TRANSLATE_PROMPT, GEMINI_MODEL)
+        cached_line = line_translation_cache.get(line_hash)
+        if cached_line:
+            memory[normalize_lyrics(line)] = cached_line["data"]
+        else:
+            unseen.append((line, line_hash))
+    reused = len(memory)
+
+    pending = unseen
+    for _ in range(LINE_TRANSLATE_ATTEMPTS):
+        missing = []
+        for start in range(0, len(pending), LINE_TRANSLATE_BATCH_SIZE):
+            batch = pending[start:start + LINE_TRANSLATE_BATCH_SIZE]
+            numbered = "\n".join(f"{i}. {line}" for i, (line, _) in enumerate(batch, 1))
+            response = call_gemini_model(LINE_TRANSLATE_PROMPT.format(lines=numbered), model=GEMINI_MODEL)
+            translations = parse_numbered_lines(response)
+            for i, (line, line_hash) in enumerate(batch, 1):
+                translated = translations.get(i)
+                if not translated:
+                    missing.append((line, line_hash))
+                    continue
+                memory[normalize_lyrics(line)] = translated
+                line_translation_cache[line_hash] = {"data": translated, "timestamp": time.time()}
+        pending = missing
+        if not pending:
+            break
+    for line, _ in pending:
+        # Linha sem tradução na resposta: mantém o original e não grava na memória
+        print(f"Tradução ausente para a linha: {line}")
+
+    output = []
+    for line in lyrics.splitlines():
+        line = line.strip()
+        if not line or is_section_header(line):
+            output.append(line)
+        else:
+            output.append(memory.get(normalize_lyrics(line), line))
+    return "\n".join(output), len(unseen) - len(pending), reused, len(pending)
+
+# Modo "sections": letras longas são divididas nos cabeçalhos de seção e os trechos são
+# enviados ao Gemini em paralelo. Cada trecho tem a própria entrada de cache, então refrões
+# repetidos e versões ao vivo da mesma música reaproveitam o que já foi gerado.
+SECTION_TRANSLATE_PROMPT = (
+    "Traduza o seguinte trecho de uma letra para o Português. Mantenha os cabeçalhos de "
+    "seção entre colchetes como estão e responda apenas com a tradução:\n\n{lyrics}"
+)
+SECTION_EXPLAIN_PROMPT = (
+    "O trecho a seguir faz parte de uma letra mais longa. Explique em poucas frases o "
+    "significado deste trecho:\n\n{lyrics}"
+)
+EXPLAIN_SYNTHESIS_PROMPT = (
+    "A seguir estão explicações de cada trecho de uma letra, na ordem em que aparecem. "
+    "Escreva uma explicação curta do significado e da mensagem da letra completa:\n\n{explanations}"
+)
+# Chave de cache da explicação completa no modo "sections"
+SECTION_EXPLAIN_TEMPLATE = SECTION_EXPLAIN_PROMPT + EXPLAIN_SYNTHESIS_PROMPT
+
+# Prompt usado na chave de cache da resposta completa de cada modo
+TRANSLATE_PROMPTS = {"full": TRANSLATE_PROMPT, "lines": LINE_TRANSLATE_PROMPT, "sections": SECTION_TRANSLATE_PROMPT}
+EXPLAIN_PROMPTS = {"full": EXPLAIN_PROMPT, "sections": SECTION_EXPLAIN_TEMPLATE}
+
+def lyric_chunks(lyrics):
+    return group_sections(split_sections(lyrics), GEMINI_CHUNK_MAX_CHARS)
+
+def chunk_label(chunk, number):
+    """Cabeçalhos de seção do trecho (ex.: "[Verse 1], [Chorus]"), ou "Trecho N" se não houver."""
+    headers = [line.strip() for line in chunk.splitlines() if is_section_header(line)]
+    return ", ".join(headers) or f"Trecho {number}"
+
+def plan_chunks(chunks, prompt_template, cache):
+    """
+    Separa os trechos já presentes no cache dos que ainda precisam ser gerados, sem repetir
+    trechos iguais. Retorna ([(trecho, hash)], {hash: resultado}, {hash: trecho pendente}).
+    """
+    hashed = [(chunk, generate_content_hash(chunk, prompt_template, GEMINI_MODEL)) for chunk in chunks]
+    done = {}
+    pending = {}
+    for chunk, chunk_hash in hashed:
+        if chunk_hash in done or chunk_hash in pending:
+            continue
+        cached_chunk = cache.get(chunk_hash)
+        if cached_chunk:
+            done[chunk_hash] = cached_chunk["data"]
+        else:
+            pending[chunk_hash] = chunk
+    return hashed, done, pending
+
+def generate_chunks(chunks, prompt_template, cache):
+    """
+    Gera o resultado de cada trecho, com no máximo GEMINI_CHUNK_CONCURRENCY chamadas ao Gemini
+    ao mesmo tempo, e os devolve na ordem da letra. Trechos gerados antes de uma falha ficam
+    no cache, então uma nova tentativa refaz só os que faltaram.
+    Retorna ([(trecho, resultado)], trechos gerados agora, trechos reaproveitados do cache).
+    """
+    hashed, done, pending = plan_chunks(chunks, prompt_template, cache)
+    reused = len(done)
+    error = None
+    if pending:
+        with ThreadPoolExecutor(max_workers=GEMINI_CHUNK_CONCURRENCY) as executor:
+            futures = {
+                chunk_hash: submit_traced(
+                    executor, call_gemini_model, prompt_template.format(lyrics=chunk), model=GEMINI_MODEL
+                )
+                for chunk_hash, chunk in pending.items()
+            }
+            for chunk_hash, future in futures.items():
+                try:
+                    done[chunk_hash] = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                cache[chunk_hash] = {"data": done[chunk_hash], "timestamp": time.time()}
+    if error:
+        raise error
+    return [(chunk, done[chunk_hash]) for chunk, chunk_hash in hashed], len(pending), reused
+
+def stitch_translations(results):
+    return "\n\n".join(translation.strip() for _, translation in results)
+
+def synthesis_prompt(results):
+    explanations = "\n\n".join(
+        f"{chunk_label(chunk, number)}:\n{explanation.strip()}"
+        for number, (chunk, explanation) in enumerate(results, 1)
     )
-    
-    return response.text
+    return EXPLAIN_SYNTHESIS_PROMPT.format(explanations=explanations)
+
+def stitch_explanation(synthesis, results):
+    """Explicação geral seguida da explicação de cada trecho, em Markdown."""
+    sections = [
+        f"### {chunk_label(chunk, number)}\n\n{explanation.strip()}"
+        for number, (chunk, explanation) in enumerate(results, 1)
+    ]
+    return "\n\n".join([synthesis.strip()] + sections)
+
+def explain_sections(lyrics):
+    """
+    Explica cada trecho em paralelo e, em seguida, pede ao Gemini uma síntese curta da letra
+    inteira. Letras com um único trecho recebem a explicação normal, em uma só chamada.
+    Retorna (explicação, trechos gerados agora, trechos reaproveitados do cache).
+    """
+    chunks = lyric_chunks(lyrics)
+    if len(chunks) <= 1:
+        return call_gemini_model(EXPLAIN_PROMPT.format(lyrics=lyrics), model=GEMINI_MODEL), 0, 0
+    results, generated, reused = generate_chunks(chunks, SECTION_EXPLAIN_PROMPT, explain_file_cache)
+    synthesis = call_gemini_model(synthesis_prompt(results), model=GEMINI_MODEL)
+    return stitch_explanation(synthesis, results), generated, reused
 
 # Rota para tradução usando o modelo Gemini
+# O modo "lines" traduz apenas as linhas únicas ainda não vistas em outras músicas, e o
+# modo "sections" traduz os trechos da letra em paralelo
 @app.route("/translate", methods=["POST"])
 def translate():
     data = request.get_json()
@@ -317,12 +981,63 @@ def translate():
         return format_response(False, error="A propriedade 'lyrics' é obrigatória."), 400
 
     lyrics = data["lyrics"]
+    mode = data.get("mode", "full")
+    if mode not in TRANSLATE_PROMPTS:
+        return format_response(False, error="A propriedade 'mode' deve ser 'full', 'lines' ou 'sections'."), 400
+
+    prompt_template = TRANSLATE_PROMPTS[mode]
+    content_hash = generate_content_hash(lyrics, prompt_template, GEMINI_MODEL)
+    cached_translation = translate_file_cache.get(content_hash)
+    if cached_translation:
+        return format_response(True, {"translation": cached_translation["data"], "cached": True})
+    # Uma falha recente do Gemini para a mesma letra é devolvida sem chamar o modelo de novo
+    failure_key = f"translate:{content_hash}"
+    failure = cached_failure(failure_key)
+    if failure:
+        return format_response(False, error=failure[1]), failure[2]
+
     try:
-        prompt = f"Traduza a seguinte letra para o Português:\n\n{lyrics}"
-        translation = call_gemini_model(prompt, model="gemini-2.0-flash-thinking-exp-01-21")
-        return format_response(True, {"translation": translation})
+        if mode == "lines":
+            translation, translated_count, reused_count, missing_count = translate_lines(lyrics)
+            # Uma tradução com linhas no original não é gravada: a próxima requisição tenta de novo
+            if not missing_count:
+                translate_file_cache[content_hash] = {"data": translation, "timestamp": time.time()}
+            return format_response(True, {
+                "translation": translation,
+                "cached": False,
+                "lines_translated": translated_count,
+                "lines_reused": reused_count,
+                "lines_missing": missing_count,
+            })
+        if mode == "sections":
+            results, generated_count, reused_count = generate_chunks(
+                lyric_chunks(lyrics), SECTION_TRANSLATE_PROMPT, translate_file_cache
+            )
+            translation = stitch_translations(results)
+            translate_file_cache[content_hash] = {"data": translation, "timestamp": time.time()}
+            return format_response(True, {
+                "translation": translation,
+                "cached": False,
+                "sections_generated": generated_count,
+                "sections_reused": reused_count,
+            })
+
+        prompt = TRANSLATE_PROMPT.format(lyrics=lyrics)
+        translation = call_gemini_model(prompt, model=GEMINI_MODEL)
+        translate_file_cache[content_hash] = {"data": translation, "timestamp": time.time()}
+        return format_response(True, {"translation": translation, "cached": False})
+    except GeminiOverloadedError as e:
+        return format_response(False, error=str(e)), 503
+    except GeminiTimeoutError as e:
+        remember_failure(failure_key, "error", error=str(e), status=504)
+        return format_response(False, error=str(e)), 504
+    except GeminiRequestError as e:
+        # Erro da própria requisição ou de configuração: não é guardado no cache negativo
+        print(f"Erro ao traduzir: {e}")
+        return format_response(False, error=f"Erro ao traduzir: {str(e)}"), e.status
     except Exception as e:
         print(f"Erro ao traduzir: {e}")
+        remember_failure(failure_key, "error", error=f"Erro ao traduzir: {str(e)}", status=500)
         return format_response(False, error=f"Erro ao traduzir: {str(e)}"), 500
 
 # Rota para explicação usando o modelo Gemini
@@ -333,10 +1048,298 @@ def explain():
         return format_response(False, error="A propriedade 'lyrics' é obrigatória."), 400
 
     lyrics = data["lyrics"]
+    mode = data.get("mode", "full")
+    if mode not in EXPLAIN_PROMPTS:
+        return format_response(False, error="A propriedade 'mode' deve ser 'full' ou 'sections'."), 400
+
+    content_hash = generate_content_hash(lyrics, EXPLAIN_PROMPTS[mode], GEMINI_MODEL)
+    cached_explanation = explain_file_cache.get(content_hash)
+    if cached_explanation:
+        return format_response(True, {"explanation": cached_explanation["data"], "cached": True})
+    failure_key = f"explain:{content_hash}"
+    failure = cached_failure(failure_key)
+    if failure:
+        return format_response(False, error=failure[1]), failure[2]
+
     try:
-        prompt = f"Explique o significado e a mensagem da seguinte letra:\n\n{lyrics}"
-        explanation = call_gemini_model(prompt, model="gemini-2.0-flash-thinking-exp-01-21")
-        return format_response(True, {"explanation": explanation})
+        if mode == "sections":
+            explanation, generated_count, reused_count = explain_sections(lyrics)
+            explain_file_cache[content_hash] = {"data": explanation, "timestamp": time.time()}
+            return format_response(True, {
+                "explanation": explanation,
+                "cached": False,
+                "sections_generated": generated_count,
+                "sections_reused": reused_count,
+            })
+
+        prompt = EXPLAIN_PROMPT.format(lyrics=lyrics)
+        explanation = call_gemini_model(prompt, model=GEMINI_MODEL)
+        explain_file_cache[content_hash] = {"data": explanation, "timestamp": time.time()}
+        return format_response(True, {"explanation": explanation, "cached": False})
+    except GeminiOverloadedError as e:
+        return format_response(False, error=str(e)), 503
+    except GeminiTimeoutError as e:
+        remember_failure(failure_key, "error", error=str(e), status=504)
+        return format_response(False, error=str(e)), 504
+    except GeminiRequestError as e:
+        # Erro da própria requisição ou de configuração: não é guardado no cache negativo
+        print(f"Erro ao explicar: {e}")
+        return format_response(False, error=f"Erro ao explicar: {str(e)}"), e.status
     except Exception as e:
         print(f"Erro ao explicar: {e}")
-        return format_response(False, error=f"Erro ao explicar: {str(e)}"), 500
\ No newline at end of file
+        remember_failure(failure_key, "error", error=f"Erro ao explicar: {str(e)}", status=500)
+        return format_response(False, error=f"Erro ao explicar: {str(e)}"), 500
+
+# Formata um evento de server-sent events
+def sse_event(data, event=None):
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        payload = f"event: {event}\n" + payload
+    return payload
+
+def stream_ai_response(lyrics, prompt_template, cache, action):
+    """
+    Envia a resposta do Gemini como server-sent events: eventos "data" com os trechos
+    de texto, seguidos de um evento "done" (ou "error"). A resposta completa é gravada no cache.
+    """
+    content_hash = generate_content_hash(lyrics, prompt_template, GEMINI_MODEL)
+    cached_entry = cache.get(content_hash)
+
+    stream = None
+    if not cached_entry:
+        try:
+            stream = stream_gemini_model(prompt_template.format(lyrics=lyrics), model=GEMINI_MODEL)
+        except GeminiOverloadedError as e:
+            return format_response(False, error=str(e)), 503
+        except Exception as e:
+            print(f"Erro ao {action} (streaming): {e}")
+            return format_response(False, error=f"Erro ao {action}: {str(e)}"), 500
+
+    def generate():
+        if cached_entry:
+            yield sse_event({"text": cached_entry["data"]})
+            yield sse_event({"cached": True}, event="done")
+            return
+
+        chunks = []
+        try:
+            for text in stream:
+                chunks.append(text)
+                yield sse_event({"text": text})
+        except Exception as e:
+            print(f"Erro ao {action} (streaming): {e}")
+            yield sse_event({"error": f"Erro ao {action}: {str(e)}"}, event="error")
+            return
+
+        cache[content_hash] = {"data": "".join(chunks), "timestamp": time.time()}
+        yield sse_event({"cached": False}, event="done")
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    if stream is not None:
+        # Libera o slot do Gemini mesmo se o cliente desconectar antes do fim
+        response.call_on_close(stream.close)
+    return response
+
+# Versões em streaming das rotas de tradução e explicação
+@app.route("/translate/stream", methods=["POST"])
+def translate_stream():
+    data = request.get_json()
+    if not data or "lyrics" not in data:
+        return format_response(False, error="A propriedade 'lyrics' é obrigatória."), 400
+    return stream_ai_response(data["lyrics"], TRANSLATE_PROMPT, translate_file_cache, "traduzir")
+
+@app.route("/explain/stream", methods=["POST"])
+def explain_stream():
+    data = request.get_json()
+    if not data or "lyrics" not in data:
+        return format_response(False, error="A propriedade 'lyrics' é obrigatória."), 400
+    return stream_ai_response(data["lyrics"], EXPLAIN_PROMPT, explain_file_cache, "explicar")
+
+# Rotas em lote
+def read_batch_items(field):
+    """Lê a lista de itens do corpo JSON; retorna (itens, erro)."""
+    data = request.get_json(silent=True)
+    items = data.get(field) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items or not all(isinstance(item, str) and item for item in items):
+        return None, f"A propriedade '{field}' deve ser uma lista não vazia de textos."
+    if len(items) > BATCH_MAX_ITEMS:
+        return None, f"No máximo {BATCH_MAX_ITEMS} itens por requisição."
+    return items, None
+
+def load_lyrics_item(url):
+    """Busca uma letra para a rota em lote, retornando o resultado do item."""
+    url_hash = generate_hash(url)
+    try:
+        lyrics, error, status = request_coalescer.do(f"lyrics:{url_hash}", load_lyrics, url, url_hash)
+    except Exception as e:
+        print(f"Erro ao buscar a letra de {url}: {e}")
+        return {"url": url, "status": 500, "error": f"Erro ao buscar a letra: {str(e)}"}
+    if error:
+        return {"url": url, "status": status, "error": error}
+    return {"url": url, "status": 200, "lyrics": lyrics, "cached": False}
+
+@app.route("/get_lyrics/batch", methods=["POST"])
+@limiter.limit("5 per minute")
+def get_lyrics_batch():
+    urls, error = read_batch_items("urls")
+    if error:
+        return format_response(False, error=error), 400
+
+    results = [None] * len(urls)
+    misses = []
+    for i, url in enumerate(urls):
+        cached_lyrics = lyrics_file_cache.get(generate_hash(url))
+        if cached_lyrics:
+            results[i] = {"url": url, "status": 200, "lyrics": cached_lyrics["data"], "cached": True}
+        else:
+            misses.append(i)
+
+    # Letras fora do cache são buscadas em paralelo, com no máximo BATCH_CONCURRENCY simultâneas
+    if misses:
+        with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+            for i, result in zip(misses, executor.map(lambda i: load_lyrics_item(urls[i]), misses)):
+                results[i] = result
+
+    return format_response(True, {"results": results})
+
+BATCH_TRANSLATE_PROMPT = (
+    "Traduza cada uma das letras a seguir para o Português. Cada letra começa com uma linha "
+    "'### LETRA N'. Responda apenas com as traduções, na mesma ordem, começando cada uma "
+    "com a mesma linha '### LETRA N':\n\n{lyrics}"
+)
+BATCH_ITEM_HEADER_RE = re.compile(r"^###\s*LETRA\s+(\d+)\s*$", re.MULTILINE)
+
+def pack_lyrics(items):
+    """Agrupa letras (chave, letra) em pacotes de até BATCH_PACK_MAX_CHARS caracteres."""
+    packs = []
+    current, size = [], 0
+    for key, lyrics in items:
+        if current and size + len(lyrics) > BATCH_PACK_MAX_CHARS:
+            packs.append(current)
+            current, size = [], 0
+        current.append((key, lyrics))
+        size += len(lyrics)
+    if current:
+        packs.append(current)
+    return packs
+
+def parse_packed_translations(text):
+    """Separa a resposta de um pacote em {N: tradução} pelos cabeçalhos '### LETRA N'."""
+    matches = list(BATCH_ITEM_HEADER_RE.finditer(text))
+    translations = {}
+    for current, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        translation = text[current.end():end].strip()
+        if translation:
+            translations[int(current.group(1))] = translation
+    return translations
+
+def translate_item(lyrics):
+    """
+    Traduz uma letra isolada e grava no cache; retorna (tradução, erro, status). Como na rota
+    /translate, timeouts e erros do Gemini ficam no cache negativo.
+    """
+    content_hash = generate_content_hash(lyrics, TRANSLATE_PROMPT, GEMINI_MODEL)
+    failure_key = f"translate:{content_hash}"
+    try:
+        translation = call_gemini_model(TRANSLATE_PROMPT.format(lyrics=lyrics), model=GEMINI_MODEL)
+    except GeminiOverloadedError as e:
+        return None, str(e), 503
+    except GeminiTimeoutError as e:
+        return remember_failure(failure_key, "error", error=str(e), status=504)
+    except GeminiRequestError as e:
+        print(f"Erro ao traduzir: {e}")
+        return None, f"Erro ao traduzir: {str(e)}", e.status
+    except Exception as e:
+        print(f"Erro ao traduzir: {e}")
+        return remember_failure(failure_key, "error", error=f"Erro ao traduzir: {str(e)}", status=500)
+    translate_file_cache[content_hash] = {"data": translation, "timestamp": time.time()}
+    return translation, None, 200
+
+def translate_pack(pack):
+    """
+    Traduz um pacote de letras curtas, como (content_hash, letra), em uma única chamada ao
+    Gemini. Letras que não vierem na resposta são traduzidas individualmente, agrupadas com
+    traduções iguais em andamento. Retorna {content_hash: (tradução, erro, status)}.
+    """
+    results = {}
+    # Outra requisição pode ter traduzido (ou falhado em traduzir) uma das letras enquanto esta esperava
+    remaining = []
+    for content_hash, lyrics in pack:
+        cached_translation = translate_file_cache.get(content_hash)
+        if cached_translation:
+            results[content_hash] = (cached_translation["data"], None, 200)
+            continue
+        failure = cached_failure(f"translate:{content_hash}")
+        if failure:
+            results[content_hash] = failure
+            continue
+        remaining.append((content_hash, lyrics))
+
+    translations = {}
+    if len(remaining) > 1:
+        packed = "\n\n".join(f"### LETRA {n}\n{lyrics}" for n, (_, lyrics) in enumerate(remaining, 1))
+        # Lotes simultâneos com as mesmas letras fazem uma única chamada
+        pack_key = "translate_pack:" + generate_hash(",".join(content_hash for content_hash, _ in remaining))
+        try:
+            response = request_coalescer.do(
+                pack_key, call_gemini_model, BATCH_TRANSLATE_PROMPT.format(lyrics=packed), model=GEMINI_MODEL
+            )
+            translations = parse_packed_translations(response)
+        except Exception as e:
+            print(f"Erro ao traduzir pacote de {len(remaining)} letras: {e}")
+
+    for n, (content_hash, lyrics) in enumerate(remaining, 1):
+        translation = translations.get(n)
+        if not translation:
+            results[content_hash] = request_coalescer.do(f"translate:{content_hash}", translate_item, lyrics)
+            continue
+        translate_file_cache[content_hash] = {"data": translation, "timestamp": time.time()}
+        results[content_hash] = (translation, None, 200)
+    return results
+
+@app.route("/translate/batch", methods=["POST"])
+@limiter.limit("5 per minute")
+def translate_batch():
+    lyrics_list, error = read_batch_items("lyrics")
+    if error:
+        return format_response(False, error=error), 400
+
+    results = [None] * len(lyrics_list)
+    # Letras repetidas na mesma requisição são traduzidas uma vez só: content_hash -> índices
+    misses = {}
+    for i, lyrics in enumerate(lyrics_list):
+        content_hash = generate_content_hash(lyrics, TRANSLATE_PROMPT, GEMINI_MODEL)
+        cached_translation = translate_file_cache.get(content_hash)
+        if cached_translation:
+            results[i] = {"status": 200, "translation": cached_translation["data"], "cached": True}
+            continue
+        # Uma falha recente do Gemini para a mesma letra é devolvida sem chamar o modelo de novo
+        failure = cached_failure(f"translate:{content_hash}")
+        if failure:
+            results[i] = {"status": failure[2], "error": failure[1]}
+            continue
+        misses.setdefault(content_hash, (lyrics, []))[1].append(i)
+
+    # Letras curtas são agrupadas em uma só chamada; letras longas vão sozinhas
+    unique_misses = [(content_hash, lyrics) for content_hash, (lyrics, _) in misses.items()]
+    short_items = [(key, lyrics) for key, lyrics in unique_misses if len(lyrics) <= BATCH_PACK_MAX_CHARS // 2]
+    long_items = [(key, lyrics) for key, lyrics in unique_misses if len(lyrics) > BATCH_PACK_MAX_CHARS // 2]
+    packs = pack_lyrics(short_items) + [[item] for item in long_items]
+
+    if packs:
+        with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as executor:
+            for pack_results in executor.map(translate_pack, packs):
+                for content_hash, (translation, item_error, status) in pack_results.items():
+                    if item_error:
+                        result = {"status": status, "error": item_error}
+                    else:
+                        result = {"status": 200, "translation": translation, "cached": False}
+                    for i in misses[content_hash][1]:
+                        results[i] = dict(result)
+
+    return format_response(True, {"results": results})
@@ -1,8 +1,9 @@
 import os
-import requests
 import base64
 from urllib.parse import quote
 import time
+from .http_client import http_get, http_post
+from .metrics import timed
 
 # Credenciais da API do Spotify
 CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
@@ -14,93 +15,109 @@ token_cache = {
     "expires_at": 0
 }
 
-def get_spotify_token():
-    """Obtém ou renova o token de acesso à API do Spotify."""
-    # Se o token ainda é válido, retorna-o
-    current_time = int(time.time())
-    if token_cache["access_token"] and token_cache["expires_at"] > current_time:
-        return token_cache["access_token"]
-    
-    # Caso contrário, solicita um novo token
+# Podem apontar para um servidor local, como os stubs de benchmarks/stub_upstreams.py
+SPOTIFY_ACCOUNTS_URL = os.getenv("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com/api/token")
+SPOTIFY_API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1")
+
+def build_token_request():
+    """Monta os headers e o corpo da requisição de token (client credentials)."""
     auth_string = f"{CLIENT_ID}:{CLIENT_SECRET}"
     auth_bytes = auth_string.encode("utf-8")
     auth_base64 = base64.b64encode(auth_bytes).decode("utf-8")
     
-    url = "https://accounts.spotify.com/api/token"
     headers = {
         "Authorization": f"Basic {auth_base64}",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = {"grant_type": "client_credentials"}
+    return headers, data
+
+def cached_token():
+    """Retorna o token em cache se ainda for válido."""
+    current_time = int(time.time())
+    if token_cache["access_token"] and token_cache["expires_at"] > current_time:
+        return token_cache["access_token"]
+    return None
+
+def store_token(json_result):
+    current_time = int(time.time())
+    token_cache["access_token"] = json_result["access_token"]
+    token_cache["expires_at"] = current_time + json_result["expires_in"] - 60  # Com margem de segurança
+    return token_cache["access_token"]
+
+def get_spotify_token():
+    """Obtém ou renova o token de acesso à API do Spotify."""
+    # Se o token ainda é válido, retorna-o
+    token = cached_token()
+    if token:
+        return token
     
-    response = requests.post(url, headers=headers, data=data)
+    # Caso contrário, solicita um novo token
+    headers, data = build_token_request()
+    response = http_post(SPOTIFY_ACCOUNTS_URL, headers=headers, data=data)
     
-    if response.status_code == 200:
-        json_result = response.json()
-        token_cache["access_token"] = json_result["access_token"]
-        token_cache["expires_at"] = current_time + json_result["expires_in"] - 60  # Com margem de segurança
-        return token_cache["access_token"]
-    else:
+    if response.status_code != 200:
         print(f"Erro ao obter token do Spotify: {response.status_code}")
-        return None
+        response.raise_for_status()
+    return store_token(response.json())
+
+def parse_artist_info(json_result):
+    """Extrai as informações do primeiro artista de uma resposta de busca."""
+    if json_result["artists"]["items"]:
+        artist = json_result["artists"]["items"][0]
+        return {
+            "id": artist["id"],
+            "name": artist["name"],
+            "popularity": artist["popularity"],
+            "genres": artist["genres"],
+            "followers": artist["followers"]["total"],
+            "image_url": artist["images"][0]["url"] if artist["images"] else None
+        }
+    return None
+
+def parse_track(track):
+    return {
+        "id": track["id"],
+        "name": track["name"],
+        "popularity": track["popularity"],
+        "preview_url": track["preview_url"],
+        "album_name": track["album"]["name"],
+        "album_image": track["album"]["images"][0]["url"] if track["album"]["images"] else None,
+        "release_date": track["album"]["release_date"],
+        "spotify_url": track["external_urls"]["spotify"]
+    }
 
+@timed("spotify_search")
 def search_artist_info(artist_name):
     """Busca informações detalhadas sobre um artista."""
     token = get_spotify_token()
     if not token:
         return None
     
-    url = f"https://api.spotify.com/v1/search?q={quote(artist_name)}&type=artist&limit=1"
+    url = f"{SPOTIFY_API_URL}/search?q={quote(artist_name)}&type=artist&limit=1"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        json_result = response.json()
-        if json_result["artists"]["items"]:
-            artist = json_result["artists"]["items"][0]
-            return {
-                "id": artist["id"],
-                "name": artist["name"],
-                "popularity": artist["popularity"],
-                "genres": artist["genres"],
-                "followers": artist["followers"]["total"],
-                "image_url": artist["images"][0]["url"] if artist["images"] else None
-            }
-    
-    return None
+    response = http_get(url, headers=headers)
+    # Falhas da API lançam exceção; None significa apenas que o artista não foi encontrado
+    response.raise_for_status()
+    return parse_artist_info(response.json())
 
+@timed("spotify_top_tracks")
 def get_artist_top_tracks(artist_id, country="BR"):
     """Busca as músicas mais populares de um artista."""
     token = get_spotify_token()
     if not token:
         return None
     
-    url = f"https://api.spotify.com/v1/artists/{artist_id}/top-tracks?country={country}"
+    url = f"{SPOTIFY_API_URL}/artists/{artist_id}/top-tracks?country={country}"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
-    
-    if response.status_code == 200:
-        json_result = response.json()
-        tracks = []
-        
-        for track in json_result["tracks"]:
-            tracks.append({
-                "id": track["id"],
-                "name": track["name"],
-                "popularity": track["popularity"],
-                "preview_url": track["preview_url"],
-                "album_name": track["album"]["name"],
-                "album_image": track["album"]["images"][0]["url"] if track["album"]["images"] else None,
-                "release_date": track["album"]["release_date"],
-                "spotify_url": track["external_urls"]["spotify"]
-            })
-        
-        return tracks
-    
-    return None
+    response = http_get(url, headers=headers)
+    response.raise_for_status()
+    json_result = response.json()
+    return [parse_track(track) for track in json_result["tracks"]]
 
+@timed("spotify_search_track")
 def search_track(track_name, artist_name=None):
     """Busca informações sobre uma música específica, opcionalmente filtrando por artista."""
     token = get_spotify_token()
@@ -111,10 +128,10 @@ def search_track(track_name, artist_name=None):
     if artist_name:
         query = f"track:{track_name} artist:{artist_name}"
     
-    url = f"https://api.spotify.com/v1/search?q={quote(query)}&type=track&limit=5"
+    url = f"{SPOTIFY_API_URL}/search?q={quote(query)}&type=track&limit=5"
     headers = {"Authorization": f"Bearer {token}"}
     
-    response = requests.get(url, headers=headers)
+    response = http_get(url, headers=headers)
     
     if response.status_code == 200:
         json_result = response.json()
@@ -122,17 +139,10 @@ def search_track(track_name, artist_name=None):
         
         for track in json_result["tracks"]["items"]:
             tracks.append({
-                "id": track["id"],
-                "name": track["name"],
+                **parse_track(track),
                 "artists": [artist["name"] for artist in track["artists"]],
-                "popularity": track["popularity"],
-                "preview_url": track["preview_url"],
-                "album_name": track["album"]["name"],
-                "album_image": track["album"]["images"][0]["url"] if track["album"]["images"] else None,
-                "release_date": track["album"]["release_date"],
-                "spotify_url": track["external_urls"]["spotify"]
             })
         
         return tracks
     
-    return None
\ No newline at end of file
+    return None
@@ -1,3 +1,4 @@
+import re
 import unicodedata
 
 def normalize_term(term):
@@ -5,4 +6,58 @@ def normalize_term(term):
     term = term.strip().lower()
     term = unicodedata.normalize("NFD", term)
     term = "".join(char for char in term if unicodedata.category(char) != "Mn")
-    return term
\ No newline at end of file
+    return term
+
+def normalize_lyrics(lyrics):
+    """Normaliza a letra para comparação: minúsculas e espaços em branco colapsados."""
+    return " ".join(lyrics.lower().split())
+
+SECTION_HEADER_RE = re.compile(r"^\[[^\]]*\]$")
+
+def is_section_header(line):
+    """Retorna True para cabeçalhos de seção do Genius, como [Verse 1] ou [Chorus]."""
+    return bool(SECTION_HEADER_RE.match(line.strip()))
+
+def unique_lyric_lines(lyrics):
+    """
+    Retorna as linhas traduzíveis da letra sem repetição, na ordem em que aparecem.
+    Linhas vazias e cabeçalhos de seção são ignorados; linhas que diferem apenas
+    em maiúsculas ou espaços contam como a mesma linha.
+    """
+    seen = set()
+    lines = []
+    for line in lyrics.splitlines():
+        line = line.strip()
+        if not line or is_section_header(line):
+            continue
+        key = normalize_lyrics(line)
+        if key not in seen:
+            seen.add(key)
+            lines.append(line)
+    return lines
+
+def split_sections(lyrics):
+    """
+    Divide a letra nos cabeçalhos de seção do Genius, cada trecho começando pelo seu
+    cabeçalho. O texto antes do primeiro cabeçalho forma um trecho próprio.
+    """
+    sections = []
+    current = []
+    for line in lyrics.splitlines():
+        if is_section_header(line) and current:
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current).strip())
+    return [section for section in sections if section]
+
+def group_sections(sections, max_chars):
+    """Junta seções vizinhas em trechos de até max_chars caracteres; uma seção maior fica sozinha."""
+    chunks = []
+    for section in sections:
+        if chunks and len(chunks[-1]) + len(section) + 2 <= max_chars:
+            chunks[-1] += "\n\n" + section
+        else:
+            chunks.append(section)
+    return chunks
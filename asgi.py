@@ -0,0 +1,7 @@
+# Modo de serviço assíncrono (ASGI) com as mesmas rotas da API Flask.
+# Execute com: uvicorn asgi:app --workers 2
+from api.asgi import app
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app)
@@ -0,0 +1,69 @@
+"""
+Verifica as regras de apelidos do índice de artistas (api/artist_index.py): uma busca
+parcial nunca pode tomar o nome completo de outro artista.
+
+Uso: python benchmarks/check_artist_index.py
+Sai com código 1 se algum caso falhar.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.artist_index import ArtistIndex  # noqa: E402
+from api.cache import Cache, SQLiteBackend  # noqa: E402
+
+
+def resolved_query(index, name):
+    entry = index.lookup(name)
+    return entry["query"] if entry else None
+
+
+def check_cases(index, backend):
+    # "Taylor": o Spotify encontra Taylor Swift e o Genius, James Taylor
+    index.record("Taylor", spotify_id="sp-swift", spotify_name="Taylor Swift", popularity=95)
+    index.record("Taylor", genius_id=1, genius_name="James Taylor")
+    yield "consulta parcial mantém a própria chave", resolved_query(index, " taylor ") == "Taylor"
+    yield "consulta parcial não vira apelido de Taylor Swift", resolved_query(index, "Taylor Swift") is None
+    yield "consulta parcial não vira apelido de James Taylor", resolved_query(index, "James Taylor") is None
+    yield "nome exibido não escolhe um dos artistas", index.lookup("Taylor")["name"] == "Taylor"
+
+    index.record("Taylor Swift", spotify_id="sp-swift", spotify_name="Taylor Swift")
+    index.record("Taylor Swift", genius_id=2, genius_name="Taylor Swift")
+    yield "nome completo resolve para si mesmo", resolved_query(index, "TAYLOR SWIFT") == "Taylor Swift"
+    yield "nome completo não muda a consulta parcial", resolved_query(index, "Taylor") == "Taylor"
+
+    # Os dois serviços concordam no nome oficial: ele vira apelido, com a própria consulta
+    index.record("Queen band", genius_id=3, genius_name="Queen")
+    index.record("Queen band", spotify_id="sp-queen", spotify_name="Queen")
+    queen = index.lookup("queen")
+    yield "nome oficial confirmado vira apelido", queen is not None and queen["genius_id"] == 3
+    yield "apelido não aponta para a consulta mais longa", queen is not None and queen["query"] == "Queen"
+
+    index.record("beyonce", genius_id=4, genius_name="Beyoncé")
+    index.record("beyonce", spotify_id="sp-bey", spotify_name="Beyoncé")
+    yield "acentos e caixa resolvem para a mesma consulta", resolved_query(index, " BEYONCÉ ") == "beyonce"
+
+    # Apelido gravado pela regra antiga (substring) é ignorado
+    backend.set("artist_index", "bruno mars", {"query": "Bruno", "name": "Bruno Mars", "spotify_id": "x"}, time.time())
+    yield "apelido antigo por substring é ignorado", resolved_query(index, "Bruno Mars") is None
+    names = [suggestion["name"] for suggestion in index.suggest("bru")]
+    yield "apelido antigo não aparece nas sugestões", "Bruno Mars" not in names
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="lyricat-artist-index-") as workdir:
+        backend = SQLiteBackend(Path(workdir) / "cache.db")
+        index = ArtistIndex(Cache(backend, "artist_index", 24 * 60 * 60))
+        for name, ok in check_cases(index, backend):
+            failures += not ok
+            print(f"{'ok' if ok else 'FALHOU':8} {name}")
+        backend.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
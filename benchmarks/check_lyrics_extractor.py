@@ -0,0 +1,41 @@
+"""
+Compara o extrator rápido (extract_lyrics) com o extrator de referência
+(extract_lyrics_reference) em todas as páginas salvas em fixtures/genius_pages.
+
+Uso: python benchmarks/check_lyrics_extractor.py [pasta_com_paginas ...]
+Sai com código 1 se alguma página produzir uma letra diferente.
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.genius_api import FAST_PARSER, extract_lyrics, extract_lyrics_reference  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "genius_pages"
+
+
+def timed(fn, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(html)
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main(dirs, repeat=20):
+    pages = sorted(page for directory in dirs for page in Path(directory).glob("*.html"))
+    mismatches = 0
+    print(f"Parser rápido: {FAST_PARSER}")
+    for page in pages:
+        html = page.read_text(encoding="utf-8")
+        expected, reference_ms = timed(extract_lyrics_reference, html, repeat)
+        actual, fast_ms = timed(extract_lyrics, html, repeat)
+        status = "ok" if actual == expected else "DIFERENTE"
+        mismatches += actual != expected
+        print(f"{page.name:32} {status:10} referência {reference_ms:7.2f} ms   rápido {fast_ms:7.2f} ms")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:] or [FIXTURES_DIR]))
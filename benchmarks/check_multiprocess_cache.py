@@ -0,0 +1,192 @@
+"""
+Roda N processos contra o mesmo diretório de cache, como vários workers do gunicorn, e
+verifica que nenhuma chave se perde e que não há erros "database is locked". Cada processo
+grava e lê pelo SQLiteBackend direto e pelo WriteBehindBackend, com várias threads, e todos
+tentam importar o mesmo arquivo JSON antigo ao mesmo tempo (só um deve importá-lo).
+Com o método "fork", os processos herdam um backend já aberto pelo processo pai.
+Também confere que a camada em memória de um worker enxerga, depois do TTL suave, o valor
+novo gravado por outro worker (duas visões Cache + MemoryLRU sobre o mesmo arquivo).
+
+Uso: python benchmarks/check_multiprocess_cache.py [--workers 6] [--keys 300] [--start-methods spawn,fork]
+Sai com código 1 se alguma verificação falhar.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.cache import Cache, MemoryLRU, SQLiteBackend, WriteBehindBackend, migrate_json_caches  # noqa: E402
+
+THREADS_PER_WORKER = 3
+LEGACY_ENTRIES = 50
+
+# Backend aberto pelo processo pai antes do fork (só no método "fork")
+inherited_backend = None
+
+
+def open_backend(cache_dir):
+    return WriteBehindBackend(SQLiteBackend(Path(cache_dir) / "cache.db"), flush_interval=0.05, max_dirty=25)
+
+
+def write_and_read(worker_id, thread_id, keys, write_behind, direct):
+    """Grava as chaves da thread, metade por cada backend, e confere a leitura de volta."""
+    missing = 0
+    for n in range(keys):
+        key = f"w{worker_id}-t{thread_id}-{n}"
+        value = {"worker": worker_id, "thread": thread_id, "n": n, "lyrics": f"verso {n}\n" * 20}
+        backend = direct if n % 2 else write_behind
+        backend.set("check", key, value, time.time())
+        stored = backend.get("check", key)
+        missing += stored is None or stored[0] != value
+    return missing
+
+
+def worker(cache_dir, worker_id, keys, results):
+    output = io.StringIO()
+    errors = []
+    missing = []
+    with contextlib.redirect_stdout(output):
+        try:
+            write_behind = inherited_backend or open_backend(cache_dir)
+            direct = SQLiteBackend(Path(cache_dir) / "cache.db")
+            migrate_json_caches(direct, {"legacy": Path(cache_dir) / "legacy_cache.json"})
+
+            def run(thread_id):
+                try:
+                    missing.append(write_and_read(worker_id, thread_id, keys, write_behind, direct))
+                except Exception as e:
+                    errors.append(repr(e))
+
+            threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS_PER_WORKER)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            write_behind.close()
+            direct.close()
+        except Exception as e:
+            errors.append(repr(e))
+    # Falhas da thread de gravação em lote só aparecem na saída ("Erro ao gravar cache em lote")
+    errors.extend(line for line in output.getvalue().splitlines() if "Erro" in line or "locked" in line)
+    results.put((worker_id, sum(missing), errors))
+
+
+def run_check(method, workers, keys):
+    global inherited_backend
+    context = multiprocessing.get_context(method)
+    with tempfile.TemporaryDirectory(prefix=f"lyricat-multiprocess-{method}-") as cache_dir:
+        legacy = {f"antiga{i}": {"data": {"n": i}, "timestamp": time.time()} for i in range(LEGACY_ENTRIES)}
+        (Path(cache_dir) / "legacy_cache.json").write_text(json.dumps(legacy), encoding="utf-8")
+        if method == "fork":
+            inherited_backend = open_backend(cache_dir)
+            inherited_backend.set("check", "pai", {"pai": True}, time.time())
+            inherited_backend.flush()
+
+        results = context.Queue()
+        started_at = time.perf_counter()
+        processes = [context.Process(target=worker, args=(cache_dir, i, keys, results)) for i in range(workers)]
+        for process in processes:
+            process.start()
+        outcomes = [results.get(timeout=300) for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started_at
+        if inherited_backend is not None:
+            inherited_backend.close()
+            inherited_backend = None
+
+        backend = SQLiteBackend(Path(cache_dir) / "cache.db")
+        expected = {
+            f"w{worker_id}-t{thread_id}-{n}"
+            for worker_id in range(workers)
+            for thread_id in range(THREADS_PER_WORKER)
+            for n in range(keys)
+        }
+        if method == "fork":
+            expected.add("pai")
+        stored = {key for key, _, _ in backend.items("check")}
+        migrated = backend.count("legacy")
+        backend.close()
+        leftovers = [path.name for path in Path(cache_dir).glob("legacy_cache.json*") if not path.name.endswith(".migrated")]
+
+    errors = [error for _, _, worker_errors in outcomes for error in worker_errors]
+    checks = [
+        ("processos terminaram sem erro", all(process.exitcode == 0 for process in processes)),
+        (f"{len(expected)} chaves gravadas, nenhuma perdida", stored >= expected),
+        ("leituras de volta corretas", sum(missing for _, missing, _ in outcomes) == 0),
+        ("sem erros 'database is locked' nem falhas de gravação", not errors),
+        (f"JSON antigo importado uma só vez ({migrated} entradas)", migrated == LEGACY_ENTRIES and not leftovers),
+    ]
+    print(f"[{method}] {workers} processos x {THREADS_PER_WORKER} threads x {keys} chaves em {elapsed:.1f}s")
+    for name, ok in checks:
+        print(f"  {'ok' if ok else 'FALHOU':8} {name}")
+    for error in errors[:10]:
+        print(f"    {error}")
+    return all(ok for _, ok in checks)
+
+
+def run_memory_view_check():
+    """Dois workers, cada um com sua MemoryLRU, lendo e gravando o mesmo cache SQLite."""
+    soft_expiry, expiry = 0.2, 0.5
+    with tempfile.TemporaryDirectory(prefix="lyricat-memory-views-") as cache_dir:
+        backends = [open_backend(cache_dir) for _ in range(2)]
+        worker_a, worker_b = [
+            Cache(backend, "check", expiry, soft_expiry=soft_expiry, memory=MemoryLRU(100, 1 << 20))
+            for backend in backends
+        ]
+
+        # B guarda na memória uma entrada velha (passou do TTL suave) e A grava a versão nova
+        worker_a["velha"] = {"data": "antigo", "timestamp": time.time() - 0.3}
+        backends[0].flush()
+        worker_b.get("velha")
+        worker_a["velha"] = {"data": "novo", "timestamp": time.time()}
+        backends[0].flush()
+        soft_entry = worker_b.get("velha")
+
+        # A cópia em memória de B passa do TTL rígido enquanto o disco já tem a versão nova
+        worker_a["vencida"] = {"data": "antigo", "timestamp": time.time() - 0.4}
+        backends[0].flush()
+        worker_b.get("vencida")
+        time.sleep(0.15)
+        worker_a["vencida"] = {"data": "novo", "timestamp": time.time()}
+        backends[0].flush()
+        hard_entry = worker_b.get("vencida")
+
+        for backend in backends:
+            backend.close()
+
+    checks = [
+        ("entrada velha na memória lê o valor novo do disco",
+         soft_entry is not None and soft_entry["data"] == "novo" and not worker_b.is_stale(soft_entry)),
+        ("entrada vencida na memória não vira miss com o disco atualizado",
+         hard_entry is not None and hard_entry["data"] == "novo"),
+    ]
+    print("[memória] duas visões Cache + MemoryLRU sobre o mesmo arquivo")
+    for name, ok in checks:
+        print(f"  {'ok' if ok else 'FALHOU':8} {name}")
+    return all(ok for _, ok in checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica o cache SQLite compartilhado por vários processos.")
+    parser.add_argument("--workers", type=int, default=6, help="processos simultâneos (padrão: 6)")
+    parser.add_argument("--keys", type=int, default=300, help="chaves gravadas por thread (padrão: 300)")
+    parser.add_argument("--start-methods", default="spawn,fork", help="métodos do multiprocessing (padrão: spawn,fork)")
+    args = parser.parse_args()
+
+    methods = [method for method in args.start_methods.split(",") if method in multiprocessing.get_all_start_methods()]
+    passed = [run_check(method, args.workers, args.keys) for method in methods]
+    passed.append(run_memory_view_check())
+    return 0 if all(passed) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Roda N processos, como vários workers do gunicorn, contra o mesmo armazenamento de limites
+de requisição e verifica que o limite de uma rota vale para todos juntos: o total de
+requisições aceitas é o limite da rota, e não N vezes o limite. Cada processo faz as
+requisições pelo app Flask (Flask-Limiter) e pelo limitador do modo ASGI.
+
+Uso: python benchmarks/check_multiprocess_limiter.py [--workers 6] [--requests 60] [--storage-uri sqlite:///...]
+Sem --storage-uri, usa um arquivo SQLite temporário. Sai com código 1 se alguma verificação falhar.
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PATH = "/artist_suggest"
+LIMIT = 120  # "120 per minute" em routes.py e asgi.py
+
+
+def worker(cache_dir, storage_uri, requests, barrier, results):
+    # O diretório de cache das rotas é relativo ao diretório atual
+    os.chdir(cache_dir)
+    os.environ["RATELIMIT_STORAGE_URI"] = storage_uri
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        sys.path.insert(0, str(ROOT))
+        import app as flask_app
+        from api import asgi
+
+        client = flask_app.app.test_client()
+        scope = {"path": PATH, "client": ("127.0.0.1", 0)}
+        barrier.wait()
+        flask_accepted = asgi_accepted = 0
+        errors = []
+        for _ in range(requests):
+            status = client.get(f"{PATH}?q=taylor").status_code
+            if status == 200:
+                flask_accepted += 1
+            elif status != 429:
+                errors.append(f"status {status}")
+            try:
+                asgi.check_rate_limit(scope)
+                asgi_accepted += 1
+            except asgi.HTTPError as e:
+                if e.status != 429:
+                    errors.append(repr(e))
+    errors.extend(line for line in output.getvalue().splitlines() if "Erro" in line)
+    results.put((flask_accepted, asgi_accepted, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica os limites de requisição divididos por vários processos.")
+    parser.add_argument("--workers", type=int, default=6, help="processos simultâneos (padrão: 6)")
+    parser.add_argument("--requests", type=int, default=60, help="requisições por processo em cada modo (padrão: 60)")
+    parser.add_argument("--storage-uri", help="armazenamento dos limites (padrão: arquivo SQLite temporário)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="lyricat-multiprocess-limiter-") as cache_dir:
+        storage_uri = args.storage_uri or f"sqlite:///{Path(cache_dir) / 'ratelimits.db'}"
+        barrier = context.Barrier(args.workers)
+        results = context.Queue()
+        started_at = time.perf_counter()
+        processes = [
+            context.Process(target=worker, args=(cache_dir, storage_uri, args.requests, barrier, results))
+            for _ in range(args.workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get(timeout=300) for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started_at
+
+    expected = min(LIMIT, args.workers * args.requests)
+    flask_total = sum(flask for flask, _, _ in outcomes)
+    asgi_total = sum(asgi for _, asgi, _ in outcomes)
+    errors = [error for _, _, worker_errors in outcomes for error in worker_errors]
+    checks = [
+        ("processos terminaram sem erro", all(process.exitcode == 0 for process in processes)),
+        (f"Flask: {flask_total} de {args.workers * args.requests} aceitas (limite {expected})", flask_total == expected),
+        (f"ASGI: {asgi_total} de {args.workers * args.requests} aceitas (limite {expected})", asgi_total == expected),
+        ("sem erros do armazenamento", not errors),
+    ]
+    print(f"[{storage_uri.split('://')[0]}] {args.workers} processos x {args.requests} requisições em {elapsed:.1f}s")
+    for name, ok in checks:
+        print(f"  {'ok' if ok else 'FALHOU':8} {name}")
+    for error in errors[:10]:
+        print(f"    {error}")
+    return 0 if all(ok for _, ok in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Mede o tempo de importação do app Flask (o que cada worker paga ao iniciar ou após um
+fork) em processos novos, e confere que a importação não abre o cache nem carrega os
+módulos pesados que só são usados na primeira requisição.
+
+Uso: python benchmarks/import_time.py [repetições] [--max-ms LIMITE]
+Sai com código 1 se algum módulo adiado for importado, o cache for aberto na importação
+ou a mediana passar de LIMITE milissegundos.
+"""
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que só devem ser importados na primeira chamada que precisar deles
+DEFERRED_MODULES = ["google.genai", "bs4", "lxml"]
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+from api.routes import cache_backend
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+    "cache_opened": cache_backend.is_loaded(),
+}}))
+"""
+
+
+def run_probe():
+    # Diretório vazio para que o cache relativo ("cache/") não seja criado no repositório
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(root=str(ROOT), deferred=DEFERRED_MODULES)],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(repeat=5, max_ms=None):
+    results = [run_probe() for _ in range(repeat)]
+    timings = [result["ms"] for result in results]
+    median = statistics.median(timings)
+    print(f"import app: mediana {median:.1f} ms   mín {min(timings):.1f} ms   máx {max(timings):.1f} ms ({repeat} execuções)")
+
+    failed = False
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    if loaded:
+        print(f"Módulos importados antes da hora: {', '.join(loaded)}")
+        failed = True
+    if any(result["cache_opened"] for result in results):
+        print("O cache foi aberto durante a importação")
+        failed = True
+    if max_ms is not None and median > max_ms:
+        print(f"Mediana acima do limite de {max_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    limit = None
+    if "--max-ms" in args:
+        index = args.index("--max-ms")
+        limit = float(args[index + 1])
+        del args[index:index + 2]
+    sys.exit(main(int(args[0]) if args else 5, limit))
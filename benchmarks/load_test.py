@@ -0,0 +1,172 @@
+"""
+Teste de carga contra os stubs locais (stub_upstreams.py): sobe os stubs e o app (Flask ou
+ASGI) em um diretório de cache vazio e dispara /enhanced_search, /search_artist, /get_lyrics,
+/translate e /explain em cada nível de concorrência, primeiro com o cache frio e depois
+repetindo as mesmas requisições com o cache quente. Os limites de requisição são desligados.
+
+Uso: python benchmarks/load_test.py [--server flask|asgi] [--concurrency 1,8,32] [--requests 20]
+     [--endpoints enhanced_search,get_lyrics] [--genius-latency 0.1 --gemini-latency 1.0 ...]
+"""
+import argparse
+import contextlib
+import logging
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.stub_upstreams import (  # noqa: E402
+    StubUpstreams,
+    add_latency_arguments,
+    artist_id_for,
+    latency_from_args,
+)
+
+ENDPOINTS = ["enhanced_search", "search_artist", "get_lyrics", "translate", "explain"]
+SAMPLE_LYRICS = (
+    "[Verso 1]\nAcordei cedo e o sol já estava lá fora\nA cidade inteira canta a mesma canção\n"
+    "[Refrão]\nE a gente dança até o dia clarear\nE a gente dança até o dia clarear\n"
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_flask():
+    from werkzeug.serving import make_server
+    import app as flask_app
+    from api.routes import limiter
+
+    limiter.enabled = False
+    server = make_server("127.0.0.1", free_port(), flask_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="flask-app", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def start_asgi():
+    import uvicorn
+    from api import asgi
+
+    asgi.check_rate_limit = lambda scope: None
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(asgi.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="asgi-app", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return f"http://127.0.0.1:{port}", stop
+
+
+def build_requests(endpoint, stubs, level, count):
+    """Requisições distintas para um endpoint; a rodada quente repete exatamente as mesmas."""
+    requests_list = []
+    for i in range(count):
+        artist = f"Artista {level}-{i}"
+        if endpoint in ("enhanced_search", "search_artist"):
+            requests_list.append(("GET", f"/{endpoint}", {"params": {"artist": artist}}))
+        elif endpoint == "get_lyrics":
+            url = f"{stubs.base_url}/genius/songs/{artist_id_for(artist)}-{i + 1}"
+            requests_list.append(("GET", "/get_lyrics", {"params": {"url": url}}))
+        else:
+            lyrics = f"{SAMPLE_LYRICS}[Outro]\nVersão {level}-{i}\n"
+            requests_list.append(("POST", f"/{endpoint}", {"json": {"lyrics": lyrics}}))
+    return requests_list
+
+
+def run_phase(base_url, requests_list, concurrency):
+    """Dispara as requisições com `concurrency` clientes; retorna latências, status e duração."""
+    local = threading.local()
+
+    def send(request):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        method, path, kwargs = request
+        started_at = time.perf_counter()
+        try:
+            status = local.session.request(method, base_url + path, timeout=120, **kwargs).status_code
+        except requests.RequestException:
+            status = "erro"
+        return time.perf_counter() - started_at, status
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests_list))
+    return [latency for latency, _ in results], Counter(status for _, status in results), time.perf_counter() - started_at
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+def report(endpoint, phase, concurrency, latencies, statuses, elapsed):
+    p50, p95, p99 = percentiles(latencies)
+    status_text = " ".join(f"{status}:{count}" for status, count in sorted(statuses.items(), key=str))
+    # Os logs do app ficam desligados durante as rodadas; o relatório vai direto para o terminal
+    print(
+        f"{endpoint:16} {phase:6} c={concurrency:<3} {len(latencies) / elapsed:8.1f} req/s   "
+        f"p50 {p50:8.1f} ms   p95 {p95:8.1f} ms   p99 {p99:8.1f} ms   [{status_text}]",
+        file=sys.__stdout__,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com os serviços externos simulados.")
+    parser.add_argument("--server", choices=["flask", "asgi"], default="flask")
+    parser.add_argument("--concurrency", default="1,8", help="níveis de concorrência separados por vírgula (padrão: 1,8)")
+    parser.add_argument("--requests", type=int, default=20, help="requisições por endpoint em cada rodada (padrão: 20)")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="endpoints testados, separados por vírgula")
+    parser.add_argument("--verbose", action="store_true", help="mostrar os logs do app e do servidor")
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+
+    stubs = StubUpstreams(latency_from_args(args)).start()
+    os.environ.update(stubs.environment())
+    # Cache vazio em um diretório temporário: a primeira rodada de cada nível é sempre fria
+    workdir = tempfile.mkdtemp(prefix="lyricat-bench-")
+    os.chdir(workdir)
+    base_url, stop_server = start_flask() if args.server == "flask" else start_asgi()
+    print(f"App ({args.server}) em {base_url}, stubs em {stubs.base_url}, cache em {workdir}")
+    print(f"Latências simuladas: {stubs.latency}")
+
+    if not args.verbose:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+    try:
+        with app_output:
+            for concurrency in (int(level) for level in args.concurrency.split(",")):
+                for endpoint in args.endpoints.split(","):
+                    requests_list = build_requests(endpoint, stubs, concurrency, args.requests)
+                    for phase in ("frio", "quente"):
+                        report(endpoint, phase, concurrency, *run_phase(base_url, requests_list, concurrency))
+        print(f"Chamadas aos stubs: {stubs.calls}")
+    finally:
+        stop_server()
+        stubs.stop()
+
+
+if __name__ == "__main__":
+    main()
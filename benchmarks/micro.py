@@ -0,0 +1,133 @@
+"""
+Micro-benchmarks dos caminhos quentes que não dependem de rede: extração de letras,
+normalização de termos, codec de compressão do cache, backend SQLite, gravação dos
+arquivos JSON de cache e busca no índice de letras. Com --fetch, mede também fetch_lyrics_from_url contra os stubs locais.
+
+Uso: python benchmarks/micro.py [--repeat 200] [--entries 2000] [--fetch]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "genius_pages"
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def report(name, ms, unit="chamada"):
+    print(f"{name:44} {ms:9.3f} ms/{unit}")
+
+
+def bench_extract(pages, repeat):
+    from api.genius_api import extract_lyrics
+
+    for page in pages:
+        html = page.read_text(encoding="utf-8")
+        report(f"extract_lyrics {page.name}", timed(lambda: extract_lyrics(html), repeat))
+
+
+def bench_normalize(repeat):
+    from api.artist_index import artist_key
+    from api.utils import normalize_term
+
+    terms = ["Beyoncé", "  Sigur Rós  ", "AC/DC", "Guns N' Roses", "Legião Urbana", "MC Kevin o Chris"]
+    for fn in (normalize_term, artist_key):
+        ms = timed(lambda: [fn(term) for term in terms], repeat * 10) / len(terms)
+        report(f"{fn.__name__}", ms)
+
+
+def bench_codec(pages, repeat):
+    from api.cache import ValueCodec
+
+    value = {"lyrics": pages[0].read_text(encoding="utf-8")[:20000], "url": "https://genius.com/x"}
+    # Sem o pacote zstandard o codec de zstd cai para zlib e não é medido de novo
+    codecs = {}
+    for algorithm in ("none", "zlib", "zstd"):
+        codec = ValueCodec(algorithm)
+        codecs.setdefault(codec.algorithm, codec)
+    for algorithm, codec in codecs.items():
+        stored = codec.encode(value)
+        report(f"codec {algorithm} encode ({len(stored)} bytes)", timed(lambda: codec.encode(value), repeat))
+        report(f"codec {algorithm} decode", timed(lambda: codec.decode(stored), repeat))
+
+
+def bench_sqlite(entries, workdir):
+    from api.cache import SQLiteBackend, ValueCodec
+
+    backend = SQLiteBackend(Path(workdir) / "micro.db", ValueCodec())
+    items = [(f"chave{i}", {"lyrics": f"verso {i}\n" * 40}, time.time()) for i in range(entries)]
+    report(f"SQLiteBackend.set_many ({entries})", timed(lambda: backend.set_many("bench", items), 1) / entries, "item")
+    report("SQLiteBackend.get", timed(lambda: [backend.get("bench", key) for key, _, _ in items], 1) / entries, "item")
+    backend.close()
+
+
+def bench_save_file_cache(entries, workdir):
+    from api.cache import save_file_cache
+
+    data = {f"chave{i}": {"data": {"lyrics": f"verso {i}\n" * 40}, "timestamp": time.time()} for i in range(entries)}
+    path = Path(workdir) / "micro.json"
+    report(f"save_file_cache ({entries} entradas)", timed(lambda: save_file_cache(data, path), 3), "gravação")
+
+
+def bench_lyrics_index(pages, entries, repeat, workdir):
+    from api.genius_api import extract_lyrics
+    from api.lyrics_index import LyricsIndex
+
+    index = LyricsIndex(Path(workdir) / "search.db")
+    lyrics = [extract_lyrics(page.read_text(encoding="utf-8")) or "" for page in pages]
+    songs = [{"title": f"Canção {i}", "url": f"https://genius.com/musica-{i}"} for i in range(entries)]
+    start = time.perf_counter()
+    index.add_songs(songs, artist="Artista")
+    for i, song in enumerate(songs):
+        index.add_lyrics(song["url"], f"{lyrics[i % len(lyrics)]}\nverso único {i}")
+    index.flush()
+    report(f"LyricsIndex indexação ({entries})", (time.perf_counter() - start) * 1000 / entries, "item")
+    for query in ("canção 12", "verso", "únic"):
+        report(f"LyricsIndex.search {query!r}", timed(lambda: index.search(query), repeat))
+
+
+def bench_fetch(repeat):
+    from benchmarks.stub_upstreams import StubUpstreams
+
+    stubs = StubUpstreams({"genius": 0, "spotify": 0, "gemini": 0}).start()
+    os.environ.update(stubs.environment())
+    from api.genius_api import fetch_lyrics_from_url
+
+    try:
+        url = f"{stubs.base_url}/genius/songs/1-1"
+        report("fetch_lyrics_from_url (stub, sem latência)", timed(lambda: fetch_lyrics_from_url(url), repeat))
+    finally:
+        stubs.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks sem rede.")
+    parser.add_argument("--repeat", type=int, default=100, help="repetições por medida (padrão: 100)")
+    parser.add_argument("--entries", type=int, default=2000, help="entradas nos benchmarks de cache (padrão: 2000)")
+    parser.add_argument("--fetch", action="store_true", help="medir também fetch_lyrics_from_url contra os stubs")
+    args = parser.parse_args()
+
+    pages = sorted(FIXTURES_DIR.glob("*.html"))
+    bench_extract(pages, max(1, args.repeat // 5))
+    bench_normalize(args.repeat)
+    bench_codec(pages, args.repeat)
+    with tempfile.TemporaryDirectory(prefix="lyricat-micro-") as workdir:
+        bench_sqlite(args.entries, workdir)
+        bench_save_file_cache(args.entries, workdir)
+        bench_lyrics_index(pages, args.entries, args.repeat, workdir)
+    if args.fetch:
+        bench_fetch(max(1, args.repeat // 5))
+
+
+if __name__ == "__main__":
+    main()
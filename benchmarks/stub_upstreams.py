@@ -0,0 +1,232 @@
+"""
+Servidor local que faz o papel do Genius, do Spotify e do Gemini nos benchmarks, repetindo
+as respostas gravadas em fixtures/upstream e as páginas de fixtures/genius_pages, com
+latência configurável por serviço.
+
+Uso isolado: python benchmarks/stub_upstreams.py --port 8900 --genius-latency 0.15
+e depois exporte as variáveis impressas (GENIUS_BASE_URL, SPOTIFY_API_URL...) antes de subir o app.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+UPSTREAM_DIR = FIXTURES_DIR / "upstream"
+PAGES_DIR = FIXTURES_DIR / "genius_pages"
+
+SONGS_PER_ARTIST = 100
+TOP_TRACKS = 10
+
+
+def load_fixture(name):
+    return json.loads((UPSTREAM_DIR / name).read_text(encoding="utf-8"))
+
+
+def artist_id_for(name):
+    """ID estável por nome, para que o mesmo artista sempre receba o mesmo ID."""
+    return int(hashlib.md5(name.lower().encode()).hexdigest()[:6], 16)
+
+
+class StubUpstreams:
+    """Estado compartilhado do servidor: respostas gravadas, latências e contadores de chamadas."""
+
+    def __init__(self, latency, gemini_chunks=4):
+        self.latency = latency  # {"genius": s, "spotify": s, "gemini": s}
+        self.gemini_chunks = gemini_chunks
+        self.genius_search = load_fixture("genius_search.json")
+        self.genius_songs = load_fixture("genius_artist_songs.json")
+        self.spotify_token = load_fixture("spotify_token.json")
+        self.spotify_search = load_fixture("spotify_search_artist.json")
+        self.spotify_top_tracks = load_fixture("spotify_top_tracks.json")
+        self.gemini_response = load_fixture("gemini_generate_content.json")
+        self.pages = [page.read_text(encoding="utf-8") for page in sorted(PAGES_DIR.glob("*.html"))]
+        self.calls = {"genius": 0, "spotify": 0, "gemini": 0}
+        self._lock = threading.Lock()
+        self.server = None
+
+    def count(self, upstream):
+        with self._lock:
+            self.calls[upstream] += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """Variáveis de ambiente que apontam o app para este servidor."""
+        return {
+            "GENIUS_BASE_URL": f"{self.base_url}/genius",
+            "GENIUS_API_TOKEN": "stub",
+            "SPOTIFY_ACCOUNTS_URL": f"{self.base_url}/spotify/token",
+            "SPOTIFY_API_URL": f"{self.base_url}/spotify/v1",
+            "SPOTIFY_CLIENT_ID": "stub",
+            "SPOTIFY_CLIENT_SECRET": "stub",
+            "GEMINI_BASE_URL": f"{self.base_url}/gemini",
+            "GEMINI_API_KEY": "stub",
+        }
+
+    # Respostas
+    def song(self, artist_name, artist_id, number):
+        song = copy.deepcopy(self.genius_songs["response"]["songs"][0])
+        song["id"] = artist_id * 1000 + number
+        song["title"] = f"Canção {number} de {artist_name}"
+        song["full_title"] = f"{song['title']} by {artist_name}"
+        song["url"] = f"{self.base_url}/genius/songs/{artist_id}-{number}"
+        song["primary_artist"] = dict(song["primary_artist"], id=artist_id, name=artist_name)
+        return song
+
+    def genius_search_response(self, query):
+        response = copy.deepcopy(self.genius_search)
+        hit = response["response"]["hits"][0]["result"]
+        song = self.song(query, artist_id_for(query), 1)
+        hit.update(full_title=song["full_title"], url=song["url"], primary_artist=song["primary_artist"])
+        return response
+
+    def genius_songs_response(self, artist_id, page, per_page):
+        start = (page - 1) * per_page
+        numbers = range(start + 1, min(start + per_page, SONGS_PER_ARTIST) + 1)
+        songs = [self.song(f"Artista {artist_id}", artist_id, number) for number in numbers]
+        has_next = start + per_page < SONGS_PER_ARTIST
+        return {"meta": {"status": 200}, "response": {"songs": songs, "next_page": page + 1 if has_next else None}}
+
+    def spotify_search_response(self, query):
+        response = copy.deepcopy(self.spotify_search)
+        artist = response["artists"]["items"][0]
+        artist["id"] = f"stub{artist_id_for(query)}"
+        artist["name"] = query
+        return response
+
+    def spotify_top_tracks_response(self, artist_id):
+        sample = self.spotify_top_tracks["tracks"][0]
+        tracks = []
+        for number in range(1, TOP_TRACKS + 1):
+            track = copy.deepcopy(sample)
+            track["id"] = f"{artist_id}-{number}"
+            track["name"] = f"Faixa {number}"
+            tracks.append(track)
+        return {"tracks": tracks}
+
+    def gemini_text(self, prompt):
+        # Resposta com tamanho proporcional ao prompt, como uma tradução
+        return f"Resposta de teste ({len(prompt)} caracteres no prompt).\n" + prompt[-2000:]
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), make_handler(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="stub-upstreams", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def make_handler(stubs):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, body, content_type="application/json", status=200):
+            if not isinstance(body, bytes):
+                body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def upstream(self, path):
+            name = path.split("/")[1]
+            stubs.count(name)
+            time.sleep(stubs.latency.get(name, 0))
+            return name
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            parts = url.path.strip("/").split("/")
+            self.upstream(url.path)
+
+            if url.path == "/genius/search":
+                return self.send_body(stubs.genius_search_response(query.get("q", "")))
+            if parts[:2] == ["genius", "artists"] and parts[-1] == "songs":
+                page, per_page = int(query.get("page", 1)), int(query.get("per_page", 20))
+                return self.send_body(stubs.genius_songs_response(int(parts[2]), page, per_page))
+            if parts[:2] == ["genius", "songs"]:
+                number = int(parts[2].rsplit("-", 1)[1])
+                page = stubs.pages[number % len(stubs.pages)]
+                return self.send_body(page.encode("utf-8"), "text/html; charset=utf-8")
+            if url.path == "/spotify/v1/search":
+                return self.send_body(stubs.spotify_search_response(query.get("q", "")))
+            if parts[:3] == ["spotify", "v1", "artists"] and parts[-1] == "top-tracks":
+                return self.send_body(stubs.spotify_top_tracks_response(parts[3]))
+            self.send_body({"error": "não encontrado"}, status=404)
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            body = self.read_body()
+            self.upstream(url.path)
+
+            if url.path == "/spotify/token":
+                return self.send_body(stubs.spotify_token)
+            if url.path.startswith("/gemini/") and ":" in url.path:
+                request = json.loads(body or b"{}")
+                prompt = "".join(
+                    part.get("text", "") for content in request.get("contents", []) for part in content.get("parts", [])
+                )
+                text = stubs.gemini_text(prompt)
+                if url.path.endswith(":streamGenerateContent"):
+                    return self.send_stream(text)
+                response = copy.deepcopy(stubs.gemini_response)
+                response["candidates"][0]["content"]["parts"][0]["text"] = text
+                return self.send_body(response)
+            self.send_body({"error": "não encontrado"}, status=404)
+
+        def send_stream(self, text):
+            size = max(1, len(text) // stubs.gemini_chunks + 1)
+            events = b""
+            for start in range(0, len(text), size):
+                chunk = copy.deepcopy(stubs.gemini_response)
+                chunk["candidates"][0]["content"]["parts"][0]["text"] = text[start:start + size]
+                events += b"data: " + json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n"
+            self.send_body(events, "text/event-stream")
+
+    return Handler
+
+
+def add_latency_arguments(parser):
+    parser.add_argument("--genius-latency", type=float, default=0.1, help="latência do Genius em segundos (padrão: 0.1)")
+    parser.add_argument("--spotify-latency", type=float, default=0.05, help="latência do Spotify em segundos (padrão: 0.05)")
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="latência do Gemini em segundos (padrão: 1.0)")
+
+
+def latency_from_args(args):
+    return {"genius": args.genius_latency, "spotify": args.spotify_latency, "gemini": args.gemini_latency}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stubs locais do Genius, do Spotify e do Gemini.")
+    parser.add_argument("--port", type=int, default=8900)
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+    stubs = StubUpstreams(latency_from_args(args)).start(port=args.port)
+    for key, value in stubs.environment().items():
+        print(f"export {key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stubs.stop()
@@ -5,3 +5,47 @@ const api = axios.create({
 });
 
 export default api;
+
+// Consome uma rota de streaming (server-sent events) e repassa cada trecho de texto recebido
+export async function streamAI(
+  path: string,
+  lyrics: string,
+  onText: (text: string) => void
+): Promise<void> {
+  const response = await fetch(path, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ lyrics }),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Erro na requisição: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Eventos SSE são separados por uma linha em branco
+    const events = buffer.split('\n\n');
+    buffer = events.pop() ?? '';
+
+    for (const rawEvent of events) {
+      let eventName = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) eventName = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (!data) continue;
+
+      const payload = JSON.parse(data);
+      if (eventName === 'error') throw new Error(payload.error);
+      if (eventName === 'message' && payload.text) onText(payload.text);
+    }
+  }
+}
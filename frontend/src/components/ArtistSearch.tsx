@@ -7,6 +7,11 @@ interface Song {
   image_url?: string;
 }
 
+interface ArtistSuggestion {
+  name: string;
+  query: string;
+}
+
 interface ArtistSearchProps {
   searchTerm: string;
   onSearchTermChange: (term: string) => void;
@@ -26,6 +31,8 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
   const [error, setError] = useState<string>('');
   const [isMobile, setIsMobile] = useState<boolean>(false);
   const [isVerySmall, setIsVerySmall] = useState<boolean>(false);
+  const [suggestions, setSuggestions] = useState<ArtistSuggestion[]>([]);
+  const [showSuggestions, setShowSuggestions] = useState<boolean>(false);
 
   useEffect(() => {
     const checkScreenSize = () => {
@@ -45,11 +52,45 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
     };
   }, []);
 
-  const handleSearch = useCallback(async () => {
-    if (!searchTerm.trim()) return;
+  // Autocomplete: consulta o índice local de artistas depois de uma pausa na digitação
+  useEffect(() => {
+    const term = searchTerm.trim();
+    if (term.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(
+          `/api/artist_suggest?q=${encodeURIComponent(term)}`
+        );
+        if (!cancelled) {
+          setSuggestions(response.data.suggestions || []);
+        }
+      } catch (err) {
+        // Sem sugestões, a busca continua funcionando normalmente
+        if (!cancelled) {
+          setSuggestions([]);
+        }
+      }
+    }, 200);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm]);
+
+  const handleSearch = useCallback(async (term?: string) => {
+    const artist = term ?? searchTerm;
+    if (!artist.trim()) return;
+
+    setShowSuggestions(false);
 
     // Notificar o componente pai que a busca foi submetida
-    onSearchSubmit(searchTerm);
+    onSearchSubmit(artist);
 
     try {
       setLoading(true);
@@ -57,7 +98,7 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
       onSearchStart(); // Notifica o componente pai que a busca iniciou
 
       const response = await axios.get(
-        `/api/search_artist?artist=${encodeURIComponent(searchTerm)}`
+        `/api/search_artist?artist=${encodeURIComponent(artist)}`
       );
       onSongsFetched(response.data.songs);
     } catch (err) {
@@ -72,9 +113,16 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
   const handleKeyDown = (e: React.KeyboardEvent<HTMLInputElement>) => {
     if (e.key === 'Enter') {
       handleSearch();
+    } else if (e.key === 'Escape') {
+      setShowSuggestions(false);
     }
   };
 
+  const handleSuggestionClick = (suggestion: ArtistSuggestion) => {
+    onSearchTermChange(suggestion.name);
+    handleSearch(suggestion.query);
+  };
+
   return (
     <div
       style={{
@@ -98,8 +146,14 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
             isVerySmall ? 'Nome do artista' : 'Digite o nome do artista'
           }
           value={searchTerm}
-          onChange={(e) => onSearchTermChange(e.target.value)}
+          onChange={(e) => {
+            onSearchTermChange(e.target.value);
+            setShowSuggestions(true);
+          }}
           onKeyDown={handleKeyDown}
+          onFocus={() => setShowSuggestions(true)}
+          // O atraso deixa o clique na sugestão acontecer antes de a lista sumir
+          onBlur={() => setTimeout(() => setShowSuggestions(false), 150)}
           style={{
             flex: 1,
             border: 'none',
@@ -111,7 +165,7 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
           }}
         />
         <button
-          onClick={handleSearch}
+          onClick={() => handleSearch()}
           disabled={loading}
           style={{
             padding: isVerySmall
@@ -161,6 +215,35 @@ const ArtistSearch: React.FC<ArtistSearchProps> = ({
         </button>
       </div>
 
+      {showSuggestions && suggestions.length > 0 && (
+        <ul
+          style={{
+            listStyle: 'none',
+            margin: '4px 0 0',
+            padding: '4px 0',
+            backgroundColor: '#333',
+            borderRadius: '8px',
+            textAlign: 'left',
+          }}
+        >
+          {suggestions.map((suggestion) => (
+            <li
+              key={`${suggestion.query}-${suggestion.name}`}
+              onMouseDown={(e) => e.preventDefault()}
+              onClick={() => handleSuggestionClick(suggestion)}
+              style={{
+                padding: isMobile ? '8px 12px' : '8px 16px',
+                fontSize: isMobile ? '15px' : '16px',
+                color: 'white',
+                cursor: 'pointer',
+              }}
+            >
+              {suggestion.name}
+            </li>
+          ))}
+        </ul>
+      )}
+
       {error && (
         <p
           style={{
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import ReactMarkdown from 'react-markdown';
+import { streamAI } from '../api';
 
 interface LyricsViewProps {
   songUrl: string;
@@ -89,8 +90,13 @@ const LyricsView: React.FC<LyricsViewProps> = ({ songUrl, onBackClick }) => {
     setIsExplaining(false);
 
     try {
-      const response = await axios.post('/api/translate', { lyrics });
-      setTranslation(response.data.translation);
+      // A tradução é exibida à medida que o modelo gera o texto
+      let text = '';
+      setTranslation('');
+      await streamAI('/api/translate/stream', lyrics, (chunk) => {
+        text += chunk;
+        setTranslation(text);
+      });
     } catch (error) {
       console.error('Erro ao traduzir:', error);
       setTranslation('Erro ao traduzir a letra. Por favor, tente novamente.');
@@ -106,8 +112,13 @@ const LyricsView: React.FC<LyricsViewProps> = ({ songUrl, onBackClick }) => {
     setIsExplaining(true);
 
     try {
-      const response = await axios.post('/api/explain', { lyrics });
-      setTranslation(response.data.explanation);
+      // A explicação em markdown é renderizada à medida que o modelo gera o texto
+      let text = '';
+      setTranslation('');
+      await streamAI('/api/explain/stream', lyrics, (chunk) => {
+        text += chunk;
+        setTranslation(text);
+      });
     } catch (error) {
       console.error('Erro ao explicar:', error);
       setTranslation(
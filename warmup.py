@@ -0,0 +1,224 @@
+"""
+Pré-aquecimento do cache: busca com antecedência os artistas mais acessados, para que a
+atualização diária das paradas não vire uma enxurrada de buscas sem cache no horário de pico.
+
+Preenche enhanced_search_cache, artist_search_cache e lyrics_file_cache (e, com --translate,
+as traduções) usando as mesmas funções das rotas, com concorrência e ritmo limitados.
+O progresso é gravado em um arquivo de estado, então uma execução interrompida continua
+de onde parou.
+
+Exemplos:
+    python warmup.py --file artistas.txt
+    python warmup.py --access-log /var/log/nginx/access.log --top 200 --translate
+"""
+import argparse
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+from api import routes
+from api.http_client import set_request_hook
+from api.cache import load_file_cache, save_file_cache
+from api.config import CIRCUIT_RESET_TIMEOUT
+
+ACCESS_LOG_ARTIST_RE = re.compile(r"/(?:enhanced_search|search_artist)\?(?:[^\s\"]*&)?artist=([^&\s\"]+)")
+
+
+def read_artist_file(path):
+    """Um artista por linha; linhas vazias e iniciadas por # são ignoradas."""
+    artists = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            artists.append(line)
+    return artists
+
+
+def read_access_log(path, top):
+    """Os artistas mais buscados em /enhanced_search e /search_artist, do mais para o menos buscado."""
+    counts = Counter()
+    with open(path, encoding="utf-8", errors="replace") as log_file:
+        for line in log_file:
+            for match in ACCESS_LOG_ARTIST_RE.finditer(line):
+                counts[unquote_plus(match.group(1)).strip()] += 1
+    return [artist for artist, _ in counts.most_common(top) if artist]
+
+
+class Throttle:
+    """
+    Espaça as requisições às APIs externas para no máximo `rate` por segundo, somando todas
+    as threads. É instalado como hook do cliente HTTP (cada busca do Spotify ou do Genius faz
+    várias requisições, e as retentativas também contam) e chamado antes de cada chamada ao Gemini.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        """Adia todas as próximas chamadas, ex.: enquanto o circuito de um serviço está aberto."""
+        with self._lock:
+            self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+class WarmupState:
+    """Artistas já aquecidos, gravados no arquivo de estado a cada artista concluído."""
+
+    def __init__(self, path, reset=False):
+        self.path = Path(path)
+        data = {} if reset else load_file_cache(self.path)
+        self.done = set(data.get("done", []))
+        self._lock = threading.Lock()
+
+    def mark_done(self, artist):
+        with self._lock:
+            self.done.add(artist)
+            save_file_cache({"done": sorted(self.done)}, self.path)
+
+
+class Stats:
+    def __init__(self, total):
+        self.total = total
+        self.started_at = time.monotonic()
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, **changes):
+        with self._lock:
+            self.counts.update(changes)
+
+    def report(self, artist=None):
+        with self._lock:
+            elapsed = time.monotonic() - self.started_at
+            done = self.counts["artists"] + self.counts["failed"]
+            rate = done / elapsed if elapsed else 0
+            line = (
+                f"[{done}/{self.total}] {rate:.2f} artistas/s, "
+                f"{self.counts['lyrics'] / elapsed if elapsed else 0:.2f} letras/s | "
+                f"letras {self.counts['lyrics']}, traduções {self.counts['translations']}, "
+                f"já em cache {self.counts['cached']}, falhas {self.counts['failed']}"
+            )
+        print(f"{line} | {artist}" if artist else line)
+
+
+def call(throttle, loader, *args):
+    """Executa um loader das rotas; com o circuito de um serviço aberto, pausa as próximas requisições."""
+    result, error, status = loader(*args)
+    if status == 503:
+        throttle.pause(CIRCUIT_RESET_TIMEOUT)
+    return result, error, status
+
+
+def warm_artist(artist, args, throttle, stats):
+    """Aquece as buscas, as letras e, opcionalmente, as traduções de um artista. Retorna True se concluiu."""
+    # As rotas usam a consulta canônica do índice de artistas nas chaves de cache
+    query = routes.resolve_artist_query(artist)
+    artist_hash = routes.generate_hash(query)
+    ok = True
+
+    if routes.enhanced_search_cache.get(artist_hash):
+        stats.add(cached=1)
+    else:
+        result, error, _ = call(throttle, routes.load_enhanced_search, query, artist_hash)
+        # Resultados parciais não são gravados no cache, então o artista fica para a próxima execução
+        ok = not error and not result.get("partial")
+
+    cached_search = routes.artist_search_cache.get(artist_hash)
+    if cached_search:
+        stats.add(cached=1)
+        search = cached_search["data"]
+    else:
+        search, error, _ = call(throttle, routes.load_artist_search, query, artist_hash)
+        if error:
+            return False
+
+    for song in (search or {}).get("songs", [])[:args.songs]:
+        url_hash = routes.generate_hash(song["url"])
+        cached_lyrics = routes.lyrics_file_cache.get(url_hash)
+        if cached_lyrics:
+            stats.add(cached=1)
+            lyrics = cached_lyrics["data"]
+        else:
+            lyrics, error, _ = call(throttle, routes.load_lyrics, song["url"], url_hash)
+            if error:
+                ok = False
+                continue
+            stats.add(lyrics=1)
+
+        if args.translate:
+            content_hash = routes.generate_content_hash(lyrics, routes.TRANSLATE_PROMPT, routes.GEMINI_MODEL)
+            if routes.translate_file_cache.get(content_hash):
+                stats.add(cached=1)
+                continue
+            # O SDK do Gemini não passa pelo cliente HTTP: cada tradução conta como uma requisição
+            throttle.wait()
+            _, error, _ = call(throttle, routes.translate_item, lyrics)
+            if error:
+                ok = False
+            else:
+                stats.add(translations=1)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-aquece o cache de artistas, letras e traduções.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="arquivo com um artista por linha")
+    source.add_argument("--access-log", help="log de acesso de onde extrair os artistas mais buscados")
+    parser.add_argument("--top", type=int, default=100, help="artistas lidos do log de acesso (padrão: 100)")
+    parser.add_argument("--songs", type=int, default=5, help="letras aquecidas por artista (padrão: 5)")
+    parser.add_argument("--translate", action="store_true", help="também traduzir as letras aquecidas")
+    parser.add_argument("--concurrency", type=int, default=4, help="artistas processados ao mesmo tempo (padrão: 4)")
+    parser.add_argument("--rate", type=float, default=5, help="requisições às APIs externas por segundo, incluindo retentativas (padrão: 5)")
+    parser.add_argument("--state", default="cache/warmup_state.json", help="arquivo de estado para continuar depois")
+    parser.add_argument("--reset", action="store_true", help="ignorar o estado salvo e aquecer tudo de novo")
+    args = parser.parse_args()
+
+    artists = read_artist_file(args.file) if args.file else read_access_log(args.access_log, args.top)
+    artists = list(dict.fromkeys(artists))
+    Path(args.state).parent.mkdir(parents=True, exist_ok=True)
+    state = WarmupState(args.state, reset=args.reset)
+    pending = [artist for artist in artists if artist not in state.done]
+    print(f"{len(artists)} artistas, {len(artists) - len(pending)} já aquecidos em execuções anteriores.")
+
+    throttle = Throttle(args.rate)
+    set_request_hook(throttle.wait)
+    stats = Stats(len(pending))
+
+    def run(artist):
+        try:
+            completed = warm_artist(artist, args, throttle, stats)
+        except Exception as e:
+            print(f"Erro ao aquecer '{artist}': {e}")
+            completed = False
+        if completed:
+            state.mark_done(artist)
+            stats.add(artists=1)
+        else:
+            # Fica fora do estado para ser tentado de novo na próxima execução
+            stats.add(failed=1)
+        stats.report(artist)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        list(executor.map(run, pending))
+
+    # Gravar no disco as escritas ainda pendentes antes de sair
+    routes.cache_backend.flush()
+    stats.report()
+
+
+if __name__ == "__main__":
+    main()